@@ -4,12 +4,14 @@ Azure AI Foundry Flask Chat Interface (Clean UI + Managed Identity + Session-Bas
 """
  
 import os
+import functools
 import logging
-from flask import Flask, render_template_string, request, session, jsonify, redirect, url_for
+import threading
+import time
+from flask import Flask, render_template_string, request, session, jsonify, redirect, url_for, make_response
 from dotenv import load_dotenv
-from azure.ai.inference import ChatCompletionsClient
-from azure.ai.inference.models import SystemMessage, UserMessage
-from azure.identity import DefaultAzureCredential
+from fabric_metrics import CONTENT_TYPE, default_registry
+from fabric_tracing import DISABLED_TRACING, FabricTracing, correlation_scope, current_correlation_id
  
 # --- Load environment variables ---
 load_dotenv()
@@ -18,6 +20,28 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
  
+# --- Metrics (served on /metrics together with any Fabric client metrics in this process) ---
+ASK_SECONDS = default_registry().histogram("app_ask_seconds", "Time to answer /ask requests", ("outcome",))
+ 
+# --- Tracing (set ENABLE_TRACING=1; uses OpenTelemetry when installed) ---
+TRACING = FabricTracing() if os.getenv("ENABLE_TRACING", "").lower() in ("1", "true", "yes") else DISABLED_TRACING
+ 
+def traced(span_name):
+    """
+    Run a view in a correlation scope taken from the X-Correlation-ID header (or a new id)
+    and a tracing span; Fabric calls made by the view carry the id as their ActivityId.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with correlation_scope(request.headers.get("X-Correlation-ID")) as correlation_id:
+                with TRACING.span(span_name, {"http.route": request.path}):
+                    response = make_response(view(*args, **kwargs))
+            response.headers["X-Correlation-ID"] = correlation_id
+            return response
+        return wrapper
+    return decorator
+ 
 # --- Flask Setup ---
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
@@ -29,22 +53,38 @@ MODEL_DEPLOYMENT_NAME = os.getenv("MODEL_DEPLOYMENT_NAME")
 if not PROJECT_ENDPOINT or not MODEL_DEPLOYMENT_NAME:
     logger.warning("Please set PROJECT_ENDPOINT and MODEL_DEPLOYMENT_NAME in .env")
  
-# --- Global Azure AI Client ---
+# --- Global Azure AI Client (built on first use; the Azure SDK imports are slow) ---
 client = None
+client_lock = threading.Lock()
  
 def init_ai_client():
+    """
+    Build the Azure AI client now. Call it as a warm-up (e.g. from a gunicorn
+    post_fork hook) to keep the work off the first request; otherwise the
+    first /ask builds it.
+    """
     global client
-    try:
-        logger.info("Initializing Azure AI Foundry ChatCompletionsClient...")
-        credential = DefaultAzureCredential()
-        client = ChatCompletionsClient(PROJECT_ENDPOINT, credential)
-        logger.info("Client initialized successfully using Managed Identity.")
-    except Exception as e:
-        logger.error(f"Failed to initialize Azure AI Client: {e}")
-        client = None
+    with client_lock:
+        if client is not None:
+            return client
+        try:
+            started = time.monotonic()
+            logger.info("Initializing Azure AI Foundry ChatCompletionsClient...")
+            from azure.ai.inference import ChatCompletionsClient
+            from azure.identity import DefaultAzureCredential
+            credential = DefaultAzureCredential()
+            client = ChatCompletionsClient(PROJECT_ENDPOINT, credential)
+            logger.info(f"Client initialized successfully using Managed Identity in {time.monotonic() - started:.2f}s.")
+        except Exception as e:
+            logger.error(f"Failed to initialize Azure AI Client: {e}")
+            client = None
+        return client
  
-# Initialize client on import
-init_ai_client()
+def get_ai_client():
+    """
+    Return the Azure AI client, building it on first use.
+    """
+    return client if client is not None else init_ai_client()
  
 # --- HTML Template ---
 HTML = """
@@ -180,8 +220,10 @@ def index():
     return render_template_string(HTML, chat=session.get("chat", []))
  
 @app.route("/ask", methods=["POST"])
+@traced("app.ask")
 def ask():
-    if client is None:
+    ai_client = get_ai_client()
+    if ai_client is None:
         logger.warning("AI Foundry client not initialized.")
         return jsonify({"answer": "AI Foundry client is not initialized. Please restart the app."})
  
@@ -193,14 +235,16 @@ def ask():
     chat = session.get("chat", [])
     chat.append({"role": "user", "text": question})
  
+    started = time.monotonic()
     try:
-        logger.info("Sending question to Azure AI Foundry...")
+        logger.info(f"Sending question to Azure AI Foundry (correlation id {current_correlation_id()})...")
+        from azure.ai.inference.models import SystemMessage, UserMessage
         messages = [
             SystemMessage(content="You are a helpful assistant."),
             UserMessage(content=question)
         ]
  
-        response = client.complete(
+        response = ai_client.complete(
             deployment_id=MODEL_DEPLOYMENT_NAME,
             messages=messages,
             temperature=0.7,
@@ -208,11 +252,13 @@ def ask():
         )
  
         answer = response.choices[0].message.content
+        ASK_SECONDS.observe(time.monotonic() - started, "ok")
         chat.append({"role": "agent", "text": answer})
         session["chat"] = chat
         return jsonify({"answer": answer})
     except Exception as e:
         logger.error(f"Error querying AI Foundry: {e}")
+        ASK_SECONDS.observe(time.monotonic() - started, "error")
         error_msg = f"Error: {e}"
         chat.append({"role": "agent", "text": error_msg})
         session["chat"] = chat
@@ -222,3 +268,7 @@ def ask():
 def clear_chat():
     session.pop("chat", None)
     return redirect(url_for("index"))
+ 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return default_registry().render(), 200, {"Content-Type": CONTENT_TYPE}
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmark for the Fabric Data Agent client.
+
+Runs batches of distinct questions through ask_many() at several concurrency
+levels and reports p50/p95/p99 latency, throughput and HTTP requests per
+question. By default it starts a local MockFabricServer, so it needs no Fabric
+tenant and can be run before and after a change to catch regressions.
+
+Usage:
+    python benchmark_client.py
+    python benchmark_client.py --concurrency 1,8,32 --questions 64 --run-delay 2 --throttle-rate 0.05
+    python benchmark_client.py --async --json results.json
+    python benchmark_client.py --url http://127.0.0.1:8765/   # an already running mock server
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import time
+
+from fabric_data_agent_client import AsyncFabricDataAgentClient, FabricDataAgentClient
+from fabric_mock_server import MockFabricServer
+from fabric_token_provider import TokenProvider
+
+
+def percentile(values: list, pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of numbers.
+
+    Args:
+        values (list): The samples
+        pct (float): Percentile between 0 and 100
+
+    Returns:
+        float: The percentile, or 0.0 for no samples
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _questions(level: int, count: int):
+    # Distinct questions so coalescing and the answer cache don't hide the work
+    for index in range(count):
+        yield f"Benchmark c{level} q{index}: show the latest positive cases by state"
+
+
+def summarize(client, server, level: int, results: list, wall: float) -> dict:
+    """
+    Summarize one concurrency level.
+
+    Args:
+        client: The sync or async client
+        server (MockFabricServer): The in-process mock, or None when benchmarking a URL
+        level (int): Maximum questions in flight
+        results (list): ask_many() results
+        wall (float): Wall time for the whole batch in seconds
+
+    Returns:
+        dict: Latency percentiles, throughput, error counts and requests per question
+    """
+    # Background thread deletes count towards the cost of a question
+    client.thread_cleaner.flush(timeout=30)
+
+    count = len(results)
+    latencies = [result["elapsed"] for result in results if result["error"] is None]
+    summary = {
+        "concurrency": level,
+        "questions": count,
+        "ok": len(latencies),
+        "errors": sum(1 for result in results if result["error"] is not None and not result["timed_out"]),
+        "timeouts": sum(1 for result in results if result["timed_out"]),
+        # Failed runs come back as an answer without any assistant message
+        "empty": sum(1 for result in results if result["answer"] == "No response received from the data agent."),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "throughput": count / wall if wall else 0.0,
+        "wall": wall,
+        "requests_per_question": None,
+    }
+    if server is not None:
+        stats = server.stats()
+        summary["requests_per_question"] = stats["requests"] / count if count else 0.0
+        summary["throttled"] = stats["throttled"]
+        summary["by_endpoint"] = stats["by_endpoint"]
+    return summary
+
+
+def run_benchmark(url: str, server, levels: list, count: int, timeout: int, quiet) -> list:
+    """
+    Benchmark FabricDataAgentClient.ask_many() at each concurrency level.
+
+    Args:
+        url (str): Data agent URL
+        server (MockFabricServer): The in-process mock, or None
+        levels (list): Concurrency levels
+        count (int): Questions per level
+        timeout (int): Per-question timeout in seconds
+        quiet: Context manager that silences the client's progress output
+
+    Returns:
+        list: One summary dict per level
+    """
+    summaries = []
+    with quiet:
+        client = FabricDataAgentClient("benchmark-tenant", url, token_provider=TokenProvider.static("mock"),
+                                       max_connections=max(levels) * 2)
+    try:
+        for level in levels:
+            print(f"⏱️ Concurrency {level}: {count} questions...")
+            if server is not None:
+                server.reset_stats()
+            with quiet:
+                started = time.perf_counter()
+                results = list(client.ask_many(_questions(level, count), max_concurrency=level,
+                                               timeout=timeout, use_cache=False))
+                wall = time.perf_counter() - started
+                summaries.append(summarize(client, server, level, results, wall))
+    finally:
+        with quiet:
+            client.close()
+    return summaries
+
+
+async def run_benchmark_async(url: str, server, levels: list, count: int, timeout: int, quiet) -> list:
+    """
+    Benchmark AsyncFabricDataAgentClient.ask_many() at each concurrency level.
+
+    Takes the same arguments and returns the same summaries as run_benchmark().
+    """
+    summaries = []
+    with quiet:
+        client = AsyncFabricDataAgentClient("benchmark-tenant", url, token_provider=TokenProvider.static("mock"),
+                                            max_connections=max(levels) * 2)
+    try:
+        for level in levels:
+            print(f"⏱️ Concurrency {level}: {count} questions...")
+            if server is not None:
+                server.reset_stats()
+            with quiet:
+                started = time.perf_counter()
+                results = [result async for result in client.ask_many(
+                    _questions(level, count), max_concurrency=level, timeout=timeout, use_cache=False
+                )]
+                wall = time.perf_counter() - started
+                summaries.append(summarize(client, server, level, results, wall))
+    finally:
+        with quiet:
+            await client.close()
+    return summaries
+
+
+def print_report(summaries: list):
+    """
+    Print one row per concurrency level.
+    """
+    print("\n📊 Fabric client benchmark")
+    print(f"{'conc':>5} {'n':>5} {'ok':>5} {'err':>4} {'t/o':>4} {'p50 s':>7} {'p95 s':>7} "
+          f"{'p99 s':>7} {'q/s':>7} {'req/q':>6}")
+    for s in summaries:
+        rpq = f"{s['requests_per_question']:.1f}" if s["requests_per_question"] is not None else "n/a"
+        print(f"{s['concurrency']:>5} {s['questions']:>5} {s['ok']:>5} {s['errors']:>4} {s['timeouts']:>4} "
+              f"{s['p50']:>7.2f} {s['p95']:>7.2f} {s['p99']:>7.2f} {s['throughput']:>7.2f} {rpq:>6}")
+
+
+def main():
+    """
+    Run the benchmark from the command line.
+    """
+    parser = argparse.ArgumentParser(description="Latency benchmark for FabricDataAgentClient")
+    parser.add_argument("--url", help="Benchmark this endpoint instead of starting a local mock server")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--questions", type=int, default=32, help="Questions per concurrency level")
+    parser.add_argument("--timeout", type=int, default=120, help="Per-question timeout in seconds")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use AsyncFabricDataAgentClient")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show the client's progress output")
+    parser.add_argument("--queue-delay", type=float, default=0.2)
+    parser.add_argument("--run-delay", type=float, default=1.0)
+    parser.add_argument("--delay-jitter", type=float, default=0.5)
+    parser.add_argument("--api-latency", type=float, default=0.01)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--run-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    server = None
+    url = args.url
+    if url is None:
+        server = MockFabricServer(
+            queue_delay=args.queue_delay, run_delay=args.run_delay, delay_jitter=args.delay_jitter,
+            api_latency=args.api_latency, throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+            error_rate=args.error_rate,
+            run_failure_rate=args.run_failure_rate, seed=args.seed
+        ).start()
+        url = server.url
+        print(f"🧪 Started mock Fabric server at {url}")
+
+    try:
+        with open(os.devnull, "w") as devnull:
+            quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)
+            if args.use_async:
+                summaries = asyncio.run(run_benchmark_async(url, server, levels, args.questions,
+                                                            args.timeout, quiet))
+            else:
+                summaries = run_benchmark(url, server, levels, args.questions, args.timeout, quiet)
+    finally:
+        if server is not None:
+            server.stop()
+
+    print_report(summaries)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the Fabric Data Agent client and the Flask app.
+
+Imports each module in fresh interpreters and reports the median, min and max
+import time. It also checks that the heavy SDKs the modules load lazily
+(openai, httpx, azure-identity, python-dotenv, the Azure AI inference client)
+were not imported. Exits with status 1 if a module is over its time budget or
+pulled in a lazy dependency, so it can gate CI against startup regressions.
+
+Usage:
+    python benchmark_import.py
+    python benchmark_import.py --repeat 10 --budget fabric_data_agent_client=0.2
+    python benchmark_import.py --modules fabric_data_agent_client --json imports.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmark_client import percentile
+
+# Module -> (import time budget in seconds, modules it must not import)
+DEFAULT_TARGETS = {
+    "fabric_data_agent_client": (0.3, ("openai", "httpx", "azure.identity", "azure.core", "dotenv")),
+    "fabric_multi_agent": (0.3, ("openai", "httpx", "azure.identity", "azure.core", "dotenv")),
+    "app": (0.6, ("openai", "azure.identity", "azure.ai.inference"))
+}
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [name for name in {lazy!r} if name in sys.modules]}}))
+"""
+
+
+def measure(module: str, lazy: tuple, repeat: int) -> dict:
+    """
+    Import a module in repeat fresh interpreters.
+
+    Args:
+        module (str): Module to import
+        lazy (tuple): Modules that should not be imported along with it
+        repeat (int): Number of measured imports
+
+    Returns:
+        dict: module, samples, median, min, max and the lazy modules that were loaded
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = _PROBE.format(module=module, lazy=tuple(lazy))
+    samples, loaded = [], set()
+    # The first run is not measured; it writes the bytecode cache
+    for run in range(repeat + 1):
+        result = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr.strip()}")
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        loaded.update(probe["loaded"])
+        if run:
+            samples.append(probe["seconds"])
+    return {
+        "module": module,
+        "samples": samples,
+        "median": percentile(samples, 50),
+        "min": min(samples),
+        "max": max(samples),
+        "loaded": sorted(loaded)
+    }
+
+
+def main():
+    """
+    Run the benchmark from the command line.
+    """
+    parser = argparse.ArgumentParser(description="Import-time benchmark for the Fabric client modules")
+    parser.add_argument("--modules", default=",".join(DEFAULT_TARGETS),
+                        help="Comma-separated modules to import")
+    parser.add_argument("--repeat", type=int, default=5, help="Measured imports per module")
+    parser.add_argument("--budget", action="append", default=[],
+                        help="Override a budget as module=seconds; may be repeated")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    budgets = {module: budget for module, (budget, _) in DEFAULT_TARGETS.items()}
+    for item in args.budget:
+        module, _, seconds = item.partition("=")
+        budgets[module] = float(seconds)
+
+    results, failed = [], False
+    print("\n📊 Import time")
+    print(f"{'module':<28} {'median s':>9} {'min s':>7} {'max s':>7} {'budget s':>9}  lazy modules loaded")
+    for module in [name.strip() for name in args.modules.split(",") if name.strip()]:
+        lazy = DEFAULT_TARGETS.get(module, (None, ()))[1]
+        result = measure(module, lazy, args.repeat)
+        result["budget"] = budgets.get(module)
+        result["ok"] = not result["loaded"] and (result["budget"] is None or result["median"] <= result["budget"])
+        failed = failed or not result["ok"]
+        results.append(result)
+        budget = f"{result['budget']:.2f}" if result["budget"] is not None else "n/a"
+        print(f"{module:<28} {result['median']:>9.3f} {result['min']:>7.3f} {result['max']:>7.3f} {budget:>9}  "
+              f"{', '.join(result['loaded']) or '-'} {'✅' if result['ok'] else '❌'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+    if failed:
+        print("\n❌ Import time regression")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,14 @@ a Fabric Data Agent from outside of the Fabric environment.
 """
 
 import os
-from fabric_data_agent_client import FabricDataAgentClient
+from fabric_data_agent_client import FabricDataAgentClient, load_env
 
 def main():
     """
     Example usage of the Fabric Data Agent Client
     """
-    # Set your configuration here or in environment variables
+    # Set your configuration here or in environment variables (or a .env file)
+    load_env()
     TENANT_ID = os.getenv("TENANT_ID", "your-tenant-id-here")
     DATA_AGENT_URL = os.getenv("DATA_AGENT_URL", "your-data-agent-url-here")
     
@@ -28,6 +29,7 @@ def main():
         print("\n3. Create a .env file with these variables")
         return
     
+    client = None
     try:
         print("🚀 Starting Fabric Data Agent Client Example")
         print("=" * 60)
@@ -38,15 +40,17 @@ def main():
             data_agent_url=DATA_AGENT_URL
         )
         
-        # Example 1: Simple question
-        print("\n📋 Example 1: Simple Data Query")
-        response = client.ask("What data is available in the lakehouse?")
-        print(f"💬 Response: {response}")
-        
-        # Example 2: Another simple query
-        print("\n📋 Example 2: Table Information Query")
-        response = client.ask("Show me information about the tables in the lakehouse")
-        print(f"💬 Response: {response}")
+        # Examples 1 and 2: Simple questions, asked concurrently
+        simple_questions = [
+            "What data is available in the lakehouse?",
+            "Show me information about the tables in the lakehouse"
+        ]
+        for result in client.ask_many(simple_questions, max_concurrency=2):
+            print(f"\n📋 Example {result['index'] + 1}: {result['question']}")
+            if result["error"] is None:
+                print(f"💬 Response ({result['elapsed']:.1f}s): {result['answer']}")
+            else:
+                print(f"❌ Error: {result['error']}")
         
         # Example 3: Get detailed run information with SQL query extraction
         print("\n📋 Example 3: Detailed Run Analysis with SQL Query Extraction and Raw Markdown Tables")
@@ -139,7 +143,13 @@ def main():
                 print(f"\n📄 No lakehouse data source detected")
         else:
             print(f"❌ Error in detailed run: {run_details['error']}")
-        
+
+        # Example 4: Follow-up questions in one conversation (the agent keeps context)
+        print("\n📋 Example 4: Multi-turn Conversation")
+        with client.conversation() as conversation:
+            print(conversation.ask("Which state had the most positive COVID-19 cases?"))
+            print(conversation.ask("And how many cases was that?"))
+
         print("\n✅ All examples completed successfully!")
         
     except KeyboardInterrupt:
@@ -151,6 +161,10 @@ def main():
         print("- Check that your TENANT_ID and DATA_AGENT_URL are correct")
         print("- Make sure you have access to the Fabric Data Agent")
         print("- Verify your Azure account has the necessary permissions")
+    finally:
+        # Deletes the threads the examples created before the script exits
+        if client is not None:
+            client.close()
 
 if __name__ == "__main__":
     main()
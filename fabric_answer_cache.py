@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Answer cache for the Fabric Data Agent client.
+
+Caches answers by data agent URL and normalized question so repeated questions
+skip the full assistant/thread/run cycle. Entries expire after a TTL, the
+in-memory tier is a size-bounded LRU, and an optional SQLite file keeps
+answers across restarts.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question for cache lookups.
+
+    Args:
+        question (str): The question as asked
+
+    Returns:
+        str: Lower-cased question with whitespace collapsed
+    """
+    return " ".join(question.lower().split())
+
+
+class AnswerCache:
+    """
+    Two-tier answer cache: an in-memory LRU in front of an optional SQLite file.
+
+    Values must be JSON-serializable when the SQLite tier is enabled. Returned
+    values are shared with the cache and should be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0,
+                 sqlite_path: Optional[str] = None):
+        """
+        Initialize the answer cache.
+
+        Args:
+            max_entries (int): Maximum number of entries kept in memory
+            ttl (float): Default time to live for entries in seconds
+            sqlite_path (str): Optional path of a SQLite file for the persistent tier
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sqlite_path = sqlite_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._db.execute("DELETE FROM answers WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+
+    @staticmethod
+    def make_key(data_agent_url: str, question: str, kind: str = "ask") -> str:
+        """
+        Build the cache key for a question.
+
+        Args:
+            data_agent_url (str): The data agent the question is sent to
+            question (str): The question
+            kind (str): Which call the answer belongs to, e.g. "ask" or "run_details"
+
+        Returns:
+            str: A stable hex digest
+        """
+        raw = f"{kind}\n{data_agent_url}\n{normalize_question(question)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """
+        Look up an entry, falling back to the SQLite tier on a memory miss.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    self._counters["memory_hits"] += 1
+                    return value
+                del self._entries[key]
+                self._counters["expirations"] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, value FROM answers WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[0] > now:
+                    value = json.loads(row[1])
+                    self._store_in_memory(key, row[0], value)
+                    self._counters["hits"] += 1
+                    self._counters["disk_hits"] += 1
+                    return value
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        """
+        Store an entry in both tiers.
+
+        Args:
+            key (str): The cache key
+            value: The answer to cache
+            ttl (float): Time to live in seconds, defaults to the cache TTL
+        """
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._store_in_memory(key, expires_at, value)
+            self._counters["sets"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO answers (key, expires_at, value) VALUES (?, ?, ?)",
+                    (key, expires_at, json.dumps(value, default=str))
+                )
+                self._db.commit()
+
+    def _store_in_memory(self, key: str, expires_at: float, value):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def invalidate(self, key: str):
+        """
+        Remove one entry from both tiers.
+
+        Args:
+            key (str): The cache key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self._db.commit()
+
+    def clear(self):
+        """
+        Remove every entry from both tiers.
+        """
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM answers")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss counters and the current memory size.
+
+        Returns:
+            dict: Counters plus size and hit_rate
+        """
+        with self._lock:
+            result = dict(self._counters)
+            result["size"] = len(self._entries)
+        lookups = result["hits"] + result["misses"]
+        result["hit_rate"] = result["hits"] / lookups if lookups else 0.0
+        return result
+
+    def close(self):
+        """
+        Close the SQLite connection, if any.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Resumable batch runner for JSONL question files.
+
+Streams questions from a JSONL file through FabricDataAgentClient with a fixed
+number in flight and appends one JSON line per question to the output file as
+soon as it finishes: the answer, run status, SQL queries, error and timing.
+
+Progress is checkpointed next to the output file after every result, so a
+killed job picks up where it stopped when started again with the same
+arguments (or with more lines appended to the input; a finished run keeps its
+checkpoint and only runs the new lines). The checkpoint records the byte offset of the first unfinished
+input line, the few finished lines after it, and the length of the output
+file. On resume, output written after the last checkpoint is cut off and those
+questions run again, so each question appears in the output once. Memory use
+does not grow with the input: input is read lazily and at most max_window
+lines are tracked between the first unfinished line and the newest one read.
+
+Input lines are JSON objects with a "question" field (and optionally an "id"),
+or plain JSON strings. Blank lines are skipped; lines that cannot be parsed
+are written to the output as errors.
+
+Usage:
+    python fabric_batch_runner.py questions.jsonl results.jsonl --concurrency 8
+    python fabric_batch_runner.py requests.jsonl results.jsonl --field body --id-field request_id
+    python fabric_batch_runner.py questions.jsonl results.jsonl --restart   # ignore the checkpoint
+    python fabric_batch_runner.py questions.jsonl results.jsonl --mock      # against a local mock server
+"""
+
+import argparse
+import contextlib
+import contextvars
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
+
+from fabric_data_agent_client import FabricDataAgentClient, cancellation_scope, load_env
+from fabric_retry import FabricCancelledError, FabricTimeoutError, fabric_error
+
+CHECKPOINT_VERSION = 1
+
+
+class BatchCheckpoint:
+    """
+    Which input lines of a batch run are finished, in constant space.
+
+    Every line below watermark is finished. Lines read since then are kept in
+    a window, in input order, with a flag saying whether they finished.
+    """
+
+    def __init__(self, path: str, input_path: str):
+        self.path = path
+        self.input_path = os.path.abspath(input_path)
+        self.watermark = 0
+        self.offset = 0
+        self.output_offset = 0
+        self.counters = {"completed": 0, "failed": 0}
+        self.resumed_done = set()
+        self._window = OrderedDict()
+        self._next = (0, 0)
+
+    @classmethod
+    def load(cls, path: str, input_path: str) -> "BatchCheckpoint":
+        """
+        Read a checkpoint, or start a new one if the file does not exist.
+
+        Args:
+            path (str): Checkpoint file
+            input_path (str): The input file the run reads
+
+        Returns:
+            BatchCheckpoint: The checkpoint
+
+        Raises:
+            ValueError: If the checkpoint belongs to a different input file
+        """
+        checkpoint = cls(path, input_path)
+        if not os.path.exists(path):
+            return checkpoint
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("input") != checkpoint.input_path:
+            raise ValueError(f"Checkpoint {path} is for {data.get('input')}, not {checkpoint.input_path}; "
+                             "use --restart to start over")
+        checkpoint.watermark = data["watermark"]
+        checkpoint.offset = data["offset"]
+        checkpoint.output_offset = data["output_offset"]
+        checkpoint.counters.update(data.get("counters", {}))
+        checkpoint.resumed_done = set(data.get("done", []))
+        return checkpoint
+
+    @property
+    def window_size(self) -> int:
+        return len(self._window)
+
+    def read(self, line: int, offset: int, next_offset: int):
+        """
+        Track a line that has been read from the input.
+
+        Args:
+            line (int): Line number, counting from 0
+            offset (int): Byte offset where the line starts
+            next_offset (int): Byte offset where the next line starts
+        """
+        self._window[line] = [offset, False]
+        self._next = (line + 1, next_offset)
+        self.resumed_done.discard(line)
+
+    def finish(self, line: int):
+        """
+        Mark a line finished and move the watermark past the finished lines.
+
+        Args:
+            line (int): Line number
+        """
+        self._window[line][1] = True
+        while self._window and next(iter(self._window.values()))[1]:
+            self._window.popitem(last=False)
+        if self._window:
+            self.watermark = next(iter(self._window))
+            self.offset = self._window[self.watermark][0]
+        else:
+            self.watermark, self.offset = self._next
+
+    def save(self, output_offset: int):
+        """
+        Write the checkpoint atomically.
+
+        Args:
+            output_offset (int): Length of the output file covered by this checkpoint
+        """
+        self.output_offset = output_offset
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "input": self.input_path,
+            "watermark": self.watermark,
+            "offset": self.offset,
+            "done": sorted({line for line, (_, done) in self._window.items() if done} | self.resumed_done),
+            "output_offset": output_offset,
+            "counters": self.counters,
+            "updated": time.time()
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+
+
+def _parse_line(raw: bytes, field: str, id_field: str, line: int) -> tuple:
+    """
+    Parse one input line.
+
+    Returns:
+        tuple: (id, question, error); question is None for blank or invalid lines
+    """
+    text = raw.decode("utf-8").strip()
+    if not text:
+        return None, None, None
+    try:
+        record = json.loads(text)
+    except ValueError as e:
+        return line, None, f"Invalid JSON: {e}"
+    if isinstance(record, str):
+        return line, record, None
+    if not isinstance(record, dict):
+        return line, None, "Expected a JSON object or string"
+    question = record.get(field)
+    if not isinstance(question, str) or not question.strip():
+        return record.get(id_field, line), None, f"Missing or empty {field!r} field"
+    return record.get(id_field, line), question, None
+
+
+def _run_question(client, question: str, timeout: int, use_cache: bool, stop: threading.Event) -> tuple:
+    started = time.monotonic()
+    # Interrupting the batch sets stop, which cancels the run on the service
+    with cancellation_scope(stop):
+        try:
+            return client._get_run_details(question, timeout, use_cache), None, time.monotonic() - started
+        except Exception as e:
+            return None, e, time.monotonic() - started
+
+
+def _result_record(line: int, record_id, question: Optional[str], details, error,
+                   elapsed: float) -> dict:
+    record = {
+        "line": line,
+        "id": record_id,
+        "question": question,
+        "answer": None,
+        "run_status": None,
+        "sql_queries": None,
+        "data_retrieval_query": None,
+        "error": None,
+        "error_type": None,
+        "timed_out": False,
+        "elapsed": round(elapsed, 3),
+        "finished_at": time.time()
+    }
+    if details is not None:
+        record.update({
+            "answer": details.answer,
+            "run_status": details.run_status,
+            "sql_queries": details.sql_queries,
+            "data_retrieval_query": details.data_retrieval_query
+        })
+    elif isinstance(error, str):
+        record.update({"error": error, "error_type": "invalid_input"})
+    elif error is not None:
+        failure = fabric_error(error)
+        record.update({
+            "error": str(failure),
+            "error_type": failure.kind,
+            "timed_out": isinstance(failure, FabricTimeoutError)
+        })
+    return record
+
+
+def run_batch(client, input_path: str, output_path: str, checkpoint_path: Optional[str] = None,
+              concurrency: int = 8, timeout: int = 120, use_cache: bool = True, field: str = "question",
+              id_field: str = "id", max_window: Optional[int] = None, restart: bool = False,
+              stop: Optional[threading.Event] = None) -> dict:
+    """
+    Run every question in a JSONL file, resuming from the checkpoint if there is one.
+
+    Args:
+        client (FabricDataAgentClient): The client that runs the questions
+        input_path (str): JSONL file of questions
+        output_path (str): JSONL file the results are appended to
+        checkpoint_path (str): Progress file, defaults to output_path + ".checkpoint"
+        concurrency (int): Questions in flight at once
+        timeout (int): Maximum end-to-end time for each question in seconds
+        use_cache (bool): Use the client's answer cache, if one is configured
+        field (str): Name of the question field in each input object
+        id_field (str): Name of the id field copied to each result
+        max_window (int): Most lines tracked past the first unfinished one; reading
+            pauses when a slow question holds the window open. Defaults to 4x concurrency
+        restart (bool): Ignore an existing checkpoint and overwrite the output
+        stop (threading.Event): Set it to stop early; in-flight runs are cancelled and
+            run again on resume
+
+    Returns:
+        dict: completed, failed, skipped (already done before this run), elapsed
+            seconds and whether the batch finished
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    max_window = max(max_window or 4 * concurrency, concurrency)
+    stop = stop or threading.Event()
+
+    if restart:
+        for path in (checkpoint_path, output_path):
+            if os.path.exists(path):
+                os.remove(path)
+    elif not os.path.exists(checkpoint_path) and os.path.exists(output_path) and os.path.getsize(output_path):
+        raise ValueError(f"{output_path} has results but no checkpoint; use --restart to overwrite it")
+    checkpoint = BatchCheckpoint.load(checkpoint_path, input_path)
+    skipped = checkpoint.counters["completed"] + checkpoint.counters["failed"]
+    if skipped:
+        print(f"⏩ Resuming at line {checkpoint.watermark + 1} ({skipped} questions already done)",
+              file=sys.stderr)
+
+    started = time.monotonic()
+    finished = False
+    with open(input_path, "rb") as source, open(output_path, "ab") as output, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Drop results written after the last checkpoint; their questions run again
+        output.truncate(checkpoint.output_offset)
+        output.seek(checkpoint.output_offset)
+        source.seek(checkpoint.offset)
+        line, offset = checkpoint.watermark, checkpoint.offset
+        running = {}
+
+        def write(result_line: int, record: dict):
+            output.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            output.flush()
+            checkpoint.counters["failed" if record["error"] else "completed"] += 1
+            checkpoint.finish(result_line)
+            checkpoint.save(output.tell())
+
+        def collect(block: bool):
+            done, _ = wait(running, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in done:
+                result_line, record_id, question = running.pop(future)
+                details, error, elapsed = future.result()
+                if isinstance(error, FabricCancelledError) and stop.is_set():
+                    continue
+                record = _result_record(result_line, record_id, question, details, error, elapsed)
+                write(result_line, record)
+                status = "✅" if record["error"] is None else f"❌ {record['error_type']}"
+                print(f"{status} line {result_line + 1} ({elapsed:.1f}s)", file=sys.stderr)
+
+        try:
+            for raw in source:
+                if stop.is_set():
+                    break
+                current, line = line, line + 1
+                already_done = current in checkpoint.resumed_done
+                checkpoint.read(current, offset, offset + len(raw))
+                offset += len(raw)
+                if already_done:
+                    checkpoint.finish(current)
+                    continue
+                record_id, question, error = _parse_line(raw, field, id_field, current)
+                if question is None:
+                    if error is None:
+                        checkpoint.finish(current)
+                    else:
+                        write(current, _result_record(current, record_id, None, None, error, 0.0))
+                    continue
+                # Keep the number in flight and the checkpoint window bounded
+                while running and (len(running) >= concurrency or checkpoint.window_size >= max_window):
+                    collect(block=True)
+                future = executor.submit(contextvars.copy_context().run, _run_question,
+                                         client, question, timeout, use_cache, stop)
+                running[future] = (current, record_id, question)
+                collect(block=False)
+            while running:
+                collect(block=True)
+            finished = not stop.is_set()
+        except KeyboardInterrupt:
+            print("\n🛑 Interrupted, cancelling in-flight questions...", file=sys.stderr)
+            stop.set()
+            # The interrupt may have landed anywhere between writing a result and saving
+            # the checkpoint, leaving the in-memory progress ahead of the file. Go back
+            # to the last saved checkpoint; anything after it runs again on resume
+            checkpoint = BatchCheckpoint.load(checkpoint_path, input_path)
+            output.truncate(checkpoint.output_offset)
+            wait(running)
+
+    return {
+        **checkpoint.counters,
+        "skipped": skipped,
+        "elapsed": time.monotonic() - started,
+        "finished": finished
+    }
+
+
+def main():
+    """
+    Run a batch from the command line.
+    """
+    parser = argparse.ArgumentParser(description="Run a JSONL file of questions through a Fabric Data Agent")
+    parser.add_argument("input", help="JSONL file of questions")
+    parser.add_argument("output", help="JSONL file to append results to")
+    parser.add_argument("--checkpoint", help="Progress file, defaults to OUTPUT.checkpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Questions in flight at once")
+    parser.add_argument("--timeout", type=int, default=120, help="Per-question timeout in seconds")
+    parser.add_argument("--field", default="question", help="Question field in each input object")
+    parser.add_argument("--id-field", default="id", help="Id field copied to each result")
+    parser.add_argument("--max-window", type=int, help="Most lines tracked past the first unfinished one")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the client's answer cache")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and overwrite the output")
+    parser.add_argument("--tenant-id", help="Azure tenant ID, defaults to $TENANT_ID")
+    parser.add_argument("--url", help="Data agent URL, defaults to $DATA_AGENT_URL")
+    parser.add_argument("--mock", action="store_true", help="Run against a local MockFabricServer")
+    parser.add_argument("--verbose", action="store_true", help="Show the client's progress output")
+    args = parser.parse_args()
+
+    load_env()
+    server = None
+    client_kwargs = {"max_connections": max(20, args.concurrency)}
+    tenant_id = args.tenant_id or os.getenv("TENANT_ID")
+    url = args.url or os.getenv("DATA_AGENT_URL")
+    if args.mock:
+        from fabric_mock_server import MockFabricServer
+        from fabric_token_provider import TokenProvider
+        server = MockFabricServer().start()
+        tenant_id, url = "mock", server.url
+        client_kwargs["token_provider"] = TokenProvider.static("mock")
+        print(f"🧪 Started mock Fabric server at {url}", file=sys.stderr)
+    if not tenant_id or not url:
+        parser.error("set --tenant-id and --url (or TENANT_ID and DATA_AGENT_URL), or use --mock")
+
+    # A kill from a job scheduler stops the batch the way Ctrl+C does; repeats are
+    # ignored so the in-flight runs can be cancelled
+    stop = threading.Event()
+
+    def terminate(signum, frame):
+        if not stop.is_set():
+            stop.set()
+            raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, terminate)
+
+    try:
+        with open(os.devnull, "w") as devnull:
+            quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)
+            with quiet:
+                client = FabricDataAgentClient(tenant_id, url, **client_kwargs)
+                try:
+                    summary = run_batch(
+                        client, args.input, args.output, args.checkpoint, args.concurrency, args.timeout,
+                        not args.no_cache, args.field, args.id_field, args.max_window, args.restart, stop
+                    )
+                finally:
+                    client.close()
+    finally:
+        if server is not None:
+            server.stop()
+
+    state = "finished" if summary["finished"] else "stopped; run again to resume"
+    print(f"\n📊 {summary['completed']} completed, {summary['failed']} failed "
+          f"({summary['skipped']} from earlier runs) in {summary['elapsed']:.1f}s, {state}")
+    if not summary["finished"]:
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
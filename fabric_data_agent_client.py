@@ -9,21 +9,56 @@ Requirements:
 - azure-identity
 - openai
 - python-dotenv (optional, for environment variables)
+- h2 (optional, enables HTTP/2 on the pooled connection)
+- numpy / pyarrow (optional, columnar query results via RunDetails.result_tables())
 
 Usage:
 1. Deploy this script in an Azure-hosted environment with SAMI enabled
 2. Assign the appropriate role to the identity for accessing the Fabric Data Agent
 3. Run the script — it will authenticate silently using SAMI
+
+The OpenAI SDK, httpx, azure-identity and python-dotenv are imported on first
+use (or by warm_up()), so importing this module stays fast.
 """
 
+from __future__ import annotations
+
 import time
-import uuid
+import asyncio
+import contextvars
 import json
 import os
+import threading
 import warnings
-from typing import Optional
-from azure.identity import ManagedIdentityCredential
-from openai import OpenAI
+import importlib.util
+import random
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from typing import TYPE_CHECKING, Optional
+from fabric_answer_cache import AnswerCache, normalize_question
+from fabric_metrics import DISABLED_METRICS, FabricMetrics
+from fabric_rate_limit import RateLimiter
+from fabric_result_table import ResultTable
+from fabric_retry import (
+    CircuitBreaker,
+    FabricCancelledError,
+    FabricError,
+    FabricRateLimitedError,
+    FabricTimeoutError,
+    RetryPolicy,
+    fabric_error
+)
+from fabric_run_details import RunDetails
+from fabric_sql_extractor import find_sql_fields, find_sql_statements
+from fabric_table_parser import find_json_arrays, parse_tables, render_table
+from fabric_thread_cleanup import ThreadCleaner
+from fabric_tracing import DISABLED_TRACING, FabricTracing
+from fabric_token_provider import TokenProvider, default_token_provider
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
 
 # Suppress OpenAI Assistants API deprecation warnings
 warnings.filterwarnings(
@@ -32,911 +67,3630 @@ warnings.filterwarnings(
     message=r".Assistants API is deprecated."
 )
 
-# Optional: Load from .env file if available
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass
+_env_loaded = False
 
 
-class FabricDataAgentClient:
+def load_env():
     """
-    Client for calling Microsoft Fabric Data Agents using System Assigned Managed Identity (SAMI).
-    
-    This client handles:
-    - Silent authentication via Azure IMDS
-    - Automatic token refresh
-    - Bearer token management for API calls
+    Load variables from a .env file, if python-dotenv is installed.
+
+    Runs once per process; creating a client calls it, so scripts only need
+    it when they read the environment before that.
     """
-    
-    def _init_(self, tenant_id: str, data_agent_url: str):
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+
+def _openai():
+    # The OpenAI SDK is most of this module's import time; it is loaded when the
+    # first client is built, so by the time an except clause needs it, it is cheap
+    import openai
+    return openai
+
+
+def _httpx():
+    import httpx
+    return httpx
+
+
+def _streaming_rejections() -> tuple:
+    # Errors an endpoint without streaming support answers stream=True with
+    openai = _openai()
+    return openai.BadRequestError, openai.NotFoundError, openai.UnprocessableEntityError
+
+
+FABRIC_API_VERSION = "2024-05-01-preview"
+
+
+class PollingStrategy:
+    """
+    Decides how long to wait between run status checks.
+
+    The base strategy polls at a fixed interval, matching the original client
+    behaviour. Subclasses override next_delay() and may learn from record().
+    Every strategy keeps poll counts so the polling cost can be tuned.
+    """
+
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self._stats_lock = threading.Lock()
+        self._runs = 0
+        self._polls = 0
+
+    def next_delay(self, attempt: int, elapsed: float) -> float:
         """
-        Initialize the Fabric Data Agent client using SAMI.
-        
+        Return the number of seconds to sleep before the next status check.
+
         Args:
-            tenant_id (str): Your Azure tenant ID
-            data_agent_url (str): The published URL of your Fabric Data Agent
+            attempt (int): Number of status checks already made for this run
+            elapsed (float): Seconds since the run was created
+
+        Returns:
+            float: Delay in seconds
         """
-        self.tenant_id = tenant_id
-        self.data_agent_url = data_agent_url
-        self.credential = None
-        self.token = None
-        
-        # Validate inputs
-        if not tenant_id:
-            raise ValueError("tenant_id is required")
-        if not data_agent_url:
-            raise ValueError("data_agent_url is required")
-        
-        print("Initializing Fabric Data Agent Client with SAMI...")
-        print(f"Tenant ID: {tenant_id}")
-        print(f"Data Agent URL: {data_agent_url}")
-        
-        self._authenticate()
-    
-    def _authenticate(self):
+        return self.interval
+
+    def record(self, duration: float, polls: int):
+        """
+        Record a finished run so the strategy can learn from it.
+
+        Args:
+            duration (float): Seconds from run creation to terminal status
+            polls (int): Number of status checks the run took
+        """
+        with self._stats_lock:
+            self._runs += 1
+            self._polls += polls
+
+    def stats(self) -> dict:
+        """
+        Return polling statistics for the runs recorded so far.
+
+        Returns:
+            dict: Number of runs, total polls and average polls per run
+        """
+        with self._stats_lock:
+            return {
+                "runs": self._runs,
+                "polls": self._polls,
+                "avg_polls_per_run": self._polls / self._runs if self._runs else 0.0
+            }
+
+
+class AdaptivePollingStrategy(PollingStrategy):
+    """
+    Polls quickly at first, then backs off exponentially with jitter.
+
+    Once enough runs have been observed, the next check is aimed at the next
+    run-duration percentile (p50, p75, p90, p95, p99) that the run has not yet
+    passed, so typical runs are picked up close to when they finish.
+    """
+
+    PERCENTILES = (50, 75, 90, 95, 99)
+
+    def __init__(self, initial_delay: float = 0.25, max_delay: float = 5.0,
+                 multiplier: float = 1.6, jitter: float = 0.2,
+                 window: int = 200, min_samples: int = 10):
+        """
+        Initialize the adaptive polling strategy.
+
+        Args:
+            initial_delay (float): Delay before the first status check in seconds
+            max_delay (float): Upper bound for any single delay in seconds
+            multiplier (float): Exponential backoff factor between checks
+            jitter (float): Random +/- fraction applied to each delay
+            window (int): Number of recent run durations kept for the estimate
+            min_samples (int): Runs needed before percentiles are used
+        """
+        super().__init__(interval=initial_delay)
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.min_samples = min_samples
+        self._durations = deque(maxlen=window)
+
+    def percentiles(self) -> dict:
+        """
+        Return the current run-duration percentile estimates.
+
+        Returns:
+            dict: Percentile to duration in seconds, empty until min_samples runs
+        """
+        with self._stats_lock:
+            durations = sorted(self._durations)
+        if len(durations) < self.min_samples:
+            return {}
+        return {
+            p: durations[min(len(durations) - 1, int(round(p / 100 * len(durations))) - 1)]
+            for p in self.PERCENTILES
+        }
+
+    def next_delay(self, attempt: int, elapsed: float) -> float:
+        delay = min(self.max_delay, self.initial_delay * (self.multiplier ** attempt))
+
+        # Aim at the next expected completion point if we have history
+        for duration in self.percentiles().values():
+            if duration > elapsed:
+                delay = min(self.max_delay, max(self.initial_delay, duration - elapsed))
+                break
+
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return delay
+
+    def record(self, duration: float, polls: int):
+        super().record(duration, polls)
+        with self._stats_lock:
+            self._durations.append(duration)
+
+    def stats(self) -> dict:
+        result = super().stats()
+        result["duration_percentiles"] = self.percentiles()
+        return result
+
+
+# Run states in which the run is still using agent capacity
+ACTIVE_RUN_STATUSES = ("queued", "in_progress")
+
+# Timeout for the best-effort runs.cancel call made after a deadline expires
+RUN_CANCEL_TIMEOUT = 10.0
+
+# Calls that are safe to repeat after a server error or dropped connection
+IDEMPOTENT_PHASES = frozenset({"run_poll", "message_list", "steps_list", "run_cancel"})
+
+# How each phase is named in deadline timeout messages
+PHASE_DESCRIPTIONS = {
+    "assistant_create": "assistant creation",
+    "thread_create": "thread creation",
+    "message_create": "message creation",
+    "run_create": "run creation",
+    "run_poll": "polling",
+    "run_cancel": "run cancel",
+    "message_list": "message fetch",
+    "steps_list": "step fetch"
+}
+
+
+# Event that cancels questions started in the current context; see cancellation_scope()
+_cancel_event = contextvars.ContextVar("fabric_cancel_event", default=None)
+
+
+@contextmanager
+def cancellation_scope(event: threading.Event):
+    """
+    Make questions started inside the block cancellable through an event.
+
+    Setting the event expires the deadline of every question started in the
+    scope: the question stops at its next check, an active run is cancelled
+    on the service and FabricCancelledError is raised.
+
+    Args:
+        event (threading.Event): Set it to cancel
+    """
+    token = _cancel_event.set(event)
+    try:
+        yield event
+    finally:
+        _cancel_event.reset(token)
+
+
+class _Deadline:
+    """
+    One end-to-end time budget shared by every phase of a question.
+    """
+
+    def __init__(self, timeout: Optional[float], cancellable: bool = True):
+        self.timeout = timeout
+        self.started_at = time.monotonic()
+        self.expires_at = None if timeout is None else self.started_at + timeout
+        self.cancel_event = _cancel_event.get() if cancellable else None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.monotonic()
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self, phase: str):
+        if self.cancelled:
+            raise FabricCancelledError(f"Request cancelled during {phase}")
+        if self.expired():
+            raise FabricTimeoutError(f"Request timed out after {self.timeout} seconds during {phase}")
+
+    def sleep(self, seconds: float):
+        """
+        Sleep, waking early if the question is cancelled.
+        """
+        if self.cancel_event is None:
+            time.sleep(seconds)
+        else:
+            self.cancel_event.wait(seconds)
+
+    async def sleep_async(self, seconds: float):
+        """
+        Sleep without blocking the event loop, waking soon after a cancel.
+        """
+        if self.cancel_event is None:
+            await asyncio.sleep(seconds)
+            return
+        wake_at = time.monotonic() + seconds
+        while not self.cancel_event.is_set():
+            left = wake_at - time.monotonic()
+            if left <= 0:
+                return
+            await asyncio.sleep(min(left, 0.1))
+
+    def request_timeout(self, phase: str, default: float) -> float:
+        """
+        Return the HTTP timeout for the next call of a phase.
+
+        Args:
+            phase (str): Name of the phase, used in the timeout message
+            default (float): The client's normal per-request timeout
+
+        Returns:
+            float: The smaller of the default and the remaining budget
+        """
+        self.check(phase)
+        remaining = self.remaining()
+        return default if remaining is None else min(default, remaining)
+
+
+class _LeaderCancelled(Exception):
+    """
+    Set on a shared result when the caller running the work was cancelled or interrupted.
+
+    A cancellation belongs to the caller that was cancelled, so a waiting caller
+    takes over the work instead of failing with it.
+    """
+
+
+class _SingleFlight:
+    """
+    Coalesces identical concurrent calls from threads into one execution.
+
+    The first caller for a key runs the work; callers that arrive while it is
+    in flight wait for and share its result (or exception). If the first
+    caller is interrupted or cancelled, a waiting caller takes over and runs the work.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, timeout: Optional[float] = None):
         """
-        Authenticate using System Assigned Managed Identity (SAMI).
+        Run fn() once for all concurrent callers with the same key.
+
+        Args:
+            key: Hashable identity of the work
+            fn: Zero-argument callable doing the work
+            timeout (float): How long a waiting caller waits for the shared result
+
+        Returns:
+            The result of fn()
         """
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = Future()
+                    self._calls[key] = future
+
+            if leader:
+                break
+
+            print("🔗 Joining identical in-flight question")
+            wait_for = None if give_up_at is None else max(0.0, give_up_at - time.monotonic())
+            # Not future.result(timeout=...): the leader's FabricTimeoutError is a TimeoutError too,
+            # and must reach this caller unchanged rather than as a wait timeout of its own
+            done, _ = wait([future], timeout=wait_for)
+            if not done:
+                raise FabricTimeoutError(
+                    f"Request timed out after {timeout} seconds waiting for an identical in-flight question"
+                )
+            try:
+                return future.result()
+            except _LeaderCancelled:
+                print("🔗 Identical in-flight question was interrupted, taking over")
+
         try:
-            print("Authenticating with SAMI...")
-            self.credential = ManagedIdentityCredential()
-            self._refresh_token()
-            print("SAMI authentication successful.")
-            
+            result = fn()
+            future.set_result(result)
+            return result
+        except FabricCancelledError:
+            # Cancelled through this caller's cancellation_scope(), e.g. a losing hedge;
+            # the other callers did not ask for that, so one of them takes over
+            future.set_exception(_LeaderCancelled())
+            raise
         except Exception as e:
-            print(f"SAMI authentication failed: {e}")
+            future.set_exception(e)
             raise
-    
-    def _refresh_token(self):
+        except BaseException:
+            # KeyboardInterrupt and the like belong to this caller only
+            future.set_exception(_LeaderCancelled())
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class _AsyncSingleFlight:
+    """
+    Coalesces identical concurrent coroutine calls into one execution.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn, timeout: Optional[float] = None):
         """
-        Refresh the authentication token.
+        Await fn() once for all concurrent callers with the same key.
+
+        Cancelling the task running the work does not cancel the callers
+        waiting for it; the first of them takes over and awaits its own fn().
+
+        Args:
+            key: Hashable identity of the work
+            fn: Zero-argument callable returning an awaitable doing the work
+            timeout (float): How long a waiting caller waits for the shared result
+
+        Returns:
+            The result of fn()
         """
+        loop = asyncio.get_running_loop()
+        give_up_at = None if timeout is None else loop.time() + timeout
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            print("🔗 Joining identical in-flight question")
+            # asyncio.wait() never cancels the shared future, and unlike wait_for() it does not
+            # turn the leader's FabricTimeoutError (a TimeoutError) into a wait timeout
+            done, _ = await asyncio.wait(
+                {future},
+                timeout=None if give_up_at is None else max(0.0, give_up_at - loop.time())
+            )
+            if not done:
+                raise FabricTimeoutError(
+                    f"Request timed out after {timeout} seconds waiting for an identical in-flight question"
+                )
+            try:
+                return future.result()
+            except _LeaderCancelled:
+                print("🔗 Identical in-flight question was cancelled, taking over")
+
+        future = loop.create_future()
+        # Followers may all have given up; don't warn about an unread exception
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._calls[key] = future
         try:
-            print("Refreshing token via SAMI...")
-            if self.credential is None:
-                raise ValueError("No credential available")
-            self.token = self.credential.get_token("https://api.fabric.microsoft.com/.default")
-            print(f"Token obtained, expires at: {time.ctime(self.token.expires_on)}")
-            
+            result = await fn()
+            future.set_result(result)
+            return result
+        except FabricCancelledError:
+            # Cancelled through this caller's cancellation_scope(); a follower takes over
+            future.set_exception(_LeaderCancelled())
+            raise
         except Exception as e:
-            print(f"Token refresh failed: {e}")
-            raise
-    
-    def _get_openai_client(self) -> OpenAI:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            # The leader's cancellation is its own; wake the followers so one takes over
+            future.set_exception(_LeaderCancelled())
+            raise
+        finally:
+            self._calls.pop(key, None)
+
+
+class _ConversationBase:
+    """
+    State shared by FabricConversation and AsyncFabricConversation.
+    """
+
+    def __init__(self, client, idle_timeout: Optional[float] = 900.0):
         """
-        Create an OpenAI client configured for Fabric Data Agent calls.
-        
-        Returns:
-            OpenAI: Configured OpenAI client
+        Initialize the conversation. The Fabric thread is created on the first turn.
+
+        Args:
+            client: The FabricDataAgentClient or AsyncFabricDataAgentClient the conversation runs on
+            idle_timeout (float): Seconds of inactivity after which the thread is
+                discarded, or None to keep it until close()
         """
-        # Check if token needs refresh (refresh 5 minutes before expiry)
-        if self.token and self.token.expires_on <= (time.time() + 300):
-            self._refresh_token()
-        
-        if not self.token:
-            raise ValueError("No valid authentication token available")
-        
-        return OpenAI(
-            api_key="",  # Not used - we use Bearer token
-            base_url=self.data_agent_url,
-            default_query={"api-version": "2024-05-01-preview"},
-            default_headers={
-                "Authorization": f"Bearer {self.token.token}",
-                "Accept": "application/json",
-                "Content-Type": "application/json",
-                "ActivityId": str(uuid.uuid4())
-            }
+        self._client = client
+        self.idle_timeout = idle_timeout
+        self.thread_id = None
+        self.last_message_id = None
+        self.turns = 0
+        self.closed = False
+        self._last_used = time.monotonic()
+
+    def is_idle(self) -> bool:
+        """
+        Return True if the conversation has been unused for longer than idle_timeout.
+        """
+        return (
+            self.idle_timeout is not None
+            and time.monotonic() - self._last_used > self.idle_timeout
         )
-    
+
+    def _start_turn(self):
+        # Called with the turn lock held
+        if self.closed:
+            raise ValueError("Conversation is closed")
+        if self.thread_id is not None and self.is_idle():
+            print("⌛ Conversation was idle, starting a new thread")
+            self._discard_thread()
+
+    def _finish_turn(self, messages: list) -> str:
+        if messages:
+            self.last_message_id = messages[-1].id
+        self.turns += 1
+
+        responses = self._client._collect_responses(messages)
+        if responses:
+            return "\n".join(responses)
+        return "No response received from the data agent."
+
+    def _discard_thread(self):
+        thread_id, self.thread_id = self.thread_id, None
+        self.last_message_id = None
+        if thread_id is not None:
+            self._client.thread_cleaner.release(thread_id)
+
+
+class FabricConversation(_ConversationBase):
+    """
+    A multi-turn conversation that keeps one Fabric thread alive across questions.
+
+    Each turn appends the question to the same thread, so the agent sees the
+    earlier turns, and fetches only the messages added after the new question
+    (using the question's message id as the list cursor). The thread is deleted
+    on close(), or when the conversation is next used after sitting idle for
+    longer than idle_timeout. Turns on one conversation run one at a time.
+    """
+
+    def __init__(self, client, idle_timeout: Optional[float] = 900.0):
+        """
+        Initialize the conversation. The Fabric thread is created on the first turn.
+
+        Args:
+            client (FabricDataAgentClient): The client the conversation runs on
+            idle_timeout (float): Seconds of inactivity after which the thread is
+                discarded, or None to keep it until close()
+        """
+        super().__init__(client, idle_timeout)
+        self._lock = threading.Lock()
+
     def ask(self, question: str, timeout: int = 120) -> str:
         """
-        Ask a question to the Fabric Data Agent.
-        
+        Ask the next question in the conversation.
+
         Args:
             question (str): The question to ask
-            timeout (int): Maximum time to wait for response in seconds
-            
+            timeout (int): Maximum end-to-end time for the turn in seconds
+
         Returns:
-            str: The response from the data agent
+            str: The response from the data agent, or a "Timeout: ..." / "Error: ..." message
+
+        Raises:
+            FabricError: Instead of returning those messages, if the client has raise_errors set
         """
         if not question.strip():
             raise ValueError("Question cannot be empty")
-        
-        print(f"\n❓ Asking: {question}")
-        
+
+        print(f"\n💬 Turn {self.turns + 1}: {question}")
+
         try:
-            client = self._get_openai_client()
-            
-            # Create assistant without specifying model or instructions
-            assistant = client.beta.assistants.create(model="not used")
-            
-            # Create thread and send message
-            thread = client.beta.threads.create()
-            client.beta.threads.messages.create(
-                thread_id=thread.id,
-                role="user",
-                content=question
-            )
-            
-            # Start the run
-            run = client.beta.threads.runs.create(
-                thread_id=thread.id,
-                assistant_id=assistant.id
-            )
-            
-            # Monitor the run with timeout
-            start_time = time.time()
-            while run.status in ["queued", "in_progress"]:
-                if time.time() - start_time > timeout:
-                    print(f"⏰ Request timed out after {timeout} seconds")
-                    break
-                
-                print(f"⏳ Status: {run.status}")
-                time.sleep(2)
-                
-                run = client.beta.threads.runs.retrieve(
-                    thread_id=thread.id,
-                    run_id=run.id
-                )
-            
-            print(f"✅ Final status: {run.status}")
-            
-            # Get the response messages
-            messages = client.beta.threads.messages.list(
-                thread_id=thread.id,
-                order="asc"
-            )
-            
-            # Extract assistant responses
-            responses = []
-            for msg in messages:
-                if msg.role == "assistant":
-                    try:
-                        content = msg.content[0]
-                        # Handle different content types safely
-                        if hasattr(content, 'text'):
-                            text_content = getattr(content, 'text', None)
-                            if text_content is not None and hasattr(text_content, 'value'):
-                                responses.append(text_content.value)
-                            elif text_content is not None:
-                                responses.append(str(text_content))
-                            else:
-                                responses.append(str(content))
-                        else:
-                            responses.append(str(content))
-                    except (IndexError, AttributeError):
-                        responses.append(str(msg.content))
-            
-            # Clean up resources
-            try:
-                client.beta.threads.delete(thread_id=thread.id)
-            except Exception as cleanup_error:
-                print(f"⚠️ Cleanup warning: {cleanup_error}")
-            
-            # Return the response
-            if responses:
-                return "\n".join(responses)
-            else:
-                return "No response received from the data agent."
-        
+            with self._client.tracing.span("fabric.conversation_turn", {"fabric.turn": self.turns + 1}):
+                return self._ask(question, timeout)
         except Exception as e:
-            print(f"❌ Error calling data agent: {e}")
-            return f"Error: {e}"
-    
-    def get_run_details(self, question: str) -> dict:
+            return self._client._error_answer(e)
+
+    def _ask(self, question: str, timeout: int = 120) -> str:
         """
-        Ask a question and return detailed run information including steps.
+        Run one turn, raising on failure.
+
+        Args:
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the turn in seconds
+
+        Returns:
+            str: The response from the data agent
+
+        Raises:
+            FabricTimeoutError: If the deadline expires
+        """
+        with self._lock:
+            self._start_turn()
+
+            deadline = _Deadline(timeout)
+            client = self._client._get_openai_client()
+            run = None
+
+            try:
+                if self.thread_id is None:
+                    self.thread_id = self._client._create_thread(client, deadline)
+
+                message = self._client._call(
+                    "message_create",
+                    client.beta.threads.messages.create,
+                    deadline,
+                    thread_id=self.thread_id,
+                    role="user",
+                    content=question
+                )
+                self.last_message_id = message.id
+
+                run = self._client._create_run(client, self.thread_id, deadline)
+                run, _ = self._client._wait_for_run(client, self.thread_id, run, deadline)
+
+                # Only the messages added after this turn's question
+                messages = list(self._client._call(
+                    "message_list",
+                    client.beta.threads.messages.list,
+                    deadline,
+                    thread_id=self.thread_id,
+                    order="asc",
+                    after=message.id
+                ))
+
+            except (FabricTimeoutError, _openai().APITimeoutError) as e:
+                raise self._client._expire_run(client, self.thread_id, run, deadline, e) from e
+            finally:
+                self._last_used = time.monotonic()
+
+            return self._finish_turn(messages)
+
+    def close(self):
+        """
+        End the conversation and delete its Fabric thread.
+        """
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._discard_thread()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class AsyncFabricConversation(_ConversationBase):
+    """
+    asyncio version of FabricConversation for AsyncFabricDataAgentClient.
+    """
+
+    def __init__(self, client, idle_timeout: Optional[float] = 900.0):
+        """
+        Initialize the conversation. The Fabric thread is created on the first turn.
+
+        Args:
+            client (AsyncFabricDataAgentClient): The client the conversation runs on
+            idle_timeout (float): Seconds of inactivity after which the thread is
+                discarded, or None to keep it until close()
+        """
+        super().__init__(client, idle_timeout)
+        self._lock = asyncio.Lock()
+
+    async def ask(self, question: str, timeout: int = 120) -> str:
+        """
+        Ask the next question in the conversation.
+
+        Args:
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the turn in seconds
+
+        Returns:
+            str: The response from the data agent, or a "Timeout: ..." / "Error: ..." message
+
+        Raises:
+            FabricError: Instead of returning those messages, if the client has raise_errors set
+        """
+        if not question.strip():
+            raise ValueError("Question cannot be empty")
+
+        print(f"\n💬 Turn {self.turns + 1}: {question}")
+
+        try:
+            with self._client.tracing.span("fabric.conversation_turn", {"fabric.turn": self.turns + 1}):
+                return await self._ask(question, timeout)
+        except Exception as e:
+            return self._client._error_answer(e)
+
+    async def _ask(self, question: str, timeout: int = 120) -> str:
+        """
+        Run one turn, raising on failure.
+
+        Args:
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the turn in seconds
+
+        Returns:
+            str: The response from the data agent
+
+        Raises:
+            FabricTimeoutError: If the deadline expires
+        """
+        async with self._lock:
+            self._start_turn()
+
+            deadline = _Deadline(timeout)
+            client = await self._client._get_openai_client()
+            run = None
+
+            try:
+                if self.thread_id is None:
+                    self.thread_id = await self._client._create_thread(client, deadline)
+
+                message = await self._client._call(
+                    "message_create",
+                    client.beta.threads.messages.create,
+                    deadline,
+                    thread_id=self.thread_id,
+                    role="user",
+                    content=question
+                )
+                self.last_message_id = message.id
+
+                run = await self._client._create_run(client, self.thread_id, deadline)
+                run, _ = await self._client._wait_for_run(client, self.thread_id, run, deadline)
+
+                # Only the messages added after this turn's question
+                messages = [m async for m in await self._client._call(
+                    "message_list",
+                    client.beta.threads.messages.list,
+                    deadline,
+                    thread_id=self.thread_id,
+                    order="asc",
+                    after=message.id
+                )]
+
+            except (FabricTimeoutError, _openai().APITimeoutError) as e:
+                raise await self._client._expire_run(client, self.thread_id, run, deadline, e) from e
+            finally:
+                self._last_used = time.monotonic()
+
+            return self._finish_turn(messages)
+
+    async def close(self):
+        """
+        End the conversation and delete its Fabric thread.
+        """
+        async with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._discard_thread()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+
+class _FabricClientBase:
+    """
+    Configuration, bookkeeping and result parsing shared by FabricDataAgentClient
+    and AsyncFabricDataAgentClient.
+
+    Nothing here waits on an API call except _delete_thread(), which runs on
+    the thread cleaner's worker thread. Each client builds its own blocking or
+    awaitable calls on these helpers, so neither is a subclass of the other.
+    """
+
+    # Assistant ids keyed by data agent URL, shared across client instances (sync and async)
+    _assistant_registry = {}
+    _assistant_registry_lock = threading.Lock()
+
+    def __init__(self, tenant_id: str, data_agent_url: str,
+                 max_connections: int,
+                 max_keepalive_connections: int,
+                 keepalive_expiry: float,
+                 http2: bool,
+                 request_timeout: float,
+                 polling_strategy: Optional[PollingStrategy],
+                 answer_cache: Optional[AnswerCache],
+                 coalesce_requests: bool,
+                 token_provider: Optional[TokenProvider],
+                 thread_journal_path: Optional[str],
+                 metrics: Optional[FabricMetrics],
+                 tracing: Optional[FabricTracing],
+                 retry_policy: Optional[RetryPolicy],
+                 circuit_breaker: Optional[CircuitBreaker],
+                 rate_limiter: Optional[RateLimiter],
+                 raise_errors: bool,
+                 cleanup_client_factory):
+        """
+        Store the settings both clients take; see FabricDataAgentClient.__init__().
+
+        cleanup_client_factory returns the synchronous OpenAI client that
+        _delete_thread() uses, since the thread cleaner's worker runs outside
+        any event loop.
+        """
+        # Validate inputs
+        if not tenant_id:
+            raise ValueError("tenant_id is required")
+        if not data_agent_url:
+            raise ValueError("data_agent_url is required")
+
+        load_env()
+        self.tenant_id = tenant_id
+        self.data_agent_url = data_agent_url
+        self.token_provider = token_provider or default_token_provider()
+        self.metrics = metrics or DISABLED_METRICS
+        self.tracing = tracing or DISABLED_TRACING
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.rate_limiter = rate_limiter
+        self.raise_errors = raise_errors
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.request_timeout = request_timeout
+        self.polling_strategy = polling_strategy or AdaptivePollingStrategy()
+        self._streaming_supported = True
+        self.answer_cache = answer_cache
+        self.coalesce_requests = coalesce_requests
+        self._http_client = None
+        self._openai_client = None
+        self._conversations = weakref.WeakSet()
+        self._cleanup_client_factory = cleanup_client_factory
+        self.thread_cleaner = ThreadCleaner(self._delete_thread, journal_path=thread_journal_path)
+
+    @property
+    def token(self):
+        """
+        The current bearer token held by the token provider.
+        """
+        return self.token_provider.current()
+
+    @property
+    def credential(self):
+        """
+        The azure-identity credential behind the token provider, if any.
+        """
+        return self.token_provider.credential
+
+    def _build_openai_client(self, max_connections: int, max_keepalive_connections: int):
+        """
+        Build a synchronous OpenAI client with its own keep-alive pool.
+
+        Args:
+            max_connections (int): Maximum number of concurrent connections in the pool
+            max_keepalive_connections (int): Maximum number of idle connections kept open
+
+        Returns:
+            tuple: (httpx client, OpenAI client)
+        """
+        import httpx
+        from openai import DefaultHttpxClient, OpenAI
+        from fabric_http_auth import FabricBearerAuth
+
+        http_client = DefaultHttpxClient(
+            auth=FabricBearerAuth(self),
+            http2=self.http2,
+            timeout=httpx.Timeout(self.request_timeout, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry
+            )
+        )
+        openai_client = OpenAI(
+            api_key="",  # Not used - we use Bearer token
+            base_url=self.data_agent_url,
+            default_query={"api-version": FABRIC_API_VERSION},
+            default_headers={
+                "Accept": "application/json",
+                "Content-Type": "application/json"
+            },
+            http_client=http_client,
+            max_retries=0  # Retries are made by _call(), which knows which calls are idempotent
+        )
+        return http_client, openai_client
+
+    def _delete_thread(self, thread_id: str):
+        """
+        Delete one thread; called from the thread cleaner's worker.
+
+        Args:
+            thread_id (str): The thread to delete
+        """
+        client = self._cleanup_client_factory()
+        # One attempt, not _call(): the thread cleaner retries failed deletes with its own backoff
+        with self._attempt("thread_delete"):
+            client.beta.threads.delete(thread_id=thread_id, timeout=self.request_timeout)
+
+    def cleanup_stats(self) -> dict:
+        """
+        Return background thread cleanup and leak counters.
+
+        Returns:
+            dict: Counters from ThreadCleaner.stats()
+        """
+        return self.thread_cleaner.stats()
+
+    def _forget_assistant(self, assistant_id: str):
+        """
+        Drop a cached assistant id so the next call creates a new one.
+
+        Args:
+            assistant_id (str): The assistant id that the service no longer knows
+        """
+        with self._assistant_registry_lock:
+            if self._assistant_registry.get(self.data_agent_url) == assistant_id:
+                del self._assistant_registry[self.data_agent_url]
+
+    def _remember_assistant(self, assistant_id: str) -> str:
+        """
+        Cache a newly created assistant id, unless another client cached one first.
+
+        Returns:
+            str: The assistant id to use
+        """
+        with self._assistant_registry_lock:
+            return self._assistant_registry.setdefault(self.data_agent_url, assistant_id)
+
+    def _assistant_missing(self, error: Exception, assistant_id: str) -> bool:
+        """
+        Return True if a 404 from runs.create is about the assistant rather than the thread.
+
+        Args:
+            error (Exception): The NotFoundError raised by runs.create
+            assistant_id (str): The assistant id the run was created with
+        """
+        message = str(error).lower()
+        return assistant_id.lower() in message or "assistant" in message
+
+    def _poll_delay(self, thread_id: str, run, polls: int, start_time: float, deadline: _Deadline) -> float:
+        """
+        Return how long to wait before the next status check of an active run.
+
+        Args:
+            thread_id (str): The thread the run belongs to
+            run: The last retrieved run
+            polls (int): Status checks made so far
+            start_time (float): time.time() when polling started
+            deadline (_Deadline): The question's end-to-end deadline
+
+        Returns:
+            float: Delay in seconds, never past the deadline
+
+        Raises:
+            FabricTimeoutError: If the deadline has expired
+        """
+        remaining = deadline.remaining()
+        if remaining is not None and remaining <= 0:
+            raise FabricTimeoutError(
+                f"Request timed out after {deadline.timeout} seconds during polling",
+                thread_id=thread_id,
+                run_id=run.id,
+                run_status=run.status
+            )
+
+        delay = self.polling_strategy.next_delay(polls, time.time() - start_time)
+        if remaining is not None:
+            delay = min(delay, remaining)
+
+        print(f"⏳ Status: {run.status}")
+        return delay
+
+    def _record_wait(self, run, polls: int, start_time: float, queued_until: Optional[float]):
+        """
+        Record a finished run's polling in the polling strategy, metrics and trace.
+
+        Args:
+            run: The run in its final status
+            polls (int): Status checks the run took
+            start_time (float): time.time() when polling started
+            queued_until (float): time.time() when the run left the queue, if it was seen queued
+        """
+        finished = time.time()
+        self.polling_strategy.record(finished - start_time, polls)
+        self.metrics.count_polls(polls)
+        if queued_until is None:
+            queued_until = finished
+        self.metrics.observe_phase("run_queued", queued_until - start_time)
+        self.metrics.observe_phase("run_in_progress", finished - queued_until)
+        self.tracing.annotate({
+            "fabric.run_id": run.id,
+            "fabric.run_status": run.status,
+            "fabric.poll_count": polls,
+            "fabric.queue_seconds": queued_until - start_time
+        })
+        print(f"✅ Final status: {run.status} ({polls} polls)")
+
+    def _expired(self, run, deadline: _Deadline, error: Exception) -> tuple:
+        """
+        Work out which run a timeout raised while working on a question left behind.
+
+        A single slow request that did not exhaust the deadline is re-raised
+        unchanged.
+
+        Args:
+            run: The last known run, if it was created
+            deadline (_Deadline): The question's end-to-end deadline
+            error (Exception): The timeout that was raised
+
+        Returns:
+            tuple: The run id and status, if known; the caller cancels an active run
+        """
+        if not isinstance(error, FabricTimeoutError) and not deadline.expired():
+            raise error
+
+        run_id = getattr(error, "run_id", None) or (run.id if run is not None else None)
+        run_status = getattr(error, "run_status", None) or (run.status if run is not None else None)
+        return run_id, run_status
+
+    def _expiry_error(self, thread_id: Optional[str], run_id: Optional[str], run_status: Optional[str],
+                      deadline: _Deadline) -> FabricTimeoutError:
+        """
+        Build the error raised for an expired or cancelled question.
+
+        Returns:
+            FabricTimeoutError: FabricCancelledError if the question was cancelled
+        """
+        if deadline.cancelled:
+            print("🚫 Request cancelled")
+            return FabricCancelledError("Request cancelled", thread_id=thread_id, run_id=run_id,
+                                        run_status=run_status)
+
+        message = f"Request timed out after {deadline.timeout} seconds"
+        print(f"⏰ {message}")
+        self.metrics.count_timeout()
+        return FabricTimeoutError(message, thread_id=thread_id, run_id=run_id, run_status=run_status)
+
+    def _coalesce_key(self, question: str, kind: str) -> tuple:
+        return kind, self.data_agent_url, normalize_question(question)
+
+    def _cached(self, question: str, kind: str, use_cache: bool):
+        """
+        Look up a cached answer for a question.
+
+        Args:
+            question (str): The question
+            kind (str): "ask" or "run_details"
+            use_cache (bool): False bypasses the cache entirely
+
+        Returns:
+            tuple: The cache key (None when caching is off) and the cached value or None
+        """
+        if not use_cache or self.answer_cache is None:
+            return None, None
+        key = AnswerCache.make_key(self.data_agent_url, question, kind)
+        value = self.answer_cache.get(key)
+        if value is not None:
+            print("💾 Served from answer cache")
+            self.metrics.count_cache_hit()
+        return key, value
+
+    def _phase(self, name: str):
+        """
+        Time one API round trip, inside a child span of the question when tracing is on.
+
+        Args:
+            name (str): Phase name, e.g. "thread_create"
+        """
+        timer = self.metrics.phase(name)
+        if not self.tracing.enabled:
+            return timer
+        return self.tracing.round_trip(name, timer)
+
+    @contextmanager
+    def _attempt(self, phase: str):
+        """
+        Make one API round trip through the circuit breaker.
+
+        Every way the attempt can end is recorded, including task cancellation
+        and KeyboardInterrupt, so a half-open probe slot is never left taken.
+
+        Args:
+            phase (str): Phase name for metrics and tracing
+        """
+        self.circuit_breaker.before_call()
+        try:
+            with self._phase(phase):
+                yield
+        except BaseException as e:
+            self.circuit_breaker.record(e)
+            raise
+        self.circuit_breaker.record_success()
+
+    def _check_refused_slot(self, phase: str, error: FabricRateLimitedError, deadline: _Deadline):
+        """
+        Turn a refused rate limit slot that would only free up after the deadline into a timeout.
+
+        The question has run out of time, so it takes the expiry path, which
+        cancels an active run, rather than failing as throttled.
+
+        Args:
+            phase (str): Phase name of the call
+            error (FabricRateLimitedError): The rate limiter's refusal
+            deadline (_Deadline): The question's end-to-end deadline
+
+        Raises:
+            FabricTimeoutError: If the slot frees up at or after the deadline
+        """
+        remaining = deadline.remaining()
+        if remaining is not None and error.retry_after is not None and error.retry_after >= remaining:
+            raise FabricTimeoutError(
+                f"Request timed out after {deadline.timeout} seconds waiting for a rate limit slot "
+                f"during {PHASE_DESCRIPTIONS.get(phase, phase)}"
+            ) from error
+
+    def _retry_delay(self, phase: str, attempt: int, error: Exception, deadline: _Deadline) -> Optional[float]:
+        """
+        Decide whether a failed attempt of a call is retried.
+
+        Args:
+            phase (str): Phase name of the call
+            attempt (int): Retries already made for this call
+            error (Exception): The exception the attempt raised
+            deadline (_Deadline): The question's end-to-end deadline
+
+        Returns:
+            float: Seconds to wait before the next attempt, or None to give up
+        """
+        delay = self.retry_policy.next_delay(attempt, error, phase in IDEMPOTENT_PHASES, deadline.remaining())
+        if delay is not None:
+            print(f"🔁 {phase} failed ({fabric_error(error).kind}), retry {attempt + 1} in {delay:.1f}s")
+            self.metrics.count_retry(phase)
+        return delay
+
+    def _failed(self, error: Exception) -> FabricError:
+        """
+        Translate an error from a question into the FabricError callers see.
+
+        Args:
+            error (Exception): The exception raised while answering
+
+        Returns:
+            FabricError: The structured error, to raise when raise_errors is set
+        """
+        failure = fabric_error(error)
+        if failure is not error:
+            failure.__cause__ = error
+        if not isinstance(failure, FabricTimeoutError):
+            print(f"❌ Error calling data agent: {failure}")
+        return failure
+
+    def _error_answer(self, error: Exception) -> str:
+        """
+        Turn an error from ask() or a conversation turn into the text returned instead of an answer.
+
+        Args:
+            error (Exception): The exception raised while answering
+
+        Returns:
+            str: A "Timeout: ..." or "Error: ..." message
+
+        Raises:
+            FabricError: The translated error, if raise_errors is set
+        """
+        error = self._failed(error)
+        if self.raise_errors:
+            raise error
+        if isinstance(error, FabricTimeoutError):
+            return f"Timeout: {error}"
+        return f"Error: {error}"
+
+    def _run_details_error(self, question: str, error: FabricError) -> dict:
+        """
+        Build the dict get_run_details() returns for a failed question.
+
+        Args:
+            question (str): The question
+            error (FabricError): The translated error
+
+        Returns:
+            dict: error and error_type, plus timed_out, run_id and run_status for timeouts
+        """
+        if isinstance(error, FabricTimeoutError):
+            return {
+                "question": question,
+                "error": str(error),
+                "error_type": error.kind,
+                "timed_out": True,
+                "run_id": error.run_id,
+                "run_status": error.run_status,
+                "timestamp": time.time()
+            }
+        return {"error": str(error), "error_type": error.kind}
+
+    def _record_question(self, kind: str, outcome: str, started_at: float):
+        """
+        Record a question's end-to-end time and count it as failed unless it completed.
+
+        Args:
+            kind (str): "ask", "stream" or "run_details"
+            outcome (str): The final run status, or the FabricError kind of the failure
+            started_at (float): time.monotonic() when the question started
+        """
+        self.metrics.observe_question(kind, outcome, time.monotonic() - started_at)
+        if outcome not in ("completed", "timeout", "cancelled"):
+            self.metrics.count_failure(outcome)
+
+    def _answer(self, run, responses: list, deadline: _Deadline, cache_key: Optional[str]) -> str:
+        """
+        Record a finished ask() question and build its answer, caching it if the run completed.
+
+        Args:
+            run: The finished run
+            responses (list): Assistant response texts
+            deadline (_Deadline): The question's end-to-end deadline
+            cache_key (str): Where to store the answer, or None to skip caching
+
+        Returns:
+            str: The response from the data agent
+        """
+        self._record_question("ask", run.status, deadline.started_at)
+
+        # Return the response
+        if responses:
+            answer = "\n".join(responses)
+            if cache_key is not None and run.status == "completed":
+                self.answer_cache.set(cache_key, answer)
+            return answer
+        else:
+            return "No response received from the data agent."
+
+    def _run_details(self, question: str, run, polls: int, steps, messages) -> RunDetails:
+        """
+        Build the run details of a finished run.
+
+        Returns:
+            RunDetails: As returned by get_run_details()
+        """
+        result = self._build_run_details(question, run, steps, messages)
+        result.poll_count = polls
+        self.tracing.annotate({"fabric.sql_count": len(result.sql_queries or [])})
+        return result
+
+    def _finish_run_details(self, result: RunDetails, run, deadline: _Deadline,
+                            cache_key: Optional[str]) -> RunDetails:
+        """
+        Record a finished get_run_details() question, caching the result if the run completed.
+        """
+        self._record_question("run_details", run.status, deadline.started_at)
+
+        if cache_key is not None and run.status == "completed":
+            self.answer_cache.set(cache_key, result.to_dict())
+        return result
+
+    def _batch_result(self, index: int, question: str, start_time: float, answer: Optional[str] = None,
+                      error: Optional[Exception] = None) -> dict:
+        """
+        Build one ask_many() result.
+
+        Args:
+            index (int): Position of the question in the input
+            question (str): The question
+            start_time (float): time.time() when the question started
+            answer (str): The answer, if the question succeeded
+            error (Exception): The exception raised, if it failed
+
+        Returns:
+            dict: index, question, answer, error, error_type, timed_out and elapsed
+        """
+        error_text, error_type, timed_out = None, None, False
+        if error is not None:
+            failure = self._failed(error)
+            error_text, error_type = str(failure), failure.kind
+            timed_out = isinstance(failure, FabricTimeoutError)
+        return {
+            "index": index,
+            "question": question,
+            "answer": answer,
+            "error": error_text,
+            "error_type": error_type,
+            "timed_out": timed_out,
+            "elapsed": time.time() - start_time
+        }
+
+    def invalidate_cached_answer(self, question: str):
+        """
+        Drop the cached answer and run details for a question.
+
+        Args:
+            question (str): The question to forget
+        """
+        if self.answer_cache is not None:
+            for kind in ("ask", "run_details"):
+                self.answer_cache.invalidate(AnswerCache.make_key(self.data_agent_url, question, kind))
+
+    def cache_stats(self) -> dict:
+        """
+        Return answer cache hit/miss statistics.
+
+        Returns:
+            dict: Cache counters, or an empty dict when no cache is configured
+        """
+        return self.answer_cache.stats() if self.answer_cache is not None else {}
+
+    def polling_stats(self) -> dict:
+        """
+        Return run polling statistics collected by the polling strategy.
+
+        Returns:
+            dict: Runs observed, total polls and average polls per run
+        """
+        return self.polling_strategy.stats()
+
+    def _translate_stream_event(self, event) -> Optional[dict]:
+        """
+        Convert one Assistants stream event into an ask_stream() item.
+
+        Args:
+            event: A server-sent event from the streaming run API
+
+        Returns:
+            dict: A status or text item, or None for events callers don't need
+        """
+        name = getattr(event, "event", "")
+        if name == "thread.message.delta":
+            parts = []
+            for block in getattr(event.data.delta, "content", None) or []:
+                text = getattr(block, "text", None)
+                if text is not None and getattr(text, "value", None):
+                    parts.append(text.value)
+            return {"type": "text", "text": "".join(parts)} if parts else None
+        if name.startswith("thread.run.") and not name.startswith("thread.run.step."):
+            return {"type": "status", "status": event.data.status, "run_id": event.data.id}
+        if name == "error":
+            raise RuntimeError(f"Stream error: {event.data}")
+        return None
+
+    def _collect_responses(self, messages) -> list:
+        """
+        Extract the text of every assistant message in a thread.
+        
+        Args:
+            messages: Iterable of thread messages from the OpenAI API
+            
+        Returns:
+            list: Assistant response texts in thread order
+        """
+        responses = []
+        for msg in messages:
+            if msg.role == "assistant":
+                try:
+                    content = msg.content[0]
+                    # Handle different content types safely
+                    if hasattr(content, 'text'):
+                        text_content = getattr(content, 'text', None)
+                        if text_content is not None and hasattr(text_content, 'value'):
+                            responses.append(text_content.value)
+                        elif text_content is not None:
+                            responses.append(str(text_content))
+                        else:
+                            responses.append(str(content))
+                    else:
+                        responses.append(str(content))
+                except (IndexError, AttributeError):
+                    responses.append(str(msg.content))
+        return responses
+
+    def _build_run_details(self, question: str, run, steps, messages) -> RunDetails:
+        """
+        Build the detailed run result from a finished run's steps and messages.
+        
+        Args:
+            question (str): The question that was asked
+            run: The finished run
+            steps: The run steps from the OpenAI API
+            messages: The thread messages from the OpenAI API
+            
+        Returns:
+            RunDetails: Detailed response including run steps, metadata, and SQL queries if lakehouse data source
+        """
+        # Extract SQL queries and data from steps if lakehouse data source is detected
+        sql_analysis = self._extract_sql_queries_with_data(steps)
+        
+        # Also try the old regex method as backup
+        if not sql_analysis["queries"]:
+            regex_queries = self._extract_sql_queries(steps)
+            if regex_queries:
+                sql_analysis["queries"] = regex_queries
+                sql_analysis["data_retrieval_query"] = regex_queries[0] if regex_queries else None
+        
+        # Also extract data from the final assistant message, read from the models
+        # directly so the raw dumps are only built if the caller asks for them
+        responses = self._collect_responses(messages.data)
+        text_content = responses[-1] if responses else ""
+
+        # Extract structured data from the assistant's text response
+        if text_content:
+            text_data_preview = self._extract_data_from_text_response(text_content)
+            if text_data_preview:
+                # Add the text-based data preview
+                if sql_analysis["queries"]:
+                    # If we have queries but no data previews, or empty previews, use the text-based one
+                    if not sql_analysis["data_previews"] or not any(sql_analysis["data_previews"]):
+                        sql_analysis["data_previews"] = [text_data_preview]
+                    else:
+                        # Add to existing previews
+                        sql_analysis["data_previews"].append(text_data_preview)
+                    
+                    # If we don't have a specific data retrieval query identified, use the first query
+                    if not sql_analysis["data_retrieval_query"] and sql_analysis["queries"]:
+                        sql_analysis["data_retrieval_query"] = sql_analysis["queries"][0]
+                        sql_analysis["data_retrieval_query_index"] = 1
+        
+        result = RunDetails(
+            question,
+            run.status,
+            steps=steps,
+            messages=messages,
+            answer="\n".join(responses)
+        )
+        
+        # Add SQL analysis if found
+        if sql_analysis["queries"]:
+            result.sql_queries = sql_analysis["queries"]
+            result.sql_data_previews = sql_analysis["data_previews"]
+            result.data_retrieval_query = sql_analysis["data_retrieval_query"]
+            
+            print(f"🗃️ Found {len(sql_analysis['queries'])} SQL queries in lakehouse operations")
+            
+            for i, query in enumerate(sql_analysis["queries"], 1):
+                print(f"📄 SQL Query {i}:")
+                print(f"   {query}")
+                
+                # Show data preview if this query retrieved data
+                if i == sql_analysis["data_retrieval_query_index"]:
+                    print(f"   🎯 This query retrieved the data!")
+                    if sql_analysis["data_previews"][i-1]:
+                        print(f"   📊 Data Preview:")
+                        preview = sql_analysis["data_previews"][i-1]
+                        
+                        # Check if the preview is a raw markdown table (single item)
+                        if len(preview) == 1 and '\n' in preview[0] and '|' in preview[0]:
+                            # This is a raw markdown table, print it directly
+                            print(preview[0])
+                        else:
+                            # This is parsed row data, print line by line
+                            for line in preview[:5]:  # Show first 5 lines
+                                print(f"      {line}")
+                            if len(preview) > 5:
+                                print(f"      ... and {len(preview) - 5} more lines")
+                print()  # Empty line for readability
+        
+        return result
+
+    def _extract_sql_queries_with_data(self, steps) -> dict:
+        """
+        Extract SQL queries from run steps using direct JSON parsing and output analysis.
+        
+        Args:
+            steps: The run steps from the OpenAI API
+            
+        Returns:
+            dict: Contains queries, data previews, and which query retrieved data
+        """
+        sql_queries = []
+        data_previews = []
+        data_retrieval_query = None
+        data_retrieval_query_index = None
+        
+        try:
+            for step_idx, step in enumerate(steps.data):
+                if hasattr(step, 'step_details') and step.step_details:
+                    step_details = step.step_details
+                    
+                    # Check for tool calls which typically contain the SQL queries
+                    if hasattr(step_details, 'tool_calls') and step_details.tool_calls:
+                        for tool_idx, tool_call in enumerate(step_details.tool_calls):
+                            # Extract SQL from function arguments
+                            sql_from_args = self._extract_sql_from_function_args(tool_call)
+                            if sql_from_args:
+                                sql_queries.extend(sql_from_args)
+                            
+                            # Extract SQL from tool call output (where it's actually located in Fabric)
+                            sql_from_output = self._extract_sql_from_output(tool_call)
+                            if sql_from_output:
+                                sql_queries.extend(sql_from_output)
+                            
+                            # Extract data from tool call output
+                            data_preview = self._extract_structured_data_from_output(tool_call)
+                            if data_preview:
+                                # If we found data and SQL in this step, it's likely the retrieval query
+                                if sql_from_args or sql_from_output:
+                                    all_sql_this_call = sql_from_args + sql_from_output
+                                    data_retrieval_query = all_sql_this_call[-1] if all_sql_this_call else None
+                                    data_retrieval_query_index = len(sql_queries)
+                            
+                            data_previews.append(data_preview)
+        
+        except Exception as e:
+            print(f"⚠️ Warning: Could not extract SQL queries: {e}")
+        
+        # Remove duplicates while preserving order
+        unique_queries = list(dict.fromkeys(sql_queries))
+        
+        return {
+            "queries": unique_queries,
+            "data_previews": data_previews,
+            "data_retrieval_query": data_retrieval_query,
+            "data_retrieval_query_index": data_retrieval_query_index
+        }
+
+    def _extract_sql_from_function_args(self, tool_call) -> list:
+        """
+        Extract SQL queries from tool call function arguments.
+        
+        Args:
+            tool_call: OpenAI tool call object
+            
+        Returns:
+            list: SQL queries found
+        """
+        import json
+        sql_queries = []
+        
+        try:
+            if hasattr(tool_call, 'function') and tool_call.function:
+                if hasattr(tool_call.function, 'arguments'):
+                    args_str = tool_call.function.arguments
+                    
+                    # Parse the arguments JSON
+                    args = json.loads(args_str)
+                    
+                    if isinstance(args, dict):
+                        # Common keys where SQL queries are stored in Fabric Data Agents
+                        sql_keys = ['sql', 'query', 'sql_query', 'statement', 'command', 'code']
+                        
+                        for key in sql_keys:
+                            if key in args and args[key]:
+                                sql_query = str(args[key]).strip()
+                                if sql_query and len(sql_query) > 10:  # Basic validation
+                                    sql_queries.append(sql_query)
+                        
+                        # Also check for nested structures
+                        for key, value in args.items():
+                            if isinstance(value, dict):
+                                for nested_key in sql_keys:
+                                    if nested_key in value and value[nested_key]:
+                                        sql_query = str(value[nested_key]).strip()
+                                        if sql_query and len(sql_query) > 10:
+                                            sql_queries.append(sql_query)
+        
+        except (json.JSONDecodeError, AttributeError) as e:
+            # If JSON parsing fails, fall back to basic string search
+            try:
+                args_str = str(tool_call.function.arguments)
+                # Look for common SQL patterns in the string
+                if any(keyword in args_str.upper() for keyword in ['SELECT', 'INSERT', 'UPDATE', 'DELETE']):
+                    sql_queries.extend(find_sql_fields(args_str))
+            except Exception as parse_error:
+                print(f"⚠️ Warning: Could not parse tool call arguments: {parse_error}")
+        
+        return sql_queries
+
+    def _extract_sql_from_output(self, tool_call) -> list:
+        """
+        Extract SQL queries from tool call output.
+        
+        Args:
+            tool_call: OpenAI tool call object
+            
+        Returns:
+            list: SQL queries found in output
+        """
+        import json
+        sql_queries = []
+        
+        try:
+            if hasattr(tool_call, 'output') and tool_call.output:
+                output_str = str(tool_call.output)
+                
+                # First try to parse as JSON
+                try:
+                    output_json = json.loads(output_str)
+                    
+                    if isinstance(output_json, dict):
+                        # Look for SQL in common keys
+                        sql_keys = ['sql', 'query', 'sql_query', 'statement', 'command', 'code', 'generated_code']
+                        for key in sql_keys:
+                            if key in output_json and output_json[key]:
+                                sql_query = str(output_json[key]).strip()
+                                if sql_query and len(sql_query) > 10:
+                                    sql_queries.append(sql_query)
+                        
+                        # Check nested structures
+                        for key, value in output_json.items():
+                            if isinstance(value, dict):
+                                for nested_key in sql_keys:
+                                    if nested_key in value and value[nested_key]:
+                                        sql_query = str(value[nested_key]).strip()
+                                        if sql_query and len(sql_query) > 10:
+                                            sql_queries.append(sql_query)
+                
+                except json.JSONDecodeError:
+                    # If not JSON, use regex to find SQL patterns
+                    pass
+                
+                # Always also scan the raw text as backup/additional method
+                if any(keyword in output_str.upper() for keyword in ['SELECT', 'INSERT', 'UPDATE', 'DELETE', 'FROM']):
+                    sql_queries.extend(find_sql_fields(output_str))
+                    sql_queries.extend(find_sql_statements(output_str, stop_at_newline=True, unescape=True))
+        
+        except Exception as e:
+            print(f"⚠️ Warning: Could not extract SQL from output: {e}")
+        
+        return sql_queries
+
+    def _extract_structured_data_from_output(self, tool_call) -> list:
+        """
+        Extract structured data from tool call output using JSON parsing.
+        
+        Args:
+            tool_call: OpenAI tool call object
+            
+        Returns:
+            list: Formatted data lines
+        """
+        import json
+        data_lines = []
+        
+        try:
+            if hasattr(tool_call, 'output') and tool_call.output:
+                output_str = str(tool_call.output)
+                
+                # Try to parse as JSON first
+                try:
+                    data = json.loads(output_str)
+                    
+                    if isinstance(data, list) and len(data) > 0:
+                        # Handle list of records (typical query result)
+                        if isinstance(data[0], dict):
+                            data_lines = self._format_list_data(data)
+                    
+                    elif isinstance(data, dict):
+                        # Handle single record or structured response
+                        if 'data' in data and isinstance(data['data'], list):
+                            # Nested data structure
+                            return self._format_list_data(data['data'])
+                        elif 'results' in data and isinstance(data['results'], list):
+                            # Results structure
+                            return self._format_list_data(data['results'])
+                        else:
+                            # Single record
+                            data_lines.append("| Key | Value |")
+                            data_lines.append("|---|---|")
+                            for key, value in data.items():
+                                data_lines.append(f"| {key} | {str(value)} |")
+                
+                except json.JSONDecodeError:
+                    # If not JSON, look for other structured formats
+                    data_lines = self._extract_data_preview(output_str)
+        
+        except Exception as e:
+            print(f"⚠️ Warning: Could not extract structured data: {e}")
+        
+        return data_lines
+
+    def _first_tables(self, text: str, kinds: tuple, max_rows: Optional[int] = None) -> dict:
+        """
+        Parse text once and keep the first table of each requested kind.
+
+        Markdown and bare pipe tables share the "markdown" kind. Parsing stops as
+        soon as a table of the first (preferred) kind is complete.
+
+        Args:
+            text (str): Text to parse
+            kinds (tuple): Kinds to keep ("markdown", "numbered", "list", "csv"), preferred first
+            max_rows (int): Maximum rows kept per table, None for all
+
+        Returns:
+            dict: Kind -> (header record, list of row values)
+        """
+        tables = {}
+        current = None
+        for record in parse_tables(text):
+            kind = record.get("format")
+            if kind == "pipe":
+                kind = "markdown"
+            if record["type"] == "header":
+                if kind in kinds and kind not in tables:
+                    current = tables[kind] = (record, [])
+            elif current is None or record["table"] != current[0]["table"]:
+                continue
+            elif record["type"] == "row":
+                if max_rows is None or len(current[1]) < max_rows:
+                    current[1].append(record["values"])
+            else:
+                if kinds[0] in tables:
+                    break
+                current = None
+        return tables
+
+    def _extract_markdown_table(self, text: str) -> str:
+        """
+        Extract the first markdown (or pipe-separated) table from the assistant's text response.
+        
+        Args:
+            text (str): The assistant's text response
+            
+        Returns:
+            str: The markdown table if found, or empty string if no table found
+        """
+        table = self._first_tables(text, ("markdown",)).get("markdown")
+        if table:
+            return '\n'.join(render_table(*table))
+        return ""
+
+    def _extract_data_from_text_response(self, text_content: str) -> list:
+        """
+        Extract structured data from the assistant's text response.
+        Markdown tables are preferred, then numbered lists, then CSV blocks,
+        all found in a single pass over the text.
+        
+        Args:
+            text_content (str): The text content from the assistant
+            
+        Returns:
+            list: Formatted data lines (markdown table as single item, or parsed rows)
+        """
+        try:
+            tables = self._first_tables(text_content, ("markdown", "numbered", "list", "csv"))
+
+            if "markdown" in tables:
+                # Return the markdown table as a single formatted block
+                return ['\n'.join(render_table(*tables["markdown"]))]
+
+            if "numbered" in tables:
+                # Key-value rows, e.g. "1. Date: 4/29/2020, State: WI, Positive: 7,660"
+                return render_table(*tables["numbered"])
+
+            if "list" in tables:
+                # Just show the numbered list data
+                return [f"Row {i+1}: {values[0]}" for i, values in enumerate(tables["list"][1])]
+
+            if "csv" in tables:
+                return render_table(*tables["csv"])[:10]  # Return first 10 lines
+        
+        except Exception as e:
+            print(f"⚠️ Warning: Could not extract data from text response: {e}")
+        
+        return []
+
+    def _format_list_data(self, data_list) -> list:
+        """
+        Format the first 10 data records as markdown table lines.
+
+        The full result set is available as columns via RunDetails.result_tables().
+        """
+        if len(data_list) > 0 and isinstance(data_list[0], dict):
+            return ResultTable.from_records(data_list[:10]).markdown_lines()
+        return []
+
+    def _extract_data_preview(self, text: str) -> list:
+        """
+        Extract data preview from text output.
+        
+        Args:
+            text (str): Text to search for tabular data
+            
+        Returns:
+            list: List of data rows found
+        """
+        data_lines = []
+        
+        try:
+            # Look for JSON arrays embedded in the text, in one linear pass
+            for data in find_json_arrays(text):
+                if len(data) > 0:
+                    # Convert to readable format
+                    if isinstance(data[0], dict):
+                        # List of dictionaries (typical query result)
+                        data_lines = self._format_list_data(data)
+                    break  # Found valid JSON data
+            
+            # If no JSON found, look for pipe-separated tables, then CSV-like data
+            if not data_lines:
+                tables = self._first_tables(text, ("markdown", "csv"), max_rows=13)
+                if "markdown" in tables:
+                    data_lines = render_table(*tables["markdown"])[:15]  # Limit to first 15 lines
+                elif "csv" in tables:
+                    data_lines = render_table(*tables["csv"])[:10]  # Limit preview
+        
+        except Exception as e:
+            print(f"⚠️ Warning: Could not extract data preview: {e}")
+        
+        return data_lines
+
+    def _extract_sql_queries(self, steps) -> list:
+        """
+        Extract SQL queries from run steps when lakehouse data source is used.
+        
+        Args:
+            steps: The run steps from the OpenAI API
+            
+        Returns:
+            list: List of SQL queries found in the steps
+        """
+        sql_queries = []
+        
+        try:
+            for step in steps.data:
+                if hasattr(step, 'step_details') and step.step_details:
+                    step_details = step.step_details
+                    
+                    # Check for tool calls that might contain SQL
+                    if hasattr(step_details, 'tool_calls') and step_details.tool_calls:
+                        for tool_call in step_details.tool_calls:
+                            # Look for SQL queries in tool call details
+                            if hasattr(tool_call, 'function') and tool_call.function:
+                                if hasattr(tool_call.function, 'arguments'):
+                                    args_str = str(tool_call.function.arguments)
+                                    # Look for SQL patterns in arguments
+                                    sql_queries.extend(self._find_sql_in_text(args_str))
+                            
+                            # Check tool call outputs for SQL
+                            if hasattr(tool_call, 'output') and tool_call.output:
+                                output_str = str(tool_call.output)
+                                sql_queries.extend(self._find_sql_in_text(output_str))
+                    
+                    # Check step details for any SQL content
+                    step_str = str(step_details)
+                    sql_queries.extend(self._find_sql_in_text(step_str))
+        
+        except Exception as e:
+            print(f"⚠️ Warning: Could not extract SQL queries: {e}")
         
+        # Remove duplicates while preserving order
+        seen = set()
+        unique_queries = []
+        for query in sql_queries:
+            if query not in seen:
+                seen.add(query)
+                unique_queries.append(query)
+        
+        return unique_queries
+
+    def _find_sql_in_text(self, text: str) -> list:
+        """
+        Find SQL queries in text using the linear-time SQL scanner.
+        
+        Args:
+            text (str): Text to search for SQL queries
+            
+        Returns:
+            list: List of SQL queries found
+        """
+        return find_sql_statements(text)
+
+
+class FabricDataAgentClient(_FabricClientBase):
+    """
+    Client for calling Microsoft Fabric Data Agents using System Assigned Managed Identity (SAMI).
+
+    This client handles:
+    - Silent authentication via Azure IMDS
+    - Automatic token refresh
+    - Bearer token management for API calls
+    - A persistent keep-alive connection pool shared by all calls
+    - A per data agent assistant that is created once and reused
+    - Retries of throttled and idempotent calls, and a circuit breaker
+    """
+
+    # Assistant creates in flight, keyed by data agent URL and shared across sync clients
+    _assistant_creates = _SingleFlight()
+
+    def __init__(self, tenant_id: str, data_agent_url: str,
+                 max_connections: int = 20,
+                 max_keepalive_connections: int = 10,
+                 keepalive_expiry: float = 30.0,
+                 http2: bool = True,
+                 request_timeout: float = 60.0,
+                 polling_strategy: Optional[PollingStrategy] = None,
+                 answer_cache: Optional[AnswerCache] = None,
+                 coalesce_requests: bool = True,
+                 token_provider: Optional[TokenProvider] = None,
+                 thread_journal_path: Optional[str] = None,
+                 metrics: Optional[FabricMetrics] = None,
+                 tracing: Optional[FabricTracing] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 raise_errors: bool = False,
+                 eager_auth: bool = True):
+        """
+        Initialize the Fabric Data Agent client using SAMI.
+
+        Args:
+            tenant_id (str): Your Azure tenant ID
+            data_agent_url (str): The published URL of your Fabric Data Agent
+            max_connections (int): Maximum number of concurrent connections in the pool
+            max_keepalive_connections (int): Maximum number of idle connections kept open
+            keepalive_expiry (float): Seconds an idle connection is kept before closing
+            http2 (bool): Use HTTP/2 when the optional h2 package is installed
+            request_timeout (float): Per-request timeout in seconds
+            polling_strategy (PollingStrategy): How to pace run status checks,
+                defaults to AdaptivePollingStrategy
+            answer_cache (AnswerCache): Optional cache for answers and run details
+            coalesce_requests (bool): Share one run between concurrent identical questions
+            token_provider (TokenProvider): Source of bearer tokens, defaults to the
+                process-wide SAMI provider shared by all clients
+            thread_journal_path (str): Optional SQLite file recording live threads, so the
+                janitor can delete threads left behind by a crashed process
+            metrics (FabricMetrics): Records phase timings and counters, disabled by default
+            tracing (FabricTracing): Opens a span per question and per API round trip,
+                disabled by default
+            retry_policy (RetryPolicy): When to retry failed API calls, defaults to RetryPolicy()
+            circuit_breaker (CircuitBreaker): Fails calls fast while the data agent is unhealthy;
+                pass one instance to several clients to share it, defaults to a new CircuitBreaker()
+            rate_limiter (RateLimiter): Optional token buckets for run creation and polling,
+                which can be shared with other processes through a SQLite file
+            raise_errors (bool): Raise FabricError subclasses from ask(), get_run_details() and
+                conversation turns instead of returning "Error: ..." / "Timeout: ..." results
+            eager_auth (bool): Fetch a token now; False defers it to the first call or warm_up()
+        """
+        super().__init__(
+            tenant_id, data_agent_url, max_connections, max_keepalive_connections, keepalive_expiry,
+            http2, request_timeout, polling_strategy, answer_cache, coalesce_requests, token_provider,
+            thread_journal_path, metrics, tracing, retry_policy, circuit_breaker, rate_limiter, raise_errors,
+            # Thread deletes share the question pool
+            self._get_openai_client
+        )
+        self._in_flight = _SingleFlight()
+        self._client_lock = threading.Lock()
+
+        print("Initializing Fabric Data Agent Client with SAMI...")
+        print(f"Tenant ID: {tenant_id}")
+        print(f"Data Agent URL: {data_agent_url}")
+
+        if eager_auth:
+            self._authenticate()
+
+    def _authenticate(self):
+        """
+        Authenticate through the token provider (SAMI by default).
+        """
+        try:
+            print("Authenticating...")
+            self.token_provider.get_token()
+            print("Authentication successful.")
+
+        except Exception as e:
+            print(f"Authentication failed: {e}")
+            raise
+
+    def _refresh_token(self):
+        """
+        Force the token provider to fetch a new token.
+        """
+        self.token_provider.refresh()
+
+    def warm_up(self) -> "FabricDataAgentClient":
+        """
+        Do the first-call work now instead of during the first question.
+
+        Imports the OpenAI SDK, fetches a token, opens the connection pool and
+        looks up the data agent's assistant. Call it at startup or from a
+        readiness probe, so the first user does not wait for it.
+
+        Returns:
+            FabricDataAgentClient: This client
+        """
+        started = time.monotonic()
+        self._get_assistant_id(self._get_openai_client())
+        print(f"🔥 Warmed up in {time.monotonic() - started:.2f}s")
+        return self
+
+    def _get_openai_client(self) -> OpenAI:
+        """
+        Return the shared OpenAI client configured for Fabric Data Agent calls.
+
+        The client and its connection pool are built once and reused. Token
+        refreshes only swap the bearer header applied by the auth hook.
+
+        Returns:
+            OpenAI: Configured OpenAI client
+        """
+        # Normally served from the provider's cache; the background refresher
+        # keeps it valid so requests rarely wait on the identity endpoint
+        with self._phase("token"):
+            self.token_provider.get_token()
+
+        if self._openai_client is None:
+            with self._client_lock:
+                if self._openai_client is None:
+                    self._http_client, self._openai_client = self._build_openai_client(
+                        self.max_connections,
+                        self.max_keepalive_connections
+                    )
+
+        return self._openai_client
+
+    def _create_thread(self, client: OpenAI, deadline: _Deadline) -> str:
+        """
+        Create a thread and register it with the thread cleaner.
+
+        Args:
+            client (OpenAI): Configured OpenAI client
+            deadline (_Deadline): The question's end-to-end deadline
+
+        Returns:
+            str: The new thread id
+        """
+        thread = self._call("thread_create", client.beta.threads.create, deadline)
+        self.thread_cleaner.track(thread.id)
+        self.tracing.annotate({"fabric.thread_id": thread.id})
+        return thread.id
+
+    def close(self):
+        """
+        Close open conversations and the shared connection pool.
+        """
+        for conversation in list(self._conversations):
+            conversation.close()
+
+        # Finish pending thread deletes while the pool is still open
+        self.thread_cleaner.close()
+
+        with self._client_lock:
+            if self._openai_client is not None:
+                self._openai_client.close()
+            self._openai_client = None
+            self._http_client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_assistant_id(self, client: OpenAI, deadline: Optional[_Deadline] = None) -> str:
+        """
+        Return the assistant id for this data agent, creating it on first use.
+
+        The id is cached per data agent URL and shared by every client in the
+        process, so each question skips the assistant create round trip.
+        Concurrent first calls for one URL share a single create; callers for
+        other URLs are not held up by it.
+
+        Args:
+            client (OpenAI): Configured OpenAI client
+            deadline (_Deadline): The question's end-to-end deadline, if any
+
+        Returns:
+            str: The cached assistant id
+        """
+        assistant_id = self._assistant_registry.get(self.data_agent_url)
+        if assistant_id is not None:
+            return assistant_id
+
+        def create():
+            assistant_id = self._assistant_registry.get(self.data_agent_url)
+            if assistant_id is not None:
+                return assistant_id
+            # Create assistant without specifying model or instructions
+            assistant = self._call("assistant_create", client.beta.assistants.create, deadline, model="not used")
+            return self._remember_assistant(assistant.id)
+
+        return self._assistant_creates.do(
+            self.data_agent_url,
+            create,
+            None if deadline is None else deadline.remaining()
+        )
+
+    def _create_run(self, client: OpenAI, thread_id: str, deadline: _Deadline, **run_options):
+        """
+        Start a run on a thread using the cached assistant.
+
+        If the service reports the cached assistant as missing, it is
+        recreated once and the run is retried.
+
+        Args:
+            client (OpenAI): Configured OpenAI client
+            thread_id (str): The thread to run
+            deadline (_Deadline): The question's end-to-end deadline
+            **run_options: Extra arguments for runs.create, such as stream=True
+
+        Returns:
+            Run: The created run, or an event stream when streaming
+        """
+        assistant_id = self._get_assistant_id(client, deadline)
+        try:
+            return self._call(
+                "run_create",
+                client.beta.threads.runs.create,
+                deadline,
+                thread_id=thread_id,
+                assistant_id=assistant_id,
+                **run_options
+            )
+        except _openai().NotFoundError as e:
+            if not self._assistant_missing(e, assistant_id):
+                raise
+            print("♻️ Cached assistant not found, recreating it...")
+            self._forget_assistant(assistant_id)
+            return self._call(
+                "run_create",
+                client.beta.threads.runs.create,
+                deadline,
+                thread_id=thread_id,
+                assistant_id=self._get_assistant_id(client, deadline),
+                **run_options
+            )
+
+    def _wait_for_run(self, client: OpenAI, thread_id: str, run, deadline: _Deadline):
+        """
+        Poll a run until it leaves the queued/in_progress states.
+
+        The delay between status checks comes from the polling strategy, which
+        is told how long the run took and how many polls it needed.
+
+        Args:
+            client (OpenAI): Configured OpenAI client
+            thread_id (str): The thread the run belongs to
+            run: The run to monitor
+            deadline (_Deadline): The question's end-to-end deadline
+
+        Returns:
+            tuple: The last retrieved run and the number of status checks made
+
+        Raises:
+            FabricTimeoutError: If the deadline expires while the run is active
+            FabricRateLimitedError: If a status check gets no rate limit slot; the run is cancelled first
+        """
+        start_time = time.time()
+        polls = 0
+        queued_until = None if run.status == "queued" else start_time
+        while run.status in ACTIVE_RUN_STATUSES:
+            deadline.sleep(self._poll_delay(thread_id, run, polls, start_time, deadline))
+
+            try:
+                run = self._call(
+                    "run_poll",
+                    client.beta.threads.runs.retrieve,
+                    deadline,
+                    thread_id=thread_id,
+                    run_id=run.id
+                )
+            except FabricRateLimitedError:
+                # Don't leave the run using the capacity the rate limit is protecting
+                self._cancel_run(client, thread_id, run.id)
+                raise
+            polls += 1
+            if queued_until is None and run.status != "queued":
+                queued_until = time.time()
+
+        self._record_wait(run, polls, start_time, queued_until)
+        return run, polls
+
+    def _cancel_run(self, client: OpenAI, thread_id: str, run_id: str) -> Optional[str]:
+        """
+        Ask the service to cancel a run so it stops using agent capacity.
+
+        Args:
+            client (OpenAI): Configured OpenAI client
+            thread_id (str): The thread the run belongs to
+            run_id (str): The run to cancel
+
+        Returns:
+            str: The run status after cancelling, or None if the cancel failed
+        """
+        try:
+            run = self._call(
+                "run_cancel",
+                client.beta.threads.runs.cancel,
+                # Not cancellable: cancelling the run is what a cancelled question does
+                _Deadline(RUN_CANCEL_TIMEOUT, cancellable=False),
+                thread_id=thread_id,
+                run_id=run_id
+            )
+            print(f"🛑 Cancelled run {run_id} (status: {run.status})")
+            return run.status
+        except Exception as e:
+            print(f"⚠️ Could not cancel run {run_id}: {e}")
+            return None
+
+    def _expire_run(self, client: OpenAI, thread_id: Optional[str], run, deadline: _Deadline,
+                    error: Exception) -> FabricTimeoutError:
+        """
+        Handle a timeout raised while working on a question.
+
+        If the deadline has expired, the run is cancelled server-side when it is
+        still active. A single slow request that did not exhaust the deadline is
+        re-raised unchanged.
+
+        Args:
+            client (OpenAI): Configured OpenAI client
+            thread_id (str): The question's thread, if it was created
+            run: The last known run, if it was created
+            deadline (_Deadline): The question's end-to-end deadline
+            error (Exception): The timeout that was raised
+
+        Returns:
+            FabricTimeoutError: The error to raise for the expired deadline
+        """
+        run_id, run_status = self._expired(run, deadline, error)
+        if run_id is not None and run_status in ACTIVE_RUN_STATUSES:
+            run_status = self._cancel_run(client, thread_id, run_id) or run_status
+        return self._expiry_error(thread_id, run_id, run_status, deadline)
+
+    def _coalesced(self, question: str, kind: str, fn, timeout: Optional[float]):
+        """
+        Run fn() once for concurrent identical questions to this data agent.
+
+        Args:
+            question (str): The question
+            kind (str): "ask" or "run_details"
+            fn: Zero-argument callable that performs the call
+            timeout (float): How long a joining caller waits for the shared result
+
+        Returns:
+            The result of fn()
+        """
+        if not self.coalesce_requests:
+            return fn()
+        return self._in_flight.do(self._coalesce_key(question, kind), fn, timeout)
+
+    def _call(self, phase: str, method, deadline: Optional[_Deadline] = None, **kwargs):
+        """
+        Make one API call through the circuit breaker, retrying it as the retry policy allows.
+
+        Each attempt first takes a token from the rate limiter, if one is
+        configured, and gets a fresh request timeout from the deadline. No
+        retry waits past the deadline, and a cancelled question stops waiting.
+
+        Args:
+            phase (str): Phase name for metrics and tracing, e.g. "run_poll"
+            method: The OpenAI SDK method to call
+            deadline (_Deadline): The question's end-to-end deadline, if any
+            **kwargs: Arguments for the method, without timeout
+
+        Returns:
+            The method's result
+        """
+        # Calls made without a deadline can still be cancelled through cancellation_scope()
+        deadline = deadline or _Deadline(None)
+        attempt = 0
+        while True:
+            timeout = deadline.request_timeout(PHASE_DESCRIPTIONS.get(phase, phase), self.request_timeout)
+            if self.rate_limiter is not None:
+                try:
+                    waited = self.rate_limiter.acquire(phase, deadline.remaining(), deadline.cancel_event)
+                except FabricRateLimitedError as e:
+                    self._check_refused_slot(phase, e, deadline)
+                    raise
+                if waited:
+                    self.metrics.observe_phase("rate_limit_wait", waited)
+            try:
+                with self._attempt(phase):
+                    return method(timeout=timeout, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(phase, attempt, e, deadline)
+                if delay is None:
+                    raise
+                attempt += 1
+                # Wakes early when the question is cancelled; the next check raises
+                deadline.sleep(delay)
+
+    def ask(self, question: str, timeout: int = 120, use_cache: bool = True) -> str:
+        """
+        Ask a question to the Fabric Data Agent.
+
+        Args:
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+            use_cache (bool): Use the answer cache, if one is configured
+
+        Returns:
+            str: The response from the data agent, or a "Timeout: ..." message if
+                the deadline expired (the run is cancelled on the service)
+        """
+        if not question.strip():
+            raise ValueError("Question cannot be empty")
+
+        print(f"\n❓ Asking: {question}")
+
+        try:
+            return self._ask(question, timeout, use_cache)
+        except Exception as e:
+            return self._error_answer(e)
+
+    def _ask(self, question: str, timeout: int = 120, use_cache: bool = True) -> str:
+        """
+        Run one question end to end, raising on failure.
+
+        Args:
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+            use_cache (bool): Use the answer cache, if one is configured
+
+        Returns:
+            str: The response from the data agent
+
+        Raises:
+            FabricTimeoutError: If the deadline expires
+        """
+        with self.tracing.span("fabric.ask", {"fabric.data_agent_url": self.data_agent_url}):
+            cache_key, cached = self._cached(question, "ask", use_cache)
+            if cached is not None:
+                self.tracing.annotate({"fabric.cache_hit": True})
+                return cached
+
+            return self._coalesced(
+                question,
+                "ask",
+                lambda: self._ask_uncached(question, timeout, cache_key),
+                timeout
+            )
+
+    def _ask_uncached(self, question: str, timeout: int, cache_key: Optional[str]) -> str:
+        """
+        Run one question against the service, raising on failure.
+
+        Args:
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+            cache_key (str): Where to store the result, or None to skip caching
+
+        Returns:
+            str: The response from the data agent
+
+        Raises:
+            FabricTimeoutError: If the deadline expires
+        """
+        deadline = _Deadline(timeout)
+        client = self._get_openai_client()
+        thread_id, run = None, None
+
+        try:
+            # Create thread and send message
+            thread_id = self._create_thread(client, deadline)
+            self._call(
+                "message_create",
+                client.beta.threads.messages.create,
+                deadline,
+                thread_id=thread_id,
+                role="user",
+                content=question
+            )
+
+            # Start the run against the cached assistant
+            run = self._create_run(client, thread_id, deadline)
+
+            # Monitor the run until it finishes or the deadline expires
+            run, _ = self._wait_for_run(client, thread_id, run, deadline)
+
+            # Get the response messages
+            messages = self._call(
+                "message_list",
+                client.beta.threads.messages.list,
+                deadline,
+                thread_id=thread_id,
+                order="asc"
+            )
+
+            # Extract assistant responses
+            responses = self._collect_responses(messages)
+
+        except (FabricTimeoutError, _openai().APITimeoutError) as e:
+            outcome = "cancelled" if deadline.cancelled else "timeout"
+            self._record_question("ask", outcome, deadline.started_at)
+            raise self._expire_run(client, thread_id, run, deadline, e) from e
+
+        except Exception as e:
+            self._record_question("ask", fabric_error(e).kind, deadline.started_at)
+            raise
+
+        finally:
+            # Delete the thread in the background instead of before returning
+            if thread_id is not None:
+                self.thread_cleaner.release(thread_id)
+
+        return self._answer(run, responses, deadline, cache_key)
+
+    def conversation(self, idle_timeout: Optional[float] = 900.0) -> FabricConversation:
+        """
+        Start a multi-turn conversation that reuses one Fabric thread.
+
+        Args:
+            idle_timeout (float): Seconds of inactivity after which the thread is
+                discarded, or None to keep it until the conversation is closed
+
+        Returns:
+            FabricConversation: The conversation; close it (or use it in a with block) when done
+        """
+        self.close_idle_conversations()
+        conversation = FabricConversation(self, idle_timeout)
+        self._conversations.add(conversation)
+        return conversation
+
+    def close_idle_conversations(self) -> int:
+        """
+        Close conversations that have been idle longer than their idle_timeout.
+
+        Returns:
+            int: Number of conversations closed
+        """
+        idle = [c for c in list(self._conversations) if not c.closed and c.is_idle()]
+        for conversation in idle:
+            conversation.close()
+        return len(idle)
+
+    def ask_many(self, questions, max_concurrency: int = 8, timeout: int = 120,
+                 use_cache: bool = True):
+        """
+        Ask many questions concurrently and yield results as they complete.
+
+        All workers share this client's token and connection pool. Questions are
+        pulled from the iterable lazily, so large inputs are never materialized.
+
+        Args:
+            questions: Iterable of questions to ask
+            max_concurrency (int): Maximum number of questions in flight at once
+            timeout (int): Maximum end-to-end time for each question in seconds
+            use_cache (bool): Use the answer cache, if one is configured
+
+        Yields:
+            dict: index, question, answer, error, error_type (the FabricError kind),
+                timed_out and elapsed seconds for one question
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        def run_one(index, question):
+            start_time = time.time()
+            try:
+                if not question.strip():
+                    raise ValueError("Question cannot be empty")
+                print(f"\n❓ Asking: {question}")
+                answer = self._ask(question, timeout, use_cache)
+            except Exception as e:
+                return self._batch_result(index, question, start_time, error=e)
+            return self._batch_result(index, question, start_time, answer)
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            pending = set()
+            for index, question in enumerate(questions):
+                if len(pending) >= max_concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                # Workers inherit the caller's correlation id and trace context
+                pending.add(executor.submit(contextvars.copy_context().run, run_one, index, question))
+
+            for future in as_completed(pending):
+                yield future.result()
+
+    def ask_stream(self, question: str, timeout: int = 120):
+        """
+        Ask a question and yield the agent output as it is produced.
+
+        Uses the Assistants streaming run API. If the endpoint rejects streaming,
+        the client falls back to polling (and remembers that for later calls),
+        yielding the whole answer as one text chunk once the run finishes.
+
+        Args:
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+
+        Yields:
+            dict: {"type": "status", ...} run lifecycle events,
+                {"type": "text", "text": ...} text deltas,
+                {"type": "error", "error": ..., "error_type": ...} if the call fails,
+                {"type": "timeout", ...} if the deadline expires (the run is
+                cancelled), otherwise a final
+                {"type": "done", "status": ..., "text": ...} with the full answer
+        """
+        if not question.strip():
+            raise ValueError("Question cannot be empty")
+
+        print(f"\n📡 Streaming: {question}")
+
+        deadline = _Deadline(timeout)
+        thread_id, run = None, None
+        outcome = "error"
+        try:
+            client = self._get_openai_client()
+            thread_id = self._create_thread(client, deadline)
+        except Exception as e:
+            error = self._failed(e)
+            self._record_question("stream", error.kind, deadline.started_at)
+            yield {"type": "error", "error": str(error), "error_type": error.kind}
+            return
+
+        try:
+            self._call(
+                "message_create",
+                client.beta.threads.messages.create,
+                deadline,
+                thread_id=thread_id,
+                role="user",
+                content=question
+            )
+
+            if self._streaming_supported:
+                try:
+                    stream = self._create_run(client, thread_id, deadline, stream=True)
+                    run_id = self._unstreamed_run_id(stream)
+                    if run_id is None:
+                        for item in self._consume_stream(client, thread_id, stream, deadline):
+                            if item["type"] in ("done", "timeout", "error"):
+                                outcome = item.get("status") if item["type"] == "done" else item["type"]
+                            yield item
+                        return
+                    # The endpoint ignored stream=True and answered with a plain run
+                    print("⚠️ Streaming not supported, falling back to polling")
+                    self._streaming_supported = False
+                    run = self._call(
+                        "run_poll",
+                        client.beta.threads.runs.retrieve,
+                        deadline,
+                        thread_id=thread_id,
+                        run_id=run_id
+                    )
+                except _streaming_rejections() as e:
+                    print(f"⚠️ Streaming not supported, falling back to polling: {e}")
+                    self._streaming_supported = False
+
+            if run is None:
+                run = self._create_run(client, thread_id, deadline)
+            yield {"type": "status", "status": run.status, "run_id": run.id}
+            run, _ = self._wait_for_run(client, thread_id, run, deadline)
+            yield {"type": "status", "status": run.status, "run_id": run.id}
+            messages = self._call(
+                "message_list",
+                client.beta.threads.messages.list,
+                deadline,
+                thread_id=thread_id,
+                order="asc"
+            )
+            text = "\n".join(self._collect_responses(messages))
+            if text:
+                yield {"type": "text", "text": text}
+            outcome = run.status
+            yield {"type": "done", "status": run.status, "text": text}
+
+        except (FabricTimeoutError, _openai().APITimeoutError) as e:
+            outcome = "timeout"
+            try:
+                error = self._expire_run(client, thread_id, run, deadline, e)
+                yield {"type": "timeout", "error": str(error), "run_id": error.run_id, "status": error.run_status}
+            except Exception as e:
+                error = self._failed(e)
+                yield {"type": "error", "error": str(error), "error_type": error.kind}
+
+        except Exception as e:
+            error = self._failed(e)
+            outcome = error.kind
+            yield {"type": "error", "error": str(error), "error_type": error.kind}
+
+        finally:
+            self.thread_cleaner.release(thread_id)
+            self._record_question("stream", outcome, deadline.started_at)
+
+    def _consume_stream(self, client: OpenAI, thread_id: str, stream, deadline: _Deadline):
+        """
+        Translate a run event stream into ask_stream() items.
+
+        Args:
+            client (OpenAI): Configured OpenAI client
+            thread_id (str): The thread the run belongs to
+            stream: The event stream returned by runs.create(stream=True)
+            deadline (_Deadline): The question's end-to-end deadline
+
+        Yields:
+            dict: Status and text items, then a final done or timeout item
+        """
+        chunks = []
+        status, run_id = None, None
+        try:
+            with stream:
+                for event in stream:
+                    item = self._translate_stream_event(event)
+                    if item is None:
+                        continue
+                    if item["type"] == "text":
+                        chunks.append(item["text"])
+                    else:
+                        status, run_id = item["status"], item["run_id"]
+                    yield item
+                    deadline.check("streaming")
+
+        except (FabricTimeoutError, _httpx().TimeoutException) as e:
+            error = self._expire_run(
+                client,
+                thread_id,
+                None,
+                deadline,
+                FabricTimeoutError(str(e), thread_id=thread_id, run_id=run_id, run_status=status)
+                if deadline.expired() else e
+            )
+            yield {"type": "timeout", "error": str(error), "run_id": error.run_id, "status": error.run_status}
+            return
+
+        print(f"✅ Final status: {status}")
+        yield {"type": "done", "status": status, "text": "".join(chunks)}
+
+    def _unstreamed_run_id(self, stream) -> Optional[str]:
+        """
+        Detect an endpoint that answered a streaming request with a plain run.
+
+        Args:
+            stream: The object returned by runs.create(stream=True)
+
+        Returns:
+            str: The created run id if the response is not an event stream, else None
+        """
+        response = stream.response
+        if "text/event-stream" in response.headers.get("content-type", ""):
+            return None
+        response.read()
+        run_id = response.json().get("id")
+        stream.close()
+        return run_id
+
+    def get_run_details(self, question: str, timeout: int = 120, use_cache: bool = True):
+        """
+        Ask a question and return detailed run information including steps.
+
+        Args:
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+            use_cache (bool): Use the answer cache, if one is configured
+
+        Returns:
+            RunDetails: Detailed response including run steps, metadata, and SQL queries if lakehouse
+                data source. Supports dict-style access; the raw run_steps/messages dumps are built on
+                first access. On failure a dict with error and error_type keys is returned instead;
+                if the deadline expires the run is cancelled and that dict has timed_out set.
+
+        Raises:
+            FabricError: Instead of returning the error dict, if the client has raise_errors set
+        """
+        print(f"\n🔍 Getting detailed run info for: {question}")
+
+        try:
+            return self._get_run_details(question, timeout, use_cache)
+        except Exception as e:
+            error = self._failed(e)
+            if self.raise_errors:
+                raise error
+            return self._run_details_error(question, error)
+
+    def _get_run_details(self, question: str, timeout: int = 120, use_cache: bool = True) -> RunDetails:
+        """
+        Run one question end to end and build its run details, raising on failure.
+
+        Args:
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+            use_cache (bool): Use the answer cache, if one is configured
+
+        Returns:
+            RunDetails: Detailed response, as returned by get_run_details()
+
+        Raises:
+            FabricTimeoutError: If the deadline expires
+        """
+        with self.tracing.span("fabric.get_run_details", {"fabric.data_agent_url": self.data_agent_url}):
+            cache_key, cached = self._cached(question, "run_details", use_cache)
+            if cached is not None:
+                self.tracing.annotate({"fabric.cache_hit": True})
+                return RunDetails.from_dict(cached)
+
+            return self._coalesced(
+                question,
+                "run_details",
+                lambda: self._get_run_details_uncached(question, timeout, cache_key),
+                timeout
+            )
+
+    def _get_run_details_uncached(self, question: str, timeout: int, cache_key: Optional[str]) -> RunDetails:
+        """
+        Run one question against the service and build its run details, raising on failure.
+
+        Args:
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+            cache_key (str): Where to store the result, or None to skip caching
+
+        Returns:
+            RunDetails: Detailed response, as returned by get_run_details()
+
+        Raises:
+            FabricTimeoutError: If the deadline expires
+        """
+        deadline = _Deadline(timeout)
+        client = self._get_openai_client()
+        thread_id, run = None, None
+
+        try:
+            # Create thread without specifying model or instructions
+            thread_id = self._create_thread(client, deadline)
+
+            self._call(
+                "message_create",
+                client.beta.threads.messages.create,
+                deadline,
+                thread_id=thread_id,
+                role="user",
+                content=question
+            )
+
+            # Start and monitor run
+            run = self._create_run(client, thread_id, deadline)
+
+            run, polls = self._wait_for_run(client, thread_id, run, deadline)
+
+            # Get detailed run steps
+            steps = self._call(
+                "steps_list",
+                client.beta.threads.runs.steps.list,
+                deadline,
+                thread_id=thread_id,
+                run_id=run.id
+            )
+
+            # Get messages
+            messages = self._call(
+                "message_list",
+                client.beta.threads.messages.list,
+                deadline,
+                thread_id=thread_id,
+                order="asc"
+            )
+
+            result = self._run_details(question, run, polls, steps, messages)
+
+        except (FabricTimeoutError, _openai().APITimeoutError) as e:
+            outcome = "cancelled" if deadline.cancelled else "timeout"
+            self._record_question("run_details", outcome, deadline.started_at)
+            raise self._expire_run(client, thread_id, run, deadline, e) from e
+
+        except Exception as e:
+            self._record_question("run_details", fabric_error(e).kind, deadline.started_at)
+            raise
+
+        finally:
+            # Delete the thread in the background instead of before returning
+            if thread_id is not None:
+                self.thread_cleaner.release(thread_id)
+
+        return self._finish_run_details(result, run, deadline, cache_key)
+
+
+class AsyncFabricDataAgentClient(_FabricClientBase):
+    """
+    asyncio client for calling Microsoft Fabric Data Agents using SAMI.
+
+    Mirrors FabricDataAgentClient with awaitable ask() and get_run_details(),
+    built on AsyncOpenAI with non-blocking polling, so one event loop can keep
+    many runs in flight. Authentication happens lazily on the first call or
+    explicitly via authenticate(). Configuration, bookkeeping and result parsing
+    come from the same base class as the sync client.
+    """
+
+    def __init__(self, tenant_id: str, data_agent_url: str,
+                 max_connections: int = 100,
+                 max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0,
+                 http2: bool = True,
+                 request_timeout: float = 60.0,
+                 polling_strategy: Optional[PollingStrategy] = None,
+                 answer_cache: Optional[AnswerCache] = None,
+                 coalesce_requests: bool = True,
+                 token_provider: Optional[TokenProvider] = None,
+                 thread_journal_path: Optional[str] = None,
+                 metrics: Optional[FabricMetrics] = None,
+                 tracing: Optional[FabricTracing] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 raise_errors: bool = False):
+        """
+        Initialize the async Fabric Data Agent client using SAMI.
+
+        Args:
+            tenant_id (str): Your Azure tenant ID
+            data_agent_url (str): The published URL of your Fabric Data Agent
+            max_connections (int): Maximum number of concurrent connections in the pool
+            max_keepalive_connections (int): Maximum number of idle connections kept open
+            keepalive_expiry (float): Seconds an idle connection is kept before closing
+            http2 (bool): Use HTTP/2 when the optional h2 package is installed
+            request_timeout (float): Per-request timeout in seconds
+            polling_strategy (PollingStrategy): How to pace run status checks,
+                defaults to AdaptivePollingStrategy
+            answer_cache (AnswerCache): Optional cache for answers and run details
+            coalesce_requests (bool): Share one run between concurrent identical questions
+            token_provider (TokenProvider): Source of bearer tokens, defaults to the
+                process-wide SAMI provider shared by all clients
+            thread_journal_path (str): Optional SQLite file recording live threads, so the
+                janitor can delete threads left behind by a crashed process
+            metrics (FabricMetrics): Records phase timings and counters, disabled by default
+            tracing (FabricTracing): Opens a span per question and per API round trip,
+                disabled by default
+            retry_policy (RetryPolicy): When to retry failed API calls, defaults to RetryPolicy()
+            circuit_breaker (CircuitBreaker): Fails calls fast while the data agent is unhealthy;
+                pass one instance to several clients to share it, defaults to a new CircuitBreaker()
+            rate_limiter (RateLimiter): Optional token buckets for run creation and polling,
+                which can be shared with other processes through a SQLite file
+            raise_errors (bool): Raise FabricError subclasses from ask(), get_run_details() and
+                conversation turns instead of returning "Error: ..." / "Timeout: ..." results
+        """
+        super().__init__(
+            tenant_id, data_agent_url, max_connections, max_keepalive_connections, keepalive_expiry,
+            http2, request_timeout, polling_strategy, answer_cache, coalesce_requests, token_provider,
+            thread_journal_path, metrics, tracing, retry_policy, circuit_breaker, rate_limiter, raise_errors,
+            self._cleanup_openai_client
+        )
+        self._in_flight = _AsyncSingleFlight()
+        self._cleanup_client = None
+        self._cleanup_client_lock = threading.Lock()
+
+        print("Initializing async Fabric Data Agent Client with SAMI...")
+        print(f"Tenant ID: {tenant_id}")
+        print(f"Data Agent URL: {data_agent_url}")
+
+    async def authenticate(self):
+        """
+        Authenticate through the token provider (SAMI by default).
+        """
+        try:
+            print("Authenticating...")
+            await self.token_provider.get_token_async()
+            print("Authentication successful.")
+
+        except Exception as e:
+            print(f"Authentication failed: {e}")
+            raise
+
+    async def warm_up(self) -> "AsyncFabricDataAgentClient":
+        """
+        Do the first-call work now instead of during the first question; see
+        FabricDataAgentClient.warm_up().
+
+        Returns:
+            AsyncFabricDataAgentClient: This client
+        """
+        started = time.monotonic()
+        await self._get_assistant_id(await self._get_openai_client())
+        print(f"🔥 Warmed up in {time.monotonic() - started:.2f}s")
+        return self
+
+    async def _refresh_token(self):
+        """
+        Force the token provider to fetch a new token without blocking the event loop.
+        """
+        await asyncio.to_thread(self.token_provider.refresh)
+
+    async def _get_openai_client(self) -> AsyncOpenAI:
+        """
+        Return the shared AsyncOpenAI client configured for Fabric Data Agent calls.
+
+        Returns:
+            AsyncOpenAI: Configured async OpenAI client
+        """
+        # Only leaves the event loop when the cached token is close to expiry
+        with self._phase("token"):
+            await self.token_provider.get_token_async()
+
+        if self._openai_client is None:
+            import httpx
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+            from fabric_http_auth import FabricBearerAuth
+
+            self._http_client = DefaultAsyncHttpxClient(
+                auth=FabricBearerAuth(self),
+                http2=self.http2,
+                timeout=httpx.Timeout(self.request_timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                )
+            )
+            self._openai_client = AsyncOpenAI(
+                api_key="",  # Not used - we use Bearer token
+                base_url=self.data_agent_url,
+                default_query={"api-version": FABRIC_API_VERSION},
+                default_headers={
+                    "Accept": "application/json",
+                    "Content-Type": "application/json"
+                },
+                http_client=self._http_client,
+                max_retries=0  # Retries are made by _call(), which knows which calls are idempotent
+            )
+
+        return self._openai_client
+
+    async def close(self):
+        """
+        Close open conversations and the shared connection pool.
+        """
+        for conversation in list(self._conversations):
+            await conversation.close()
+
+        # Finish pending thread deletes while the pools are still open
+        await asyncio.to_thread(self.thread_cleaner.close)
+        with self._cleanup_client_lock:
+            if self._cleanup_client is not None:
+                self._cleanup_client.close()
+            self._cleanup_client = None
+
+        if self._openai_client is not None:
+            await self._openai_client.close()
+        self._openai_client = None
+        self._http_client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _call(self, phase: str, method, deadline: Optional[_Deadline] = None, **kwargs):
+        """
+        Make one API call through the circuit breaker, retrying it as the retry policy allows.
+
+        Takes the same arguments as FabricDataAgentClient._call() with an async
+        SDK method, and sleeps without blocking the event loop.
+        """
+        deadline = deadline or _Deadline(None)
+        attempt = 0
+        while True:
+            timeout = deadline.request_timeout(PHASE_DESCRIPTIONS.get(phase, phase), self.request_timeout)
+            if self.rate_limiter is not None:
+                try:
+                    waited = await self.rate_limiter.acquire_async(phase, deadline.remaining(),
+                                                                   deadline.cancel_event)
+                except FabricRateLimitedError as e:
+                    self._check_refused_slot(phase, e, deadline)
+                    raise
+                if waited:
+                    self.metrics.observe_phase("rate_limit_wait", waited)
+            try:
+                with self._attempt(phase):
+                    return await method(timeout=timeout, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(phase, attempt, e, deadline)
+                if delay is None:
+                    raise
+                attempt += 1
+                await deadline.sleep_async(delay)
+
+    async def _create_thread(self, client: AsyncOpenAI, deadline: _Deadline) -> str:
+        """
+        Create a thread and register it with the thread cleaner.
+
+        Args:
+            client (AsyncOpenAI): Configured async OpenAI client
+            deadline (_Deadline): The question's end-to-end deadline
+
+        Returns:
+            str: The new thread id
+        """
+        thread = await self._call("thread_create", client.beta.threads.create, deadline)
+        self.thread_cleaner.track(thread.id)
+        self.tracing.annotate({"fabric.thread_id": thread.id})
+        return thread.id
+
+    def _cleanup_openai_client(self) -> OpenAI:
+        """
+        Return the small synchronous client the thread cleaner's worker deletes threads with.
+
+        The worker runs outside the event loop, so it cannot use the AsyncOpenAI
+        pool; this client shares the token provider instead.
+
+        Returns:
+            OpenAI: Configured OpenAI client
+        """
+        self.token_provider.get_token()
+        with self._cleanup_client_lock:
+            if self._cleanup_client is None:
+                _, self._cleanup_client = self._build_openai_client(2, 2)
+            return self._cleanup_client
+
+    async def _get_assistant_id(self, client: AsyncOpenAI, deadline: Optional[_Deadline] = None) -> str:
+        """
+        Return the assistant id for this data agent, creating it on first use.
+
+        Args:
+            client (AsyncOpenAI): Configured async OpenAI client
+            deadline (_Deadline): The question's end-to-end deadline, if any
+
+        Returns:
+            str: The cached assistant id
+        """
+        assistant_id = self._assistant_registry.get(self.data_agent_url)
+        if assistant_id is not None:
+            return assistant_id
+
+        async def create():
+            assistant_id = self._assistant_registry.get(self.data_agent_url)
+            if assistant_id is not None:
+                return assistant_id
+            # Create assistant without specifying model or instructions
+            assistant = await self._call("assistant_create", client.beta.assistants.create, deadline,
+                                         model="not used")
+            return self._remember_assistant(assistant.id)
+
+        # Keyed apart from questions, which use (kind, url, question)
+        return await self._in_flight.do(
+            ("assistant", self.data_agent_url),
+            create,
+            None if deadline is None else deadline.remaining()
+        )
+
+    async def _create_run(self, client: AsyncOpenAI, thread_id: str, deadline: _Deadline, **run_options):
+        """
+        Start a run on a thread using the cached assistant.
+
+        Args:
+            client (AsyncOpenAI): Configured async OpenAI client
+            thread_id (str): The thread to run
+            deadline (_Deadline): The question's end-to-end deadline
+            **run_options: Extra arguments for runs.create, such as stream=True
+
+        Returns:
+            Run: The created run, or an event stream when streaming
+        """
+        assistant_id = await self._get_assistant_id(client, deadline)
+        try:
+            return await self._call(
+                "run_create",
+                client.beta.threads.runs.create,
+                deadline,
+                thread_id=thread_id,
+                assistant_id=assistant_id,
+                **run_options
+            )
+        except _openai().NotFoundError as e:
+            if not self._assistant_missing(e, assistant_id):
+                raise
+            print("♻️ Cached assistant not found, recreating it...")
+            self._forget_assistant(assistant_id)
+            return await self._call(
+                "run_create",
+                client.beta.threads.runs.create,
+                deadline,
+                thread_id=thread_id,
+                assistant_id=await self._get_assistant_id(client, deadline),
+                **run_options
+            )
+
+    async def _wait_for_run(self, client: AsyncOpenAI, thread_id: str, run, deadline: _Deadline):
+        """
+        Poll a run until it leaves the queued/in_progress states.
+
+        Args:
+            client (AsyncOpenAI): Configured async OpenAI client
+            thread_id (str): The thread the run belongs to
+            run: The run to monitor
+            deadline (_Deadline): The question's end-to-end deadline
+
+        Returns:
+            tuple: The last retrieved run and the number of status checks made
+
+        Raises:
+            FabricTimeoutError: If the deadline expires while the run is active
+            FabricRateLimitedError: If a status check gets no rate limit slot; the run is cancelled first
+        """
+        start_time = time.time()
+        polls = 0
+        queued_until = None if run.status == "queued" else start_time
+        while run.status in ACTIVE_RUN_STATUSES:
+            await deadline.sleep_async(self._poll_delay(thread_id, run, polls, start_time, deadline))
+
+            try:
+                run = await self._call(
+                    "run_poll",
+                    client.beta.threads.runs.retrieve,
+                    deadline,
+                    thread_id=thread_id,
+                    run_id=run.id
+                )
+            except FabricRateLimitedError:
+                # Don't leave the run using the capacity the rate limit is protecting
+                await self._cancel_run(client, thread_id, run.id)
+                raise
+            polls += 1
+            if queued_until is None and run.status != "queued":
+                queued_until = time.time()
+
+        self._record_wait(run, polls, start_time, queued_until)
+        return run, polls
+
+    async def _cancel_run(self, client: AsyncOpenAI, thread_id: str, run_id: str) -> Optional[str]:
+        """
+        Ask the service to cancel a run so it stops using agent capacity.
+
         Args:
-            question (str): The question to ask
-            
+            client (AsyncOpenAI): Configured async OpenAI client
+            thread_id (str): The thread the run belongs to
+            run_id (str): The run to cancel
+
         Returns:
-            dict: Detailed response including run steps, metadata, and SQL queries if lakehouse data source
+            str: The run status after cancelling, or None if the cancel failed
         """
-        print(f"\n🔍 Getting detailed run info for: {question}")
-        
         try:
-            client = self._get_openai_client()
-            
-            # Create assistant and thread without specifying model or instructions
-            assistant = client.beta.assistants.create(model="not used")
-            thread = client.beta.threads.create()
-            
-            client.beta.threads.messages.create(
-                thread_id=thread.id,
-                role="user",
-                content=question
-            )
-            
-            # Start and monitor run
-            run = client.beta.threads.runs.create(
-                thread_id=thread.id,
-                assistant_id=assistant.id
-            )
-            
-            while run.status in ["queued", "in_progress"]:
-                print(f"⏳ Status: {run.status}")
-                time.sleep(2)
-                run = client.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id)
-            
-            # Get detailed run steps
-            steps = client.beta.threads.runs.steps.list(
-                thread_id=thread.id,
-                run_id=run.id
-            )
-            
-            # Get messages
-            messages = client.beta.threads.messages.list(
-                thread_id=thread.id,
-                order="asc"
+            run = await self._call(
+                "run_cancel",
+                client.beta.threads.runs.cancel,
+                # Not cancellable: cancelling the run is what a cancelled question does
+                _Deadline(RUN_CANCEL_TIMEOUT, cancellable=False),
+                thread_id=thread_id,
+                run_id=run_id
             )
-            
-            # Extract SQL queries and data from steps if lakehouse data source is detected
-            sql_analysis = self._extract_sql_queries_with_data(steps)
-            
-            # Also try the old regex method as backup
-            if not sql_analysis["queries"]:
-                regex_queries = self._extract_sql_queries(steps)
-                if regex_queries:
-                    sql_analysis["queries"] = regex_queries
-                    sql_analysis["data_retrieval_query"] = regex_queries[0] if regex_queries else None
-            
-            # Also extract data from the final assistant message
-            messages_data = messages.model_dump()
-            assistant_messages = [msg for msg in messages_data.get('data', []) if msg.get('role') == 'assistant']
-            if assistant_messages:
-                latest_message = assistant_messages[-1]
-                content = latest_message.get('content', [])
-                if content and len(content) > 0:
-                    # Extract text content
-                    text_content = ""
-                    if isinstance(content[0], dict):
-                        if 'text' in content[0]:
-                            if isinstance(content[0]['text'], dict) and 'value' in content[0]['text']:
-                                text_content = content[0]['text']['value']
-                            else:
-                                text_content = str(content[0]['text'])
-                    else:
-                        text_content = str(content[0])
-                    
-                    # Extract structured data from the assistant's text response
-                    if text_content:
-                        text_data_preview = self._extract_data_from_text_response(text_content)
-                        if text_data_preview:
-                            # Add the text-based data preview
-                            if sql_analysis["queries"]:
-                                # If we have queries but no data previews, or empty previews, use the text-based one
-                                if not sql_analysis["data_previews"] or not any(sql_analysis["data_previews"]):
-                                    sql_analysis["data_previews"] = [text_data_preview]
-                                else:
-                                    # Add to existing previews
-                                    sql_analysis["data_previews"].append(text_data_preview)
-                                
-                                # If we don't have a specific data retrieval query identified, use the first query
-                                if not sql_analysis["data_retrieval_query"] and sql_analysis["queries"]:
-                                    sql_analysis["data_retrieval_query"] = sql_analysis["queries"][0]
-                                    sql_analysis["data_retrieval_query_index"] = 1
-            
-            # Clean up
-            try:
-                client.beta.threads.delete(thread_id=thread.id)
-            except Exception as cleanup_error:
-                print(f"⚠️ Warning: Thread cleanup failed: {cleanup_error}")
-            
-            result = {
-                "question": question,
-                "run_status": run.status,
-                "run_steps": steps.model_dump(),
-                "messages": messages.model_dump(),
-                "timestamp": time.time()
-            }
-            
-            # Add SQL analysis if found
-            if sql_analysis["queries"]:
-                result["sql_queries"] = sql_analysis["queries"]
-                result["sql_data_previews"] = sql_analysis["data_previews"]
-                result["data_retrieval_query"] = sql_analysis["data_retrieval_query"]
-                
-                print(f"🗃️ Found {len(sql_analysis['queries'])} SQL queries in lakehouse operations")
-                
-                for i, query in enumerate(sql_analysis["queries"], 1):
-                    print(f"📄 SQL Query {i}:")
-                    print(f"   {query}")
-                    
-                    # Show data preview if this query retrieved data
-                    if i == sql_analysis["data_retrieval_query_index"]:
-                        print(f"   🎯 This query retrieved the data!")
-                        if sql_analysis["data_previews"][i-1]:
-                            print(f"   📊 Data Preview:")
-                            preview = sql_analysis["data_previews"][i-1]
-                            
-                            # Check if the preview is a raw markdown table (single item)
-                            if len(preview) == 1 and '\n' in preview[0] and '|' in preview[0]:
-                                # This is a raw markdown table, print it directly
-                                print(preview[0])
-                            else:
-                                # This is parsed row data, print line by line
-                                for line in preview[:5]:  # Show first 5 lines
-                                    print(f"      {line}")
-                                if len(preview) > 5:
-                                    print(f"      ... and {len(preview) - 5} more lines")
-                    print()  # Empty line for readability
-            
-            return result
-            
+            print(f"🛑 Cancelled run {run_id} (status: {run.status})")
+            return run.status
         except Exception as e:
-            print(f"❌ Error getting run details: {e}")
-            return {"error": str(e)}
+            print(f"⚠️ Could not cancel run {run_id}: {e}")
+            return None
 
-    def _extract_sql_queries_with_data(self, steps) -> dict:
+    async def _expire_run(self, client: AsyncOpenAI, thread_id: Optional[str], run, deadline: _Deadline,
+                          error: Exception) -> FabricTimeoutError:
         """
-        Extract SQL queries from run steps using direct JSON parsing and output analysis.
-        
+        Handle a timeout raised while working on a question.
+
         Args:
-            steps: The run steps from the OpenAI API
-            
+            client (AsyncOpenAI): Configured async OpenAI client
+            thread_id (str): The question's thread, if it was created
+            run: The last known run, if it was created
+            deadline (_Deadline): The question's end-to-end deadline
+            error (Exception): The timeout that was raised
+
         Returns:
-            dict: Contains queries, data previews, and which query retrieved data
+            FabricTimeoutError: The error to raise for the expired deadline
         """
-        sql_queries = []
-        data_previews = []
-        data_retrieval_query = None
-        data_retrieval_query_index = None
-        
+        run_id, run_status = self._expired(run, deadline, error)
+        if run_id is not None and run_status in ACTIVE_RUN_STATUSES:
+            run_status = await self._cancel_run(client, thread_id, run_id) or run_status
+        return self._expiry_error(thread_id, run_id, run_status, deadline)
+
+    async def _coalesced(self, question: str, kind: str, fn, timeout: Optional[float]):
+        """
+        Await fn() once for concurrent identical questions to this data agent.
+
+        Args:
+            question (str): The question
+            kind (str): "ask" or "run_details"
+            fn: Zero-argument callable returning an awaitable that performs the call
+            timeout (float): How long a joining caller waits for the shared result
+
+        Returns:
+            The result of fn()
+        """
+        if not self.coalesce_requests:
+            return await fn()
+        return await self._in_flight.do(self._coalesce_key(question, kind), fn, timeout)
+
+    async def ask(self, question: str, timeout: int = 120, use_cache: bool = True) -> str:
+        """
+        Ask a question to the Fabric Data Agent.
+
+        Args:
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+            use_cache (bool): Use the answer cache, if one is configured
+
+        Returns:
+            str: The response from the data agent, or a "Timeout: ..." message if
+                the deadline expired (the run is cancelled on the service)
+        """
+        if not question.strip():
+            raise ValueError("Question cannot be empty")
+
+        print(f"\n❓ Asking: {question}")
+
         try:
-            for step_idx, step in enumerate(steps.data):
-                if hasattr(step, 'step_details') and step.step_details:
-                    step_details = step.step_details
-                    
-                    # Check for tool calls which typically contain the SQL queries
-                    if hasattr(step_details, 'tool_calls') and step_details.tool_calls:
-                        for tool_idx, tool_call in enumerate(step_details.tool_calls):
-                            # Extract SQL from function arguments
-                            sql_from_args = self._extract_sql_from_function_args(tool_call)
-                            if sql_from_args:
-                                sql_queries.extend(sql_from_args)
-                            
-                            # Extract SQL from tool call output (where it's actually located in Fabric)
-                            sql_from_output = self._extract_sql_from_output(tool_call)
-                            if sql_from_output:
-                                sql_queries.extend(sql_from_output)
-                            
-                            # Extract data from tool call output
-                            data_preview = self._extract_structured_data_from_output(tool_call)
-                            if data_preview:
-                                # If we found data and SQL in this step, it's likely the retrieval query
-                                if sql_from_args or sql_from_output:
-                                    all_sql_this_call = sql_from_args + sql_from_output
-                                    data_retrieval_query = all_sql_this_call[-1] if all_sql_this_call else None
-                                    data_retrieval_query_index = len(sql_queries)
-                            
-                            data_previews.append(data_preview)
-        
+            return await self._ask(question, timeout, use_cache)
         except Exception as e:
-            print(f"⚠️ Warning: Could not extract SQL queries: {e}")
-        
-        # Remove duplicates while preserving order
-        unique_queries = list(dict.fromkeys(sql_queries))
-        
-        return {
-            "queries": unique_queries,
-            "data_previews": data_previews,
-            "data_retrieval_query": data_retrieval_query,
-            "data_retrieval_query_index": data_retrieval_query_index
-        }
+            return self._error_answer(e)
 
-    def _extract_sql_from_function_args(self, tool_call) -> list:
+    async def _ask(self, question: str, timeout: int = 120, use_cache: bool = True) -> str:
         """
-        Extract SQL queries from tool call function arguments.
-        
+        Run one question end to end, raising on failure.
+
         Args:
-            tool_call: OpenAI tool call object
-            
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+            use_cache (bool): Use the answer cache, if one is configured
+
         Returns:
-            list: SQL queries found
+            str: The response from the data agent
+
+        Raises:
+            FabricTimeoutError: If the deadline expires
         """
-        import json
-        sql_queries = []
-        
-        try:
-            if hasattr(tool_call, 'function') and tool_call.function:
-                if hasattr(tool_call.function, 'arguments'):
-                    args_str = tool_call.function.arguments
-                    
-                    # Parse the arguments JSON
-                    args = json.loads(args_str)
-                    
-                    if isinstance(args, dict):
-                        # Common keys where SQL queries are stored in Fabric Data Agents
-                        sql_keys = ['sql', 'query', 'sql_query', 'statement', 'command', 'code']
-                        
-                        for key in sql_keys:
-                            if key in args and args[key]:
-                                sql_query = str(args[key]).strip()
-                                if sql_query and len(sql_query) > 10:  # Basic validation
-                                    sql_queries.append(sql_query)
-                        
-                        # Also check for nested structures
-                        for key, value in args.items():
-                            if isinstance(value, dict):
-                                for nested_key in sql_keys:
-                                    if nested_key in value and value[nested_key]:
-                                        sql_query = str(value[nested_key]).strip()
-                                        if sql_query and len(sql_query) > 10:
-                                            sql_queries.append(sql_query)
-        
-        except (json.JSONDecodeError, AttributeError) as e:
-            # If JSON parsing fails, fall back to basic string search
-            try:
-                args_str = str(tool_call.function.arguments)
-                # Look for common SQL patterns in the string
-                if any(keyword in args_str.upper() for keyword in ['SELECT', 'INSERT', 'UPDATE', 'DELETE']):
-                    # Use minimal regex as fallback
-                    import re
-                    sql_pattern = r'"(?:sql|query|statement|code)"\s*:\s*"([^"]+)"'
-                    matches = re.findall(sql_pattern, args_str, re.IGNORECASE)
-                    sql_queries.extend([match.strip() for match in matches if len(match.strip()) > 10])
-            except Exception as parse_error:
-                print(f"⚠️ Warning: Could not parse tool call arguments: {parse_error}")
-        
-        return sql_queries
+        with self.tracing.span("fabric.ask", {"fabric.data_agent_url": self.data_agent_url}):
+            cache_key, cached = self._cached(question, "ask", use_cache)
+            if cached is not None:
+                self.tracing.annotate({"fabric.cache_hit": True})
+                return cached
 
-    def _extract_sql_from_output(self, tool_call) -> list:
+            return await self._coalesced(
+                question,
+                "ask",
+                lambda: self._ask_uncached(question, timeout, cache_key),
+                timeout
+            )
+
+    async def _ask_uncached(self, question: str, timeout: int, cache_key: Optional[str]) -> str:
         """
-        Extract SQL queries from tool call output.
-        
+        Run one question against the service, raising on failure.
+
         Args:
-            tool_call: OpenAI tool call object
-            
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+            cache_key (str): Where to store the result, or None to skip caching
+
         Returns:
-            list: SQL queries found in output
+            str: The response from the data agent
+
+        Raises:
+            FabricTimeoutError: If the deadline expires
         """
-        import json
-        import re
-        sql_queries = []
-        
+        deadline = _Deadline(timeout)
+        client = await self._get_openai_client()
+        thread_id, run = None, None
+
         try:
-            if hasattr(tool_call, 'output') and tool_call.output:
-                output_str = str(tool_call.output)
-                
-                # First try to parse as JSON
-                try:
-                    output_json = json.loads(output_str)
-                    
-                    if isinstance(output_json, dict):
-                        # Look for SQL in common keys
-                        sql_keys = ['sql', 'query', 'sql_query', 'statement', 'command', 'code', 'generated_code']
-                        for key in sql_keys:
-                            if key in output_json and output_json[key]:
-                                sql_query = str(output_json[key]).strip()
-                                if sql_query and len(sql_query) > 10:
-                                    sql_queries.append(sql_query)
-                        
-                        # Check nested structures
-                        for key, value in output_json.items():
-                            if isinstance(value, dict):
-                                for nested_key in sql_keys:
-                                    if nested_key in value and value[nested_key]:
-                                        sql_query = str(value[nested_key]).strip()
-                                        if sql_query and len(sql_query) > 10:
-                                            sql_queries.append(sql_query)
-                
-                except json.JSONDecodeError:
-                    # If not JSON, use regex to find SQL patterns
-                    pass
-                
-                # Always also try regex as backup/additional method
-                if any(keyword in output_str.upper() for keyword in ['SELECT', 'INSERT', 'UPDATE', 'DELETE', 'FROM']):
-                    # Enhanced regex patterns for SQL extraction
-                    sql_patterns = [
-                        r'"(?:sql|query|statement|code|generated_code)"\s*:\s*"([^"]+)"',
-                        r"'(?:sql|query|statement|code|generated_code)'\s*:\s*'([^']+)'",
-                        r'(SELECT\s+.*?FROM\s+.*?)(?=\s*[;}"\'\n]|\s*$)',
-                        r'(INSERT\s+INTO\s+.*?)(?=\s*[;}"\'\n]|\s*$)',
-                        r'(UPDATE\s+.*?SET\s+.*?)(?=\s*[;}"\'\n]|\s*$)',
-                        r'(DELETE\s+FROM\s+.*?)(?=\s*[;}"\'\n]|\s*$)'
-                    ]
-                    
-                    for pattern in sql_patterns:
-                        matches = re.findall(pattern, output_str, re.IGNORECASE | re.DOTALL)
-                        for match in matches:
-                            clean_query = match.strip().replace('\\n', '\n').replace('\\t', '\t')
-                            clean_query = re.sub(r'\s+', ' ', clean_query)
-                            if len(clean_query) > 10:
-                                sql_queries.append(clean_query)
-        
+            # Create thread and send message
+            thread_id = await self._create_thread(client, deadline)
+            await self._call(
+                "message_create",
+                client.beta.threads.messages.create,
+                deadline,
+                thread_id=thread_id,
+                role="user",
+                content=question
+            )
+
+            # Start the run against the cached assistant
+            run = await self._create_run(client, thread_id, deadline)
+
+            # Monitor the run until it finishes or the deadline expires
+            run, _ = await self._wait_for_run(client, thread_id, run, deadline)
+
+            # Get the response messages
+            messages = await self._call(
+                "message_list",
+                client.beta.threads.messages.list,
+                deadline,
+                thread_id=thread_id,
+                order="asc"
+            )
+
+            # Extract assistant responses
+            responses = self._collect_responses([msg async for msg in messages])
+
+        except (FabricTimeoutError, _openai().APITimeoutError) as e:
+            outcome = "cancelled" if deadline.cancelled else "timeout"
+            self._record_question("ask", outcome, deadline.started_at)
+            raise await self._expire_run(client, thread_id, run, deadline, e) from e
+
         except Exception as e:
-            print(f"⚠️ Warning: Could not extract SQL from output: {e}")
-        
-        return sql_queries
+            self._record_question("ask", fabric_error(e).kind, deadline.started_at)
+            raise
+
+        finally:
+            # Delete the thread in the background instead of before returning
+            if thread_id is not None:
+                self.thread_cleaner.release(thread_id)
+
+        return self._answer(run, responses, deadline, cache_key)
+
+    def conversation(self, idle_timeout: Optional[float] = 900.0) -> AsyncFabricConversation:
+        """
+        Start a multi-turn conversation that reuses one Fabric thread.
+
+        Args:
+            idle_timeout (float): Seconds of inactivity after which the thread is
+                discarded, or None to keep it until the conversation is closed
+
+        Returns:
+            AsyncFabricConversation: The conversation; close it (or use it in an
+                async with block) when done
+        """
+        conversation = AsyncFabricConversation(self, idle_timeout)
+        self._conversations.add(conversation)
+        return conversation
+
+    async def close_idle_conversations(self) -> int:
+        """
+        Close conversations that have been idle longer than their idle_timeout.
+
+        Returns:
+            int: Number of conversations closed
+        """
+        idle = [c for c in list(self._conversations) if not c.closed and c.is_idle()]
+        for conversation in idle:
+            await conversation.close()
+        return len(idle)
+
+    async def ask_many(self, questions, max_concurrency: int = 32, timeout: int = 120,
+                       use_cache: bool = True):
+        """
+        Ask many questions concurrently and yield results as they complete.
+
+        If the caller stops iterating early, the questions still running are
+        cancelled (their runs on the service too) before the generator closes.
+
+        Args:
+            questions: Iterable of questions to ask
+            max_concurrency (int): Maximum number of questions in flight at once
+            timeout (int): Maximum end-to-end time for each question in seconds
+            use_cache (bool): Use the answer cache, if one is configured
+
+        Yields:
+            dict: index, question, answer, error, error_type (the FabricError kind),
+                timed_out and elapsed seconds for one question
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
 
-    def _extract_structured_data_from_output(self, tool_call) -> list:
+        # Cancels this batch's questions; an enclosing cancellation_scope() still reaches them
+        outer = _cancel_event.get()
+        stop = threading.Event()
+
+        async def forward_outer_cancel():
+            # A threading.Event cannot be awaited; check it between short sleeps
+            while not outer.is_set():
+                await asyncio.sleep(0.1)
+            stop.set()
+
+        async def run_one(index, question):
+            start_time = time.time()
+            try:
+                if not question.strip():
+                    raise ValueError("Question cannot be empty")
+                print(f"\n❓ Asking: {question}")
+                with cancellation_scope(stop):
+                    answer = await self._ask(question, timeout, use_cache)
+            except Exception as e:
+                return self._batch_result(index, question, start_time, error=e)
+            return self._batch_result(index, question, start_time, answer)
+
+        forwarder = None if outer is None else asyncio.ensure_future(forward_outer_cancel())
+        pending = set()
+        try:
+            for index, question in enumerate(questions):
+                if len(pending) >= max_concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+                pending.add(asyncio.ensure_future(run_one(index, question)))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            if forwarder is not None:
+                forwarder.cancel()
+            if pending:
+                # The caller stopped early; don't leave questions running detached
+                stop.set()
+                await asyncio.wait(pending)
+
+    async def ask_stream(self, question: str, timeout: int = 120):
         """
-        Extract structured data from tool call output using JSON parsing.
-        
+        Ask a question and yield the agent output as it is produced.
+
         Args:
-            tool_call: OpenAI tool call object
-            
-        Returns:
-            list: Formatted data lines
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+
+        Yields:
+            dict: Status, text, error, timeout and done items, as in FabricDataAgentClient.ask_stream()
         """
-        import json
-        data_lines = []
-        
+        if not question.strip():
+            raise ValueError("Question cannot be empty")
+
+        print(f"\n📡 Streaming: {question}")
+
+        deadline = _Deadline(timeout)
+        thread_id, run = None, None
+        outcome = "error"
         try:
-            if hasattr(tool_call, 'output') and tool_call.output:
-                output_str = str(tool_call.output)
-                
-                # Try to parse as JSON first
+            client = await self._get_openai_client()
+            thread_id = await self._create_thread(client, deadline)
+        except Exception as e:
+            error = self._failed(e)
+            self._record_question("stream", error.kind, deadline.started_at)
+            yield {"type": "error", "error": str(error), "error_type": error.kind}
+            return
+
+        try:
+            await self._call(
+                "message_create",
+                client.beta.threads.messages.create,
+                deadline,
+                thread_id=thread_id,
+                role="user",
+                content=question
+            )
+
+            stream = None
+            if self._streaming_supported:
                 try:
-                    data = json.loads(output_str)
-                    
-                    if isinstance(data, list) and len(data) > 0:
-                        # Handle list of records (typical query result)
-                        if isinstance(data[0], dict):
-                            headers = list(data[0].keys())
-                            data_lines.append("| " + " | ".join(headers) + " |")
-                            data_lines.append("|" + "---|" * len(headers))
-                            
-                            for row in data[:10]:  # Limit to first 10 rows
-                                values = [str(row.get(h, "")) for h in headers]
-                                data_lines.append("| " + " | ".join(values) + " |")
-                    
-                    elif isinstance(data, dict):
-                        # Handle single record or structured response
-                        if 'data' in data and isinstance(data['data'], list):
-                            # Nested data structure
-                            return self._format_list_data(data['data'])
-                        elif 'results' in data and isinstance(data['results'], list):
-                            # Results structure
-                            return self._format_list_data(data['results'])
-                        else:
-                            # Single record
-                            data_lines.append("| Key | Value |")
-                            data_lines.append("|---|---|")
-                            for key, value in data.items():
-                                data_lines.append(f"| {key} | {str(value)} |")
-                
-                except json.JSONDecodeError:
-                    # If not JSON, look for other structured formats
-                    data_lines = self._extract_data_preview(output_str)
-        
+                    stream = await self._create_run(client, thread_id, deadline, stream=True)
+                    run_id = await self._unstreamed_run_id(stream)
+                    if run_id is not None:
+                        # The endpoint ignored stream=True and answered with a plain run
+                        print("⚠️ Streaming not supported, falling back to polling")
+                        self._streaming_supported = False
+                        stream = None
+                        run = await self._call(
+                            "run_poll",
+                            client.beta.threads.runs.retrieve,
+                            deadline,
+                            thread_id=thread_id,
+                            run_id=run_id
+                        )
+                except _streaming_rejections() as e:
+                    print(f"⚠️ Streaming not supported, falling back to polling: {e}")
+                    self._streaming_supported = False
+
+            if stream is not None:
+                async for item in self._consume_stream(client, thread_id, stream, deadline):
+                    if item["type"] in ("done", "timeout", "error"):
+                        outcome = item.get("status") if item["type"] == "done" else item["type"]
+                    yield item
+            else:
+                if run is None:
+                    run = await self._create_run(client, thread_id, deadline)
+                yield {"type": "status", "status": run.status, "run_id": run.id}
+                run, _ = await self._wait_for_run(client, thread_id, run, deadline)
+                yield {"type": "status", "status": run.status, "run_id": run.id}
+                messages = await self._call(
+                    "message_list",
+                    client.beta.threads.messages.list,
+                    deadline,
+                    thread_id=thread_id,
+                    order="asc"
+                )
+                text = "\n".join(self._collect_responses([msg async for msg in messages]))
+                if text:
+                    yield {"type": "text", "text": text}
+                outcome = run.status
+                yield {"type": "done", "status": run.status, "text": text}
+
+        except (FabricTimeoutError, _openai().APITimeoutError) as e:
+            outcome = "timeout"
+            try:
+                error = await self._expire_run(client, thread_id, run, deadline, e)
+                yield {"type": "timeout", "error": str(error), "run_id": error.run_id, "status": error.run_status}
+            except Exception as e:
+                error = self._failed(e)
+                yield {"type": "error", "error": str(error), "error_type": error.kind}
+
         except Exception as e:
-            print(f"⚠️ Warning: Could not extract structured data: {e}")
-        
-        return data_lines
+            error = self._failed(e)
+            outcome = error.kind
+            yield {"type": "error", "error": str(error), "error_type": error.kind}
 
-    def _extract_markdown_table(self, text: str) -> str:
+        finally:
+            self.thread_cleaner.release(thread_id)
+            self._record_question("stream", outcome, deadline.started_at)
+
+    async def _consume_stream(self, client: AsyncOpenAI, thread_id: str, stream, deadline: _Deadline):
         """
-        Extract raw markdown table from the assistant's text response.
-        
+        Translate a run event stream into ask_stream() items.
+
         Args:
-            text (str): The assistant's text response
-            
-        Returns:
-            str: Raw markdown table if found, or empty string if no table found
+            client (AsyncOpenAI): Configured async OpenAI client
+            thread_id (str): The thread the run belongs to
+            stream: The event stream returned by runs.create(stream=True)
+            deadline (_Deadline): The question's end-to-end deadline
+
+        Yields:
+            dict: Status and text items, then a final done or timeout item
         """
-        lines = text.split('\n')
-        table_lines = []
-        in_table = False
-        header_found = False
-        
-        for line in lines:
-            line_stripped = line.strip()
-            
-            # Check if this line contains markdown table separators
-            if '|' in line_stripped and ('---' in line_stripped or '-' in line_stripped and line_stripped.count('-') > 3):
-                table_lines.append(line)
-                in_table = True
-                header_found = True
-            elif '|' in line_stripped and (in_table or not header_found):
-                # This is a table row (header or data row)
-                table_lines.append(line)
-                in_table = True
-            elif in_table and line_stripped == '':
-                # Empty line - might continue table, add it but don't break yet
-                table_lines.append(line)
-            elif in_table and '|' not in line_stripped and line_stripped != '':
-                # Non-table line after we were in a table - end of table
-                break
-        
-        # Clean up trailing empty lines
-        while table_lines and table_lines[-1].strip() == '':
-            table_lines.pop()
-        
-        # Return the raw markdown table if we found at least a header and separator
-        if len(table_lines) >= 2:
-            return '\n'.join(table_lines)
-        else:
-            return ""
+        chunks = []
+        status, run_id = None, None
+        try:
+            async with stream:
+                async for event in stream:
+                    item = self._translate_stream_event(event)
+                    if item is None:
+                        continue
+                    if item["type"] == "text":
+                        chunks.append(item["text"])
+                    else:
+                        status, run_id = item["status"], item["run_id"]
+                    yield item
+                    deadline.check("streaming")
 
-    def _extract_data_from_text_response(self, text_content: str) -> list:
+        except (FabricTimeoutError, _httpx().TimeoutException) as e:
+            error = await self._expire_run(
+                client,
+                thread_id,
+                None,
+                deadline,
+                FabricTimeoutError(str(e), thread_id=thread_id, run_id=run_id, run_status=status)
+                if deadline.expired() else e
+            )
+            yield {"type": "timeout", "error": str(error), "run_id": error.run_id, "status": error.run_status}
+            return
+
+        print(f"✅ Final status: {status}")
+        yield {"type": "done", "status": status, "text": "".join(chunks)}
+
+    async def _unstreamed_run_id(self, stream) -> Optional[str]:
         """
-        Extract structured data from the assistant's text response.
-        First tries to find raw markdown tables, then falls back to numbered list parsing.
-        
+        Detect an endpoint that answered a streaming request with a plain run.
+
         Args:
-            text_content (str): The text content from the assistant
-            
+            stream: The object returned by runs.create(stream=True)
+
         Returns:
-            list: Formatted data lines (raw markdown table as single item, or parsed rows)
+            str: The created run id if the response is not an event stream, else None
         """
-        import re
-        
-        # First, try to extract a raw markdown table
-        markdown_table = self._extract_markdown_table(text_content)
-        if markdown_table:
-            # Return the raw markdown table as a single formatted block
-            return [markdown_table]
-        
-        # Fallback to numbered list parsing (existing logic)
-        data_lines = []
-        
-        try:
-            lines = text_content.split('\n')
-            
-            # Look for numbered lists with data (like the example output)
-            numbered_pattern = r'^\d+\.\s+'
-            data_rows = []
-            
-            for line in lines:
-                line = line.strip()
-                if re.match(numbered_pattern, line):
-                    # Remove the number prefix
-                    clean_line = re.sub(numbered_pattern, '', line)
-                    data_rows.append(clean_line)
-            
-            if data_rows and len(data_rows) > 0:
-                # Try to parse the structured data from the text
-                first_row = data_rows[0]
-                if ':' in first_row:
-                    # Parse key-value format
-                    # Example: "Date: 4/29/2020, State: WI, Positive: 7,660, ..."
-                    
-                    # Extract headers from first row
-                    headers = []
-                    values_first_row = []
-                    
-                    pairs = first_row.split(', ')
-                    for pair in pairs:
-                        if ':' in pair:
-                            key, value = pair.split(':', 1)
-                            headers.append(key.strip())
-                            values_first_row.append(value.strip())
-                    
-                    if headers:
-                        # Create table format
-                        data_lines.append("| " + " | ".join(headers) + " |")
-                        data_lines.append("|" + "---|" * len(headers))
-                        
-                        # Add first row
-                        data_lines.append("| " + " | ".join(values_first_row) + " |")
-                        
-                        # Parse remaining rows
-                        for row in data_rows[1:]:
-                            values = []
-                            pairs = row.split(', ')
-                            for pair in pairs:
-                                if ':' in pair:
-                                    _, value = pair.split(':', 1)
-                                    values.append(value.strip())
-                            
-                            if len(values) == len(headers):
-                                data_lines.append("| " + " | ".join(values) + " |")
-                            
-                        return data_lines
-                
-                # If we couldn't parse structured format, return the raw rows as-is
-                if not data_lines and data_rows:
-                    # Just show the numbered list data
-                    return [f"Row {i+1}: {row}" for i, row in enumerate(data_rows)]
-            
-            # Alternative: Look for table-like structures in the text
-            # Check if there are lines that look like table rows
-            potential_table_lines = []
-            for line in lines:
-                line = line.strip()
-                # Look for lines with multiple separators that could be table data
-                if line and ('|' in line or line.count(',') >= 2 or line.count(':') >= 2):
-                    potential_table_lines.append(line)
-            
-            if potential_table_lines and not data_lines:
-                return potential_table_lines[:10]  # Return first 10 lines
-        
-        except Exception as e:
-            print(f"⚠️ Warning: Could not extract data from text response: {e}")
-        
-        return data_lines
+        response = stream.response
+        if "text/event-stream" in response.headers.get("content-type", ""):
+            return None
+        await response.aread()
+        run_id = response.json().get("id")
+        await stream.close()
+        return run_id
 
-    def _format_list_data(self, data_list) -> list:
+    async def get_run_details(self, question: str, timeout: int = 120, use_cache: bool = True):
         """
-        Format a list of data records into table format.
-        """
-        data_lines = []
-        
-        if len(data_list) > 0 and isinstance(data_list[0], dict):
-            headers = list(data_list[0].keys())
-            data_lines.append("| " + " | ".join(headers) + " |")
-            data_lines.append("|" + "---|" * len(headers))
-            
-            for row in data_list[:10]:  # Limit to first 10 rows
-                values = [str(row.get(h, "")) for h in headers]
-                data_lines.append("| " + " | ".join(values) + " |")
-        
-        return data_lines
+        Ask a question and return detailed run information including steps.
 
-    def _extract_data_preview(self, text: str) -> list:
-        """
-        Extract data preview from text output.
-        
         Args:
-            text (str): Text to search for tabular data
-            
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+            use_cache (bool): Use the answer cache, if one is configured
+
         Returns:
-            list: List of data rows found
+            RunDetails: Detailed response including run steps, metadata, and SQL queries if lakehouse
+                data source. Supports dict-style access; the raw run_steps/messages dumps are built on
+                first access. On failure a dict with error and error_type keys is returned instead;
+                if the deadline expires the run is cancelled and that dict has timed_out set.
+
+        Raises:
+            FabricError: Instead of returning the error dict, if the client has raise_errors set
         """
-        import re
-        import json
-        
-        data_lines = []
-        
+        print(f"\n🔍 Getting detailed run info for: {question}")
+
         try:
-            # Look for JSON-like data structures
-            json_pattern = r'\[[\s\S]*?\]'
-            json_matches = re.findall(json_pattern, text)
-            
-            for match in json_matches:
-                try:
-                    # Try to parse as JSON
-                    data = json.loads(match)
-                    if isinstance(data, list) and len(data) > 0:
-                        # Convert to readable format
-                        if isinstance(data[0], dict):
-                            # List of dictionaries (typical query result)
-                            headers = list(data[0].keys())
-                            data_lines.append("| " + " | ".join(headers) + " |")
-                            data_lines.append("|" + "---|" * len(headers))
-                            
-                            for row in data[:10]:  # Limit to first 10 rows
-                                values = [str(row.get(h, "")) for h in headers]
-                                data_lines.append("| " + " | ".join(values) + " |")
-                        break  # Found valid JSON data
-                except json.JSONDecodeError:
-                    continue
-            
-            # If no JSON found, look for pipe-separated tables
-            if not data_lines:
-                lines = text.split('\n')
-                table_lines = []
-                
-                for line in lines:
-                    # Look for lines that contain multiple pipe characters (table format)
-                    if line.count('|') >= 2:
-                        table_lines.append(line.strip())
-                    elif table_lines and line.strip() == "":
-                        # End of table
-                        break
-                    elif table_lines and not line.strip().startswith('|'):
-                        # Non-table line after table started
-                        break
-                
-                if table_lines:
-                    data_lines = table_lines[:15]  # Limit to first 15 lines
-            
-            # Look for CSV-like data
-            if not data_lines:
-                lines = text.split('\n')
-                csv_lines = []
-                
-                for line in lines:
-                    # Look for comma-separated values with consistent column count
-                    if ',' in line and len(line.split(',')) >= 2:
-                        csv_lines.append(line.strip())
-                        if len(csv_lines) >= 10:  # Limit preview
-                            break
-                    elif csv_lines:
-                        break
-                
-                if len(csv_lines) > 1:  # At least header + one data row
-                    data_lines = csv_lines
-        
+            return await self._get_run_details(question, timeout, use_cache)
         except Exception as e:
-            print(f"⚠️ Warning: Could not extract data preview: {e}")
-        
-        return data_lines
+            error = self._failed(e)
+            if self.raise_errors:
+                raise error
+            return self._run_details_error(question, error)
 
-    def _extract_sql_queries(self, steps) -> list:
+    async def _get_run_details(self, question: str, timeout: int = 120, use_cache: bool = True) -> RunDetails:
         """
-        Extract SQL queries from run steps when lakehouse data source is used.
-        
+        Run one question end to end and build its run details, raising on failure.
+
         Args:
-            steps: The run steps from the OpenAI API
-            
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+            use_cache (bool): Use the answer cache, if one is configured
+
         Returns:
-            list: List of SQL queries found in the steps
+            RunDetails: Detailed response, as returned by get_run_details()
+
+        Raises:
+            FabricTimeoutError: If the deadline expires
         """
-        sql_queries = []
-        
-        try:
-            for step in steps.data:
-                if hasattr(step, 'step_details') and step.step_details:
-                    step_details = step.step_details
-                    
-                    # Check for tool calls that might contain SQL
-                    if hasattr(step_details, 'tool_calls') and step_details.tool_calls:
-                        for tool_call in step_details.tool_calls:
-                            # Look for SQL queries in tool call details
-                            if hasattr(tool_call, 'function') and tool_call.function:
-                                if hasattr(tool_call.function, 'arguments'):
-                                    args_str = str(tool_call.function.arguments)
-                                    # Look for SQL patterns in arguments
-                                    sql_queries.extend(self._find_sql_in_text(args_str))
-                            
-                            # Check tool call outputs for SQL
-                            if hasattr(tool_call, 'output') and tool_call.output:
-                                output_str = str(tool_call.output)
-                                sql_queries.extend(self._find_sql_in_text(output_str))
-                    
-                    # Check step details for any SQL content
-                    step_str = str(step_details)
-                    sql_queries.extend(self._find_sql_in_text(step_str))
-        
-        except Exception as e:
-            print(f"⚠️ Warning: Could not extract SQL queries: {e}")
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_queries = []
-        for query in sql_queries:
-            if query not in seen:
-                seen.add(query)
-                unique_queries.append(query)
-        
-        return unique_queries
+        with self.tracing.span("fabric.get_run_details", {"fabric.data_agent_url": self.data_agent_url}):
+            cache_key, cached = self._cached(question, "run_details", use_cache)
+            if cached is not None:
+                self.tracing.annotate({"fabric.cache_hit": True})
+                return RunDetails.from_dict(cached)
 
-    def _find_sql_in_text(self, text: str) -> list:
+            return await self._coalesced(
+                question,
+                "run_details",
+                lambda: self._get_run_details_uncached(question, timeout, cache_key),
+                timeout
+            )
+
+    async def _get_run_details_uncached(self, question: str, timeout: int, cache_key: Optional[str]) -> RunDetails:
         """
-        Find SQL queries in text using pattern matching.
-        
+        Run one question against the service and build its run details, raising on failure.
+
         Args:
-            text (str): Text to search for SQL queries
-            
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds
+            cache_key (str): Where to store the result, or None to skip caching
+
         Returns:
-            list: List of SQL queries found
+            RunDetails: Detailed response, as returned by get_run_details()
+
+        Raises:
+            FabricTimeoutError: If the deadline expires
         """
-        import re
-        
-        sql_queries = []
-        
-        # Common SQL keywords that indicate a query
-        sql_patterns = [
-            r'(SELECT\s+.*?FROM\s+.*?)(?=\s*;|\s*$|\s*\}|\s*\)|\s*,)',
-            r'(INSERT\s+INTO\s+.*?)(?=\s*;|\s*$|\s*\}|\s*\))',
-            r'(UPDATE\s+.*?SET\s+.*?)(?=\s*;|\s*$|\s*\}|\s*\))',
-            r'(DELETE\s+FROM\s+.*?)(?=\s*;|\s*$|\s*\}|\s*\))',
-            r'(CREATE\s+TABLE\s+.*?)(?=\s*;|\s*$|\s*\}|\s*\))',
-            r'(ALTER\s+TABLE\s+.*?)(?=\s*;|\s*$|\s*\}|\s*\))',
-            r'(DROP\s+TABLE\s+.*?)(?=\s*;|\s*$|\s*\}|\s*\))'
-        ]
-        
-        for pattern in sql_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE | re.DOTALL)
-            for match in matches:
-                # Clean up the SQL query
-                clean_query = match.strip().replace('\n', ' ').replace('\t', ' ')
-                clean_query = re.sub(r'\s+', ' ', clean_query)  # Normalize whitespace
-                if len(clean_query) > 10:  # Filter out very short matches
-                    sql_queries.append(clean_query)
-        
-        return sql_queries
+        deadline = _Deadline(timeout)
+        client = await self._get_openai_client()
+        thread_id, run = None, None
+
+        try:
+            thread_id = await self._create_thread(client, deadline)
+            await self._call(
+                "message_create",
+                client.beta.threads.messages.create,
+                deadline,
+                thread_id=thread_id,
+                role="user",
+                content=question
+            )
+
+            # Start and monitor run
+            run = await self._create_run(client, thread_id, deadline)
+
+            run, polls = await self._wait_for_run(client, thread_id, run, deadline)
+
+            # Get detailed run steps
+            steps = await self._call(
+                "steps_list",
+                client.beta.threads.runs.steps.list,
+                deadline,
+                thread_id=thread_id,
+                run_id=run.id
+            )
+
+            # Get messages
+            messages = await self._call(
+                "message_list",
+                client.beta.threads.messages.list,
+                deadline,
+                thread_id=thread_id,
+                order="asc"
+            )
+
+            result = self._run_details(question, run, polls, steps, messages)
+
+        except (FabricTimeoutError, _openai().APITimeoutError) as e:
+            outcome = "cancelled" if deadline.cancelled else "timeout"
+            self._record_question("run_details", outcome, deadline.started_at)
+            raise await self._expire_run(client, thread_id, run, deadline, e) from e
+
+        except Exception as e:
+            self._record_question("run_details", fabric_error(e).kind, deadline.started_at)
+            raise
+
+        finally:
+            # Delete the thread in the background instead of before returning
+            if thread_id is not None:
+                self.thread_cleaner.release(thread_id)
+
+        return self._finish_run_details(result, run, deadline, cache_key)
 
 
 def main():
     """
     Example usage of the Fabric Data Agent Client.
     """
+    load_env()
+
     # Configuration - Update these with your actual values
     TENANT_ID = os.getenv("TENANT_ID", "your-tenant-id-here")
     DATA_AGENT_URL = os.getenv("DATA_AGENT_URL", "your-data-agent-url-here")
@@ -950,6 +3704,7 @@ def main():
         print("3. Create a .env file with these variables")
         return
     
+    client = None
     try:
         # Initialize the client (this will trigger authentication)
         client = FabricDataAgentClient(
@@ -968,20 +3723,13 @@ def main():
         print("🤖 Fabric Data Agent Client - Ready!")
         print("="*60)
         
-        for i, question in enumerate(questions, 1):
-            print(f"\n📋 Example {i}:")
-            response = client.ask(question)
-            
-            print(f"\n💬 Response:")
+        # Ask the questions concurrently and print answers as they arrive
+        for result in client.ask_many(questions, max_concurrency=3):
+            print(f"\n📋 Example {result['index'] + 1}: {result['question']}")
+            print(f"\n💬 Response ({result['elapsed']:.1f}s):")
             print("-" * 50)
-            print(response)
+            print(result["answer"] if result["error"] is None else f"Error: {result['error']}")
             print("-" * 50)
-            
-            # Wait between requests
-            if i < len(questions):
-                n = 1
-                print(f"\nWaiting {n} seconds before next question...")
-                time.sleep(n)
         
         print("\n✅ All examples completed successfully!")
         
@@ -989,6 +3737,10 @@ def main():
         print("\n⏹️ Operation cancelled by user")
     except Exception as e:
         print(f"\n❌ Error: {e}")
+    finally:
+        # Deletes the threads the questions created before the script exits
+        if client is not None:
+            client.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+httpx authentication hook for the Fabric Data Agent client.
+
+Kept apart from fabric_data_agent_client so httpx is imported only when a
+client builds its connection pool, not when the client module is imported.
+"""
+
+import httpx
+
+from fabric_tracing import activity_id
+
+
+class FabricBearerAuth(httpx.Auth):
+    """
+    httpx auth hook that stamps the current bearer token on every request.
+
+    The token is read from the owning client's token provider at send time, so
+    a token refresh takes effect on the existing connection pool without
+    rebuilding anything.
+    """
+
+    def __init__(self, owner):
+        self._owner = owner
+
+    def auth_flow(self, request):
+        token = self._owner.token_provider.current()
+        if token is not None:
+            request.headers["Authorization"] = f"Bearer {token.token}"
+        request.headers["ActivityId"] = activity_id(self._owner.tracing)
+        self._owner.tracing.inject(request.headers)
+        response = yield request
+        self._owner.metrics.count_response(response.status_code)
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Metrics for the Fabric Data Agent client.
+
+A small in-process registry of counters, gauges and histograms that renders in the
+Prometheus text exposition format, so any process using the client can serve
+it on a /metrics endpoint. FabricMetrics records how long each phase of a
+question takes (token fetch, assistant create, thread create, message create,
+run create, queue wait, in-progress time, status polls, run cancel, message
+list, steps list, thread delete, client-side rate limit waits) and counts polls, HTTP responses, retried
+calls, timeouts and failures.
+
+Clients are created with metrics disabled; the disabled recorder's methods do
+nothing, so uninstrumented clients pay one no-op call per phase.
+
+Example:
+    metrics = FabricMetrics()
+    client = FabricDataAgentClient(tenant_id, url, metrics=metrics)
+    ...
+    print(default_registry().render())
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Optional
+
+# Prometheus text format version served by MetricsRegistry.render()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds; Fabric phases range from milliseconds to minutes
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """
+    A monotonically increasing value per label combination.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *labels):
+        """
+        Add amount to the counter for the given label values.
+
+        Args:
+            amount (float): Non-negative increment
+            *labels: One value per label name, in order
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        """
+        Return the current value for the given label values.
+        """
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _labels(self.labelnames, labels), value) for labels, value in items]
+
+
+class Gauge:
+    """
+    A value per label combination that can go up and down, such as a queue depth.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *labels):
+        """
+        Set the gauge for the given label values.
+        """
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, amount: float = 1.0, *labels):
+        """
+        Add amount (which may be negative) to the gauge for the given label values.
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        """
+        Return the current value for the given label values.
+        """
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _labels(self.labelnames, labels), value) for labels, value in items]
+
+
+class Histogram:
+    """
+    Bucketed observations (count, sum and cumulative buckets) per label combination.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        """
+        Record one observation for the given label values.
+
+        Args:
+            value (float): The observed value, e.g. seconds
+            *labels: One value per label name, in order
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts plus an overflow slot, then count and sum
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def snapshot(self, *labels) -> dict:
+        """
+        Return count, sum and cumulative bucket counts for the given label values.
+
+        Returns:
+            dict: {"count": int, "sum": float, "buckets": {upper_bound: cumulative_count}}
+        """
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                return {"count": 0, "sum": 0.0, "buckets": {}}
+            counts, count, total = list(series[0]), series[1], series[2]
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            buckets[bound] = cumulative
+        return {"count": count, "sum": total, "buckets": buckets}
+
+    def samples(self) -> list:
+        with self._lock:
+            keys = sorted(self._series)
+        samples = []
+        for labels in keys:
+            snapshot = self.snapshot(*labels)
+            for bound, cumulative in snapshot["buckets"].items():
+                samples.append((self.name + "_bucket",
+                                _labels(self.labelnames, labels, f'le="{_number(bound)}"'), cumulative))
+            samples.append((self.name + "_sum", _labels(self.labelnames, labels), snapshot["sum"]))
+            samples.append((self.name + "_count", _labels(self.labelnames, labels), snapshot["count"]))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    A set of named metrics that renders in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        """
+        Return the counter with this name, creating it on first use.
+        """
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        """
+        Return the gauge with this name, creating it on first use.
+        """
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Return the histogram with this name, creating it on first use.
+        """
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def get(self, name: str):
+        """
+        Return a registered metric by name, or None.
+        """
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text, served with CONTENT_TYPE
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+_default_registry = MetricsRegistry()
+
+
+def default_registry() -> MetricsRegistry:
+    """
+    Return the process-wide registry used when none is given.
+    """
+    return _default_registry
+
+
+class _PhaseTimer:
+    __slots__ = ("_histogram", "_phase", "_start")
+
+    def __init__(self, histogram: Histogram, phase: str):
+        self._histogram = histogram
+        self._phase = phase
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start, self._phase)
+        return False
+
+
+class FabricMetrics:
+    """
+    Recorder for the client's phase timings and counters.
+    """
+
+    enabled = True
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, buckets: tuple = DEFAULT_BUCKETS):
+        """
+        Register the client metrics (shared by every client using the same registry).
+
+        Args:
+            registry (MetricsRegistry): Where to register, defaults to default_registry()
+            buckets (tuple): Histogram upper bounds in seconds
+        """
+        self.registry = registry or default_registry()
+        self.phase_seconds = self.registry.histogram(
+            "fabric_client_phase_seconds", "Time spent in each phase of a question", ("phase",), buckets
+        )
+        self.question_seconds = self.registry.histogram(
+            "fabric_client_question_seconds", "End-to-end time of questions sent to the service",
+            ("kind", "outcome"), buckets
+        )
+        self.polls = self.registry.counter("fabric_client_polls_total", "Run status checks")
+        self.retries = self.registry.counter(
+            "fabric_client_retries_total", "API calls retried after throttling or a transient failure", ("phase",)
+        )
+        self.http_responses = self.registry.counter(
+            "fabric_client_http_responses_total", "HTTP responses by status code", ("status",)
+        )
+        self.timeouts = self.registry.counter("fabric_client_timeouts_total", "Questions whose deadline expired")
+        self.failures = self.registry.counter(
+            "fabric_client_failures_total", "Failed questions by reason", ("reason",)
+        )
+        self.cache_hits = self.registry.counter("fabric_client_cache_hits_total", "Questions answered from the cache")
+
+    def phase(self, name: str) -> _PhaseTimer:
+        """
+        Return a context manager that times one phase.
+
+        Args:
+            name (str): Phase label, e.g. "thread_create"
+        """
+        return _PhaseTimer(self.phase_seconds, name)
+
+    def observe_phase(self, name: str, seconds: float):
+        """
+        Record the duration of a phase measured elsewhere.
+        """
+        self.phase_seconds.observe(seconds, name)
+
+    def observe_question(self, kind: str, outcome: str, seconds: float):
+        """
+        Record one question's end-to-end time.
+
+        Args:
+            kind (str): "ask", "stream" or "run_details"
+            outcome (str): The final run status, or the FabricError kind ("timeout",
+                "cancelled", "throttled", "unavailable", "circuit_open", "permanent", "error")
+            seconds (float): Elapsed time
+        """
+        self.question_seconds.observe(seconds, kind, outcome)
+
+    def count_polls(self, polls: int):
+        self.polls.inc(polls)
+
+    def count_response(self, status_code: int):
+        self.http_responses.inc(1, str(status_code))
+
+    def count_retry(self, phase: str):
+        self.retries.inc(1, phase)
+
+    def count_timeout(self):
+        self.timeouts.inc()
+
+    def count_failure(self, reason: str):
+        self.failures.inc(1, reason)
+
+    def count_cache_hit(self):
+        self.cache_hits.inc()
+
+
+class _DisabledMetrics:
+    """
+    Recorder used when metrics are off; every method is a no-op.
+    """
+
+    enabled = False
+    _timer = nullcontext()
+
+    def phase(self, name: str):
+        return self._timer
+
+    def observe_phase(self, name: str, seconds: float):
+        pass
+
+    def observe_question(self, kind: str, outcome: str, seconds: float):
+        pass
+
+    def count_polls(self, polls: int):
+        pass
+
+    def count_response(self, status_code: int):
+        pass
+
+    def count_retry(self, phase: str):
+        pass
+
+    def count_timeout(self):
+        pass
+
+    def count_failure(self, reason: str):
+        pass
+
+    def count_cache_hit(self):
+        pass
+
+
+DISABLED_METRICS = _DisabledMetrics()
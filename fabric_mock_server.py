@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Local mock of the Fabric Data Agent Assistants API.
+
+Serves the assistants / threads / messages / runs / steps endpoints that
+FabricDataAgentClient uses, so the client can be exercised and benchmarked
+without a Fabric tenant. Runs move from queued to in_progress to completed on
+a configurable timeline and finish with a tool call step holding a SQL query
+and JSON result rows, plus an assistant answer with a markdown table. HTTP 429
+(with Retry-After), HTTP 500 and failed runs can be injected at given rates.
+
+Usage:
+    python fabric_mock_server.py --port 8765 --queue-delay 0.5 --run-delay 2
+    # then point the client at http://127.0.0.1:8765/ with TokenProvider.static("mock")
+
+Or in-process:
+    with MockFabricServer(run_delay=0.5) as server:
+        client = FabricDataAgentClient("tenant", server.url,
+                                       token_provider=TokenProvider.static("mock"))
+
+Requirements:
+- Python standard library only
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+_STATES = ["WI", "MN", "IL", "IA", "MI", "OH", "IN", "MO"]
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+
+class _MockRun:
+    """
+    Timeline and outcome of one mock run, decided when the run is created.
+    """
+
+    def __init__(self, run_id: str, thread_id: str, assistant_id: str, question: str,
+                 queue_delay: float, run_delay: float, fail: bool):
+        self.id = run_id
+        self.thread_id = thread_id
+        self.assistant_id = assistant_id
+        self.question = question
+        self.created_at = time.time()
+        self.started_at = self.created_at + queue_delay
+        self.finished_at = self.started_at + run_delay
+        self.fail = fail
+        self.cancelled = False
+        self.answered = False
+
+    def status(self, now: float) -> str:
+        if self.cancelled:
+            return "cancelled"
+        if now >= self.finished_at:
+            return "failed" if self.fail else "completed"
+        if now >= self.started_at:
+            return "in_progress"
+        return "queued"
+
+
+class MockFabricServer:
+    """
+    Threaded HTTP server that imitates a Fabric data agent endpoint.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, queue_delay: float = 0.2,
+                 run_delay: float = 1.0, delay_jitter: float = 0.0, api_latency: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: float = 1.0, error_rate: float = 0.0,
+                 run_failure_rate: float = 0.0, result_rows: int = 20, streaming: bool = True,
+                 seed: Optional[int] = None):
+        """
+        Initialize the server (call start() or use it as a context manager).
+
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind, 0 for any free port
+            queue_delay (float): Seconds a run stays queued
+            run_delay (float): Seconds a run stays in progress
+            delay_jitter (float): Random extra fraction of each delay, e.g. 0.5 for up to +50%
+            api_latency (float): Seconds added to every HTTP response
+            throttle_rate (float): Fraction of requests answered with HTTP 429
+            retry_after (float): Retry-After seconds sent with each 429
+            error_rate (float): Fraction of requests answered with HTTP 500
+            run_failure_rate (float): Fraction of runs that end in status "failed"
+            result_rows (int): Number of JSON rows in each tool call output
+            streaming (bool): Answer stream=True runs with server-sent events
+            seed (int): Seed for the injection and jitter random generator
+        """
+        self.queue_delay = queue_delay
+        self.run_delay = run_delay
+        self.delay_jitter = delay_jitter
+        self.api_latency = api_latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.run_failure_rate = run_failure_rate
+        self.result_rows = result_rows
+        self.streaming = streaming
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._assistants = set()
+        self._threads = {}
+        self._runs = {}
+        self._requests = Counter()
+
+        self._httpd = ThreadingHTTPServer((host, port), _MockHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._serve_thread = None
+
+    @property
+    def url(self) -> str:
+        """
+        Base URL to pass to the client as data_agent_url.
+        """
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "MockFabricServer":
+        """
+        Start serving in a background thread.
+        """
+        if self._serve_thread is None:
+            self._serve_thread = threading.Thread(
+                target=self._httpd.serve_forever, name="fabric-mock-server", daemon=True
+            )
+            self._serve_thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving and close the socket.
+        """
+        if self._serve_thread is not None:
+            self._httpd.shutdown()
+            self._serve_thread.join()
+            self._serve_thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def stats(self) -> dict:
+        """
+        Return request counts and live object counts.
+
+        Returns:
+            dict: total requests, requests per "METHOD endpoint", threads, runs and throttled/errors
+        """
+        with self._lock:
+            return {
+                "requests": sum(count for key, count in self._requests.items() if " " in key),
+                "by_endpoint": {key: count for key, count in self._requests.items() if " " in key},
+                "throttled": self._requests["throttled"],
+                "errors": self._requests["errors"],
+                "threads": len(self._threads),
+                "runs": len(self._runs),
+            }
+
+    def reset_stats(self):
+        """
+        Clear the request counters (threads and runs are kept).
+        """
+        with self._lock:
+            self._requests.clear()
+
+    def _delay(self, base: float) -> float:
+        return base * (1 + self._random.random() * self.delay_jitter)
+
+    def _inject(self) -> Optional[int]:
+        # Decide whether this request is throttled or fails before it is handled
+        with self._lock:
+            roll = self._random.random()
+            if roll < self.throttle_rate:
+                self._requests["throttled"] += 1
+                return 429
+            if roll < self.throttle_rate + self.error_rate:
+                self._requests["errors"] += 1
+                return 500
+        return None
+
+    def _count(self, method: str, endpoint: str):
+        with self._lock:
+            self._requests[f"{method} {endpoint}"] += 1
+
+    def _result_rows(self) -> list:
+        rows = []
+        for index in range(self.result_rows):
+            rows.append({
+                "Date": f"2020-04-{29 - index % 28:02d}",
+                "State": _STATES[index % len(_STATES)],
+                "Positive": 7660 - index * 137,
+                "Deaths": 339 - index * 5,
+                "PositiveRate": round(0.071 + index * 0.0013, 4),
+            })
+        return rows
+
+    def _sql(self) -> str:
+        return (
+            f"SELECT TOP {self.result_rows} [Date], [State], [Positive], [Deaths], "
+            "CAST([Positive] AS FLOAT) / NULLIF([TotalTests], 0) AS [PositiveRate] "
+            "FROM [dbo].[covid_tracking] WHERE [State] IN ('WI', 'MN', 'IL') "
+            "ORDER BY [Date] DESC"
+        )
+
+    def _answer_text(self, question: str) -> str:
+        lines = [f"Here are the latest results for: {question}", "",
+                 "| Date | State | Positive | Deaths |", "|---|---|---|---|"]
+        for row in self._result_rows()[:5]:
+            lines.append(f"| {row['Date']} | {row['State']} | {row['Positive']} | {row['Deaths']} |")
+        lines += ["", f"The query returned {self.result_rows} rows."]
+        return "\n".join(lines)
+
+    def _message(self, thread_id: str, role: str, text: str, assistant_id=None, run_id=None) -> dict:
+        return {
+            "id": _new_id("msg"), "object": "thread.message", "created_at": int(time.time()),
+            "thread_id": thread_id, "role": role, "status": "completed",
+            "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+            "assistant_id": assistant_id, "run_id": run_id, "attachments": [], "metadata": {},
+            "completed_at": None, "incomplete_at": None, "incomplete_details": None,
+        }
+
+    def _run_object(self, run: _MockRun) -> dict:
+        now = time.time()
+        status = run.status(now)
+        with self._lock:
+            if status == "completed" and not run.answered:
+                # Post the answer the first time anyone sees the run finished
+                run.answered = True
+                messages = self._threads.get(run.thread_id)
+                if messages is not None:
+                    messages.append(self._message(run.thread_id, "assistant", self._answer_text(run.question),
+                                                  run.assistant_id, run.id))
+        last_error = None
+        if status == "failed":
+            last_error = {"code": "server_error", "message": "Mock run failure"}
+        return {
+            "id": run.id, "object": "thread.run", "created_at": int(run.created_at),
+            "thread_id": run.thread_id, "assistant_id": run.assistant_id, "status": status,
+            "started_at": int(run.started_at) if now >= run.started_at else None,
+            "completed_at": int(run.finished_at) if status == "completed" else None,
+            "last_error": last_error, "model": "mock", "instructions": "", "tools": [],
+            "parallel_tool_calls": True,
+        }
+
+    def _steps(self, run: _MockRun) -> list:
+        if run.status(time.time()) != "completed":
+            return []
+        arguments = json.dumps({"query": self._sql(), "datasource": "lakehouse"})
+        output = json.dumps(self._result_rows())
+        return [{
+            "id": _new_id("step"), "object": "thread.run.step", "created_at": int(run.started_at),
+            "run_id": run.id, "assistant_id": run.assistant_id, "thread_id": run.thread_id,
+            "type": "tool_calls", "status": "completed",
+            "step_details": {"type": "tool_calls", "tool_calls": [{
+                "id": _new_id("call"), "type": "function",
+                "function": {"name": "lakehouse_query", "arguments": arguments, "output": output},
+            }]},
+            "cancelled_at": None, "completed_at": int(run.finished_at), "expired_at": None,
+            "failed_at": None, "last_error": None, "usage": None,
+        }]
+
+
+def _page(items: list) -> dict:
+    return {
+        "object": "list", "data": items, "has_more": False,
+        "first_id": items[0]["id"] if items else None,
+        "last_id": items[-1]["id"] if items else None,
+    }
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _send(self, status: int, body: dict, headers: Optional[dict] = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: int, message: str, code: str = "not_found"):
+        self._send(status, {"error": {"code": code, "message": message}})
+
+    def _handle(self, method: str):
+        mock = self.server.mock
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+        if mock.api_latency:
+            time.sleep(mock.api_latency)
+
+        injected = mock._inject()
+        if injected == 429:
+            return self._send(429, {"error": {"code": "TooManyRequests", "message": "Mock throttling"}},
+                              {"Retry-After": str(mock.retry_after)})
+        if injected == 500:
+            return self._error(500, "Mock server error", "InternalServerError")
+
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            self._route(mock, method, parts, query, body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _route(self, mock: MockFabricServer, method: str, parts: list, query: dict, body: dict):
+        if parts == ["assistants"] and method == "POST":
+            mock._count(method, "/assistants")
+            assistant_id = _new_id("asst")
+            with mock._lock:
+                mock._assistants.add(assistant_id)
+            return self._send(200, {"id": assistant_id, "object": "assistant", "created_at": int(time.time()),
+                                    "model": body.get("model", "mock"), "tools": [], "metadata": {}})
+
+        if parts == ["threads"] and method == "POST":
+            mock._count(method, "/threads")
+            thread_id = _new_id("thread")
+            with mock._lock:
+                mock._threads[thread_id] = []
+            return self._send(200, {"id": thread_id, "object": "thread", "created_at": int(time.time()),
+                                    "metadata": {}})
+
+        if not parts or parts[0] != "threads" or len(parts) < 2:
+            return self._error(404, f"No route for {method} /{'/'.join(parts)}")
+
+        thread_id = parts[1]
+        with mock._lock:
+            messages = mock._threads.get(thread_id)
+        if messages is None:
+            mock._count(method, "/threads/{id}" + "".join("/" + p for p in parts[2:3]))
+            return self._error(404, f"Thread {thread_id} not found")
+
+        if len(parts) == 2 and method == "DELETE":
+            mock._count(method, "/threads/{id}")
+            with mock._lock:
+                mock._threads.pop(thread_id, None)
+            return self._send(200, {"id": thread_id, "object": "thread.deleted", "deleted": True})
+
+        if parts[2:] == ["messages"]:
+            mock._count(method, "/threads/{id}/messages")
+            if method == "POST":
+                message = mock._message(thread_id, body.get("role", "user"), str(body.get("content", "")))
+                with mock._lock:
+                    messages.append(message)
+                return self._send(200, message)
+            # Make sure finished runs have posted their answers before listing
+            for run in [r for r in list(mock._runs.values()) if r.thread_id == thread_id]:
+                mock._run_object(run)
+            with mock._lock:
+                items = list(messages)
+            if query.get("order", "desc") == "desc":
+                items.reverse()
+            if "after" in query:
+                ids = [item["id"] for item in items]
+                if query["after"] in ids:
+                    items = items[ids.index(query["after"]) + 1:]
+            return self._send(200, _page(items[:int(query.get("limit", 20))]))
+
+        if parts[2] != "runs":
+            return self._error(404, f"No route for {method} /{'/'.join(parts)}")
+
+        if len(parts) == 3 and method == "POST":
+            mock._count(method, "/threads/{id}/runs")
+            if body.get("assistant_id") not in mock._assistants:
+                return self._error(404, "Assistant not found")
+            questions = [m for m in messages if m["role"] == "user"]
+            question = questions[-1]["content"][0]["text"]["value"] if questions else ""
+            with mock._lock:
+                fail = mock._random.random() < mock.run_failure_rate
+                run = _MockRun(_new_id("run"), thread_id, body["assistant_id"], question,
+                               mock._delay(mock.queue_delay), mock._delay(mock.run_delay), fail)
+                mock._runs[run.id] = run
+            if body.get("stream") and mock.streaming:
+                return self._stream(mock, run)
+            return self._send(200, mock._run_object(run))
+
+        run = mock._runs.get(parts[3]) if len(parts) >= 4 else None
+        if run is None:
+            mock._count(method, "/threads/{id}/runs/{id}")
+            return self._error(404, "Run not found")
+
+        if len(parts) == 4 and method == "GET":
+            mock._count(method, "/threads/{id}/runs/{id}")
+            return self._send(200, mock._run_object(run))
+
+        if parts[4:] == ["cancel"] and method == "POST":
+            mock._count(method, "/threads/{id}/runs/{id}/cancel")
+            if run.status(time.time()) in ("queued", "in_progress"):
+                run.cancelled = True
+            return self._send(200, mock._run_object(run))
+
+        if parts[4:] == ["steps"] and method == "GET":
+            mock._count(method, "/threads/{id}/runs/{id}/steps")
+            return self._send(200, _page(mock._steps(run)))
+
+        return self._error(404, f"No route for {method} /{'/'.join(parts)}")
+
+    def _stream(self, mock: MockFabricServer, run: _MockRun):
+        """
+        Answer a stream=True run with server-sent events, sending the answer in small deltas.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(name, data):
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+            self.wfile.flush()
+
+        event("thread.run.created", mock._run_object(run))
+        time.sleep(max(0.0, run.started_at - time.time()))
+        event("thread.run.in_progress", mock._run_object(run))
+
+        text = mock._answer_text(run.question)
+        chunks = [text[i:i + 32] for i in range(0, len(text), 32)]
+        pause = max(0.0, run.finished_at - time.time()) / max(len(chunks), 1)
+        message_id = _new_id("msg")
+        for chunk in chunks:
+            if run.cancelled:
+                break
+            time.sleep(pause)
+            event("thread.message.delta", {
+                "id": message_id, "object": "thread.message.delta",
+                "delta": {"content": [{"index": 0, "type": "text", "text": {"value": chunk}}]},
+            })
+
+        time.sleep(max(0.0, run.finished_at - time.time()))
+        final = mock._run_object(run)
+        event(f"thread.run.{final['status']}", final)
+        self.wfile.write(b"event: done\ndata: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def main():
+    """
+    Run the mock server from the command line.
+    """
+    parser = argparse.ArgumentParser(description="Local mock of the Fabric Data Agent Assistants API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--queue-delay", type=float, default=0.2, help="Seconds a run stays queued")
+    parser.add_argument("--run-delay", type=float, default=1.0, help="Seconds a run stays in progress")
+    parser.add_argument("--delay-jitter", type=float, default=0.0, help="Random extra fraction of each delay")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--run-failure-rate", type=float, default=0.0, help="Fraction of runs that fail")
+    parser.add_argument("--result-rows", type=int, default=20, help="JSON rows in each tool output")
+    parser.add_argument("--no-streaming", action="store_true", help="Ignore stream=True on run creation")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockFabricServer(
+        host=args.host, port=args.port, queue_delay=args.queue_delay, run_delay=args.run_delay,
+        delay_jitter=args.delay_jitter, api_latency=args.api_latency, throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after, error_rate=args.error_rate, run_failure_rate=args.run_failure_rate,
+        result_rows=args.result_rows, streaming=not args.no_streaming, seed=args.seed
+    )
+    print(f"🧪 Mock Fabric Data Agent listening on {server.url}")
+    print("   Use TokenProvider.static('mock') as the client's token_provider")
+    try:
+        server.start()
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\n⏹️ Stopping mock server")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Hedged and fan-out questions across several Fabric Data Agent endpoints.
+
+FabricMultiAgentClient wraps one FabricDataAgentClient per data agent URL.
+
+Hedging is for the same data agent published in more than one workspace.
+A question goes to the first endpoint; if it has not answered within that
+endpoint's hedge delay (by default the p95 of its recent answer times), a
+duplicate run is started on the next endpoint. The first successful answer
+wins and the other run is cancelled on the service. An endpoint that fails
+with a retryable error (throttled, unavailable, open circuit) fails over to
+the next one straight away, and endpoints whose circuit breaker is open are
+tried last.
+
+Fan-out is for different agents: fan_out() sends one question to every
+endpoint in parallel and returns all of their answers.
+
+Example:
+    multi = FabricMultiAgentClient.from_urls(tenant_id, [primary_url, secondary_url])
+    answer = multi.ask("What were sales yesterday?")
+
+    agents = FabricMultiAgentClient.from_urls(tenant_id, [sales_url, finance_url])
+    for result in agents.fan_out("What was revenue last quarter?"):
+        print(result["data_agent_url"], result["answer"])
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
+
+from fabric_data_agent_client import AsyncFabricDataAgentClient, FabricDataAgentClient, cancellation_scope
+from fabric_retry import FabricError, FabricTimeoutError, fabric_error
+from fabric_scheduler import _percentile
+
+# Recent answer times kept per endpoint for the hedge delay
+LATENCY_SAMPLES = 200
+
+
+class _Endpoint:
+    """
+    One data agent endpoint and its recent answer times.
+    """
+
+    __slots__ = ("client", "latencies", "counters")
+
+    def __init__(self, client):
+        self.client = client
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.counters = {"started": 0, "answered": 0, "failed": 0, "cancelled": 0}
+
+
+class FabricMultiAgentClient:
+    """
+    Asks questions across several FabricDataAgentClients, hedged or fanned out.
+    """
+
+    client_class = FabricDataAgentClient
+
+    def __init__(self, clients, hedge_percentile: float = 95.0, hedge_after: Optional[float] = None,
+                 initial_hedge_delay: float = 30.0, min_samples: int = 20, max_workers: int = 16,
+                 raise_errors: bool = False):
+        """
+        Initialize the multi-endpoint client.
+
+        Args:
+            clients (list): One client per data agent URL, in order of preference
+            hedge_percentile (float): Percentile of an endpoint's recent answer times
+                after which a hedged duplicate is started
+            hedge_after (float): Fixed hedge delay in seconds instead of the percentile,
+                or None
+            initial_hedge_delay (float): Hedge delay until an endpoint has min_samples answers
+            min_samples (int): Answers needed before the percentile is trusted
+            max_workers (int): Threads running questions on the endpoints
+            raise_errors (bool): Raise FabricError subclasses instead of returning error text
+        """
+        if not clients:
+            raise ValueError("At least one client is required")
+        if not 0 < hedge_percentile <= 100:
+            raise ValueError("hedge_percentile must be in (0, 100]")
+
+        self.endpoints = [_Endpoint(client) for client in clients]
+        self.hedge_percentile = hedge_percentile
+        self.hedge_after = hedge_after
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_samples = min_samples
+        self.raise_errors = raise_errors
+        self._lock = threading.Lock()
+        self._counters = {"questions": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0, "failed": 0}
+        self._executor = self._make_executor(max_workers)
+
+    def _make_executor(self, max_workers: int):
+        return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fabric-multi-agent")
+
+    @classmethod
+    def from_urls(cls, tenant_id: str, data_agent_urls, client_kwargs: Optional[dict] = None, **kwargs):
+        """
+        Create one client per data agent URL, all sharing the process's token provider.
+
+        Args:
+            tenant_id (str): Azure tenant ID
+            data_agent_urls (list): Published data agent URLs, in order of preference
+            client_kwargs (dict): Extra arguments for every client, e.g. answer_cache
+            **kwargs: Arguments for the multi-endpoint client, e.g. hedge_after
+
+        Returns:
+            FabricMultiAgentClient: The multi-endpoint client
+        """
+        clients = [cls.client_class(tenant_id, url, **(client_kwargs or {})) for url in data_agent_urls]
+        return cls(clients, **kwargs)
+
+    @property
+    def clients(self) -> list:
+        return [endpoint.client for endpoint in self.endpoints]
+
+    def hedge_delay(self, index: int) -> float:
+        """
+        Return how long to wait for an endpoint before starting a hedged duplicate.
+
+        Args:
+            index (int): Position of the endpoint
+
+        Returns:
+            float: hedge_after if set, else the hedge percentile of the endpoint's
+                recent answer times (initial_hedge_delay until there are enough)
+        """
+        if self.hedge_after is not None:
+            return self.hedge_after
+        with self._lock:
+            latencies = list(self.endpoints[index].latencies)
+        if len(latencies) < self.min_samples:
+            return self.initial_hedge_delay
+        return _percentile(latencies, self.hedge_percentile)
+
+    def _endpoint_order(self) -> list:
+        # Endpoints with an open circuit would fail fast; try them last
+        healthy, tripped = [], []
+        for index, endpoint in enumerate(self.endpoints):
+            breaker = getattr(endpoint.client, "circuit_breaker", None)
+            (tripped if breaker is not None and breaker.state == breaker.OPEN else healthy).append(index)
+        return healthy + tripped
+
+    def _count(self, name: str, index: Optional[int] = None):
+        with self._lock:
+            if index is None:
+                self._counters[name] += 1
+            else:
+                self.endpoints[index].counters[name] += 1
+
+    def _finished(self, index: int, elapsed: float, hedged_win: bool):
+        endpoint = self.endpoints[index]
+        with self._lock:
+            endpoint.latencies.append(elapsed)
+            endpoint.counters["answered"] += 1
+            if hedged_win:
+                self._counters["hedge_wins"] += 1
+
+    def _failed(self, error: Exception) -> FabricError:
+        self._count("failed")
+        failure = fabric_error(error)
+        if failure is not error:
+            failure.__cause__ = error
+        if not isinstance(failure, FabricTimeoutError):
+            print(f"❌ Error calling data agents: {failure}")
+        return failure
+
+    def _run_on(self, index: int, kind: str, question: str, timeout: float, use_cache: bool,
+                event: threading.Event):
+        client = self.endpoints[index].client
+        method = client._ask if kind == "ask" else client._get_run_details
+        started = time.monotonic()
+        with cancellation_scope(event):
+            result = method(question, timeout, use_cache)
+        return result, time.monotonic() - started
+
+    def _hedged(self, kind: str, question: str, timeout: float, use_cache: bool):
+        """
+        Run a question on the preferred endpoint, hedging and failing over to the others.
+
+        Args:
+            kind (str): "ask" or "run_details"
+            question (str): The question
+            timeout (float): End-to-end budget shared by every attempt
+            use_cache (bool): Use the clients' answer caches
+
+        Returns:
+            The first successful result
+
+        Raises:
+            Exception: The last endpoint's error if none succeeded
+        """
+        self._count("questions")
+        started = time.monotonic()
+        order = self._endpoint_order()
+        first = order[0]
+        running = {}
+        last_error = None
+        next_hedge_at = None
+
+        def launch():
+            index = order.pop(0)
+            remaining = timeout - (time.monotonic() - started)
+            event = threading.Event()
+            self._count("started", index)
+            future = self._executor.submit(
+                contextvars.copy_context().run, self._run_on, index, kind, question, remaining, use_cache, event
+            )
+            running[future] = (index, event)
+            return time.monotonic() + self.hedge_delay(index)
+
+        try:
+            next_hedge_at = launch()
+            while running:
+                wait_for = max(0.0, next_hedge_at - time.monotonic()) if order else None
+                done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+                if not done:
+                    if time.monotonic() - started < timeout:
+                        print(f"🪁 No answer after {time.monotonic() - started:.1f}s, "
+                              f"hedging on {self.endpoints[order[0]].client.data_agent_url}")
+                        self._count("hedged")
+                        next_hedge_at = launch()
+                    else:
+                        order.clear()
+                    continue
+                for future in done:
+                    index, _ = running.pop(future)
+                    try:
+                        result, elapsed = future.result()
+                    except Exception as e:
+                        self._count("failed", index)
+                        last_error = e
+                        continue
+                    self._finished(index, elapsed, index != first)
+                    return result
+                # Fail over at once if nothing else is running and the error may pass elsewhere
+                if not running and order and fabric_error(last_error).retryable \
+                        and time.monotonic() - started < timeout:
+                    print(f"🔀 Failing over to {self.endpoints[order[0]].client.data_agent_url}")
+                    self._count("failovers")
+                    next_hedge_at = launch()
+        finally:
+            # Cancel the losers; their runs are cancelled on the service
+            for index, event in running.values():
+                self._count("cancelled", index)
+                event.set()
+        raise last_error
+
+    def ask(self, question: str, timeout: int = 120, use_cache: bool = True) -> str:
+        """
+        Ask a question, hedging across the endpoints.
+
+        Args:
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for the question in seconds, shared
+                by the original and any hedged runs
+            use_cache (bool): Use the clients' answer caches
+
+        Returns:
+            str: The first successful answer, or a "Timeout: ..." / "Error: ..." message
+        """
+        if not question.strip():
+            raise ValueError("Question cannot be empty")
+
+        print(f"\n❓ Asking {len(self.endpoints)} endpoints: {question}")
+
+        try:
+            return self._hedged("ask", question, timeout, use_cache)
+        except Exception as e:
+            error = self._failed(e)
+            if self.raise_errors:
+                raise error
+            if isinstance(error, FabricTimeoutError):
+                return f"Timeout: {error}"
+            return f"Error: {error}"
+
+    def get_run_details(self, question: str, timeout: int = 120, use_cache: bool = True):
+        """
+        Get detailed run information for a question, hedging across the endpoints.
+
+        Returns:
+            RunDetails: As FabricDataAgentClient.get_run_details(), from the first
+                endpoint that succeeded, or an error dict
+        """
+        print(f"\n🔍 Getting detailed run info from {len(self.endpoints)} endpoints: {question}")
+
+        try:
+            return self._hedged("run_details", question, timeout, use_cache)
+        except Exception as e:
+            error = self._failed(e)
+            if self.raise_errors:
+                raise error
+            return self.endpoints[0].client._run_details_error(question, error)
+
+    def _fan_out_result(self, index: int, started: float, answer=None, error: Optional[Exception] = None) -> dict:
+        failure = None if error is None else fabric_error(error)
+        return {
+            "index": index,
+            "data_agent_url": self.endpoints[index].client.data_agent_url,
+            "answer": answer,
+            "error": None if failure is None else str(failure),
+            "error_type": None if failure is None else failure.kind,
+            "timed_out": isinstance(failure, FabricTimeoutError),
+            "elapsed": time.monotonic() - started
+        }
+
+    def _fan_out_one(self, index: int, question: str, timeout: int, use_cache: bool) -> dict:
+        started = time.monotonic()
+        self._count("started", index)
+        try:
+            answer = self.endpoints[index].client._ask(question, timeout, use_cache)
+        except Exception as e:
+            self._count("failed", index)
+            return self._fan_out_result(index, started, error=e)
+        self._finished(index, time.monotonic() - started, False)
+        return self._fan_out_result(index, started, answer)
+
+    def fan_out(self, question: str, timeout: int = 120, use_cache: bool = True) -> list:
+        """
+        Send one question to every endpoint in parallel and return all the answers.
+
+        Args:
+            question (str): The question to ask
+            timeout (int): Maximum end-to-end time for each endpoint in seconds
+            use_cache (bool): Use the clients' answer caches
+
+        Returns:
+            list: One dict per endpoint, in endpoint order, with index, data_agent_url,
+                answer, error, error_type, timed_out and elapsed seconds
+        """
+        if not question.strip():
+            raise ValueError("Question cannot be empty")
+
+        print(f"\n📣 Fanning out to {len(self.endpoints)} agents: {question}")
+        futures = [
+            self._executor.submit(contextvars.copy_context().run, self._fan_out_one, index, question,
+                                  timeout, use_cache)
+            for index in range(len(self.endpoints))
+        ]
+        return [future.result() for future in futures]
+
+    def stats(self) -> dict:
+        """
+        Return hedging counters and per-endpoint answer times.
+
+        Returns:
+            dict: questions, hedged, hedge_wins, failovers and failed, plus per endpoint
+                the data_agent_url, started/answered/failed/cancelled counts, p50 and p95
+                answer times and the current hedge delay
+        """
+        endpoints = []
+        for index, endpoint in enumerate(self.endpoints):
+            with self._lock:
+                latencies = list(endpoint.latencies)
+                counters = dict(endpoint.counters)
+            endpoints.append({
+                "data_agent_url": endpoint.client.data_agent_url,
+                **counters,
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "hedge_delay": self.hedge_delay(index)
+            })
+        with self._lock:
+            return {**self._counters, "endpoints": endpoints}
+
+    def close(self):
+        """
+        Stop the worker threads and close every client.
+        """
+        self._executor.shutdown(wait=True)
+        for endpoint in self.endpoints:
+            endpoint.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class AsyncFabricMultiAgentClient(FabricMultiAgentClient):
+    """
+    asyncio variant of FabricMultiAgentClient for AsyncFabricDataAgentClients.
+
+    Takes the same arguments; max_workers is unused since questions run as tasks.
+    """
+
+    client_class = AsyncFabricDataAgentClient
+
+    def _make_executor(self, max_workers: int):
+        self._background = set()
+        return None
+
+    async def _run_on(self, index: int, kind: str, question: str, timeout: float, use_cache: bool,
+                      event: threading.Event):
+        client = self.endpoints[index].client
+        method = client._ask if kind == "ask" else client._get_run_details
+        started = time.monotonic()
+        # Each task runs in its own copy of the context, so the scope covers only this run
+        with cancellation_scope(event):
+            result = await method(question, timeout, use_cache)
+        return result, time.monotonic() - started
+
+    def _let_finish(self, task: asyncio.Task):
+        # Keep cancelled losers referenced until they have cancelled their run
+        self._background.add(task)
+        task.add_done_callback(lambda done: self._background.discard(done) or done.cancelled() or done.exception())
+
+    async def _hedged(self, kind: str, question: str, timeout: float, use_cache: bool):
+        """
+        Run a question on the preferred endpoint, hedging and failing over to the others.
+
+        See FabricMultiAgentClient._hedged().
+        """
+        self._count("questions")
+        started = time.monotonic()
+        order = self._endpoint_order()
+        first = order[0]
+        running = {}
+        last_error = None
+        next_hedge_at = None
+
+        def launch():
+            index = order.pop(0)
+            remaining = timeout - (time.monotonic() - started)
+            event = threading.Event()
+            self._count("started", index)
+            task = asyncio.create_task(self._run_on(index, kind, question, remaining, use_cache, event))
+            running[task] = (index, event)
+            return time.monotonic() + self.hedge_delay(index)
+
+        try:
+            next_hedge_at = launch()
+            while running:
+                wait_for = max(0.0, next_hedge_at - time.monotonic()) if order else None
+                done, _ = await asyncio.wait(running, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if time.monotonic() - started < timeout:
+                        print(f"🪁 No answer after {time.monotonic() - started:.1f}s, "
+                              f"hedging on {self.endpoints[order[0]].client.data_agent_url}")
+                        self._count("hedged")
+                        next_hedge_at = launch()
+                    else:
+                        order.clear()
+                    continue
+                for task in done:
+                    index, _ = running.pop(task)
+                    try:
+                        result, elapsed = task.result()
+                    except Exception as e:
+                        self._count("failed", index)
+                        last_error = e
+                        continue
+                    self._finished(index, elapsed, index != first)
+                    return result
+                if not running and order and fabric_error(last_error).retryable \
+                        and time.monotonic() - started < timeout:
+                    print(f"🔀 Failing over to {self.endpoints[order[0]].client.data_agent_url}")
+                    self._count("failovers")
+                    next_hedge_at = launch()
+        finally:
+            for task, (index, event) in running.items():
+                self._count("cancelled", index)
+                event.set()
+                self._let_finish(task)
+        raise last_error
+
+    async def ask(self, question: str, timeout: int = 120, use_cache: bool = True) -> str:
+        """
+        Ask a question, hedging across the endpoints; see FabricMultiAgentClient.ask().
+        """
+        if not question.strip():
+            raise ValueError("Question cannot be empty")
+
+        print(f"\n❓ Asking {len(self.endpoints)} endpoints: {question}")
+
+        try:
+            return await self._hedged("ask", question, timeout, use_cache)
+        except Exception as e:
+            error = self._failed(e)
+            if self.raise_errors:
+                raise error
+            if isinstance(error, FabricTimeoutError):
+                return f"Timeout: {error}"
+            return f"Error: {error}"
+
+    async def get_run_details(self, question: str, timeout: int = 120, use_cache: bool = True):
+        """
+        Get detailed run information, hedging across the endpoints; see
+        FabricMultiAgentClient.get_run_details().
+        """
+        print(f"\n🔍 Getting detailed run info from {len(self.endpoints)} endpoints: {question}")
+
+        try:
+            return await self._hedged("run_details", question, timeout, use_cache)
+        except Exception as e:
+            error = self._failed(e)
+            if self.raise_errors:
+                raise error
+            return self.endpoints[0].client._run_details_error(question, error)
+
+    async def _fan_out_one(self, index: int, question: str, timeout: int, use_cache: bool) -> dict:
+        started = time.monotonic()
+        self._count("started", index)
+        try:
+            answer = await self.endpoints[index].client._ask(question, timeout, use_cache)
+        except Exception as e:
+            self._count("failed", index)
+            return self._fan_out_result(index, started, error=e)
+        self._finished(index, time.monotonic() - started, False)
+        return self._fan_out_result(index, started, answer)
+
+    async def fan_out(self, question: str, timeout: int = 120, use_cache: bool = True) -> list:
+        """
+        Send one question to every endpoint concurrently; see FabricMultiAgentClient.fan_out().
+        """
+        if not question.strip():
+            raise ValueError("Question cannot be empty")
+
+        print(f"\n📣 Fanning out to {len(self.endpoints)} agents: {question}")
+        return list(await asyncio.gather(*(
+            self._fan_out_one(index, question, timeout, use_cache) for index in range(len(self.endpoints))
+        )))
+
+    async def close(self):
+        """
+        Wait for cancelled runs to wind down and close every client.
+        """
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        for endpoint in self.endpoints:
+            await endpoint.client.close()
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' with AsyncFabricMultiAgentClient")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Client-side rate limiting for Fabric Data Agent calls, shared across processes.
+
+Several gunicorn workers and cron jobs calling one capacity-limited data agent
+each see only their own traffic and together overshoot it. RateLimiter keeps
+a token bucket per API phase (by default one for run creation and one for
+status polls) in a SQLite file, so every process on the host that opens the
+same file draws from the same budget. Without a path the buckets live in
+memory and are shared by the clients of one process.
+
+A call that finds its bucket empty takes a token on credit and sleeps until
+the bucket has refilled, so waiting callers are served in order. In
+fail-fast mode, or when the wait would exceed max_wait or the question's
+deadline, FabricRateLimitedError is raised instead without using the budget.
+A wait can be cut short by the question's cancel event: the token is given
+back and FabricCancelledError is raised.
+
+Example:
+    limiter = RateLimiter(path="/var/run/fabric-rate.db",
+                          budgets={"run_create": (0.5, 5), "run_poll": (4.0, 8)})
+    client = FabricDataAgentClient(tenant_id, url, rate_limiter=limiter)
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from fabric_retry import FabricCancelledError, FabricRateLimitedError
+
+# Phase -> (tokens per second, burst size); phases without a budget are not limited
+DEFAULT_BUDGETS = {
+    "run_create": (1.0, 5),
+    "run_poll": (10.0, 20)
+}
+
+
+class RateLimiter:
+    """
+    Token buckets per API phase, optionally shared by all processes using one SQLite file.
+    """
+
+    def __init__(self, budgets: Optional[dict] = None, path: Optional[str] = None,
+                 namespace: str = "fabric", fail_fast: bool = False, max_wait: float = 60.0):
+        """
+        Initialize the limiter.
+
+        Args:
+            budgets (dict): Phase name -> (tokens per second, burst), defaults to DEFAULT_BUDGETS
+            path (str): SQLite file holding the shared buckets, or None for this process only
+            namespace (str): Prefix of the bucket keys, so limiters for different
+                capacities can share one file
+            fail_fast (bool): Raise FabricRateLimitedError instead of waiting for a token
+            max_wait (float): Longest wait for a token in seconds before raising
+        """
+        budgets = DEFAULT_BUDGETS if budgets is None else budgets
+        for phase, (rate, burst) in budgets.items():
+            if rate <= 0 or burst < 1:
+                raise ValueError(f"Budget for {phase} needs a positive rate and a burst of at least 1")
+        self.budgets = {phase: (float(rate), float(burst)) for phase, (rate, burst) in budgets.items()}
+        self.path = path
+        self.namespace = namespace
+        self.fail_fast = fail_fast
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._db = None
+        self._pid = None
+        self._counters = {phase: {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "rejected": 0}
+                          for phase in self.budgets}
+
+    def _connection(self) -> sqlite3.Connection:
+        # A connection inherited across fork() must not be used; reconnect in the child
+        if self._db is None or self._pid != os.getpid():
+            db = sqlite3.connect(self.path or ":memory:", timeout=30.0,
+                                 isolation_level=None, check_same_thread=False)
+            if self.path:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._db, self._pid = db, os.getpid()
+        return self._db
+
+    def limits(self, phase: str) -> bool:
+        """
+        Return True if calls in this phase have a budget.
+        """
+        return phase in self.budgets
+
+    def reserve(self, phase: str, max_wait: float) -> tuple:
+        """
+        Take one token from the phase's bucket if it can be had within max_wait.
+
+        The bucket may go below zero; the caller then owes the wait returned.
+
+        Args:
+            phase (str): API phase, e.g. "run_create"
+            max_wait (float): Longest acceptable wait in seconds
+
+        Returns:
+            tuple: (granted, wait) - whether a token was taken and the seconds until
+                it is available (for a refused call, how long it would have waited)
+        """
+        rate, burst = self.budgets[phase]
+        key = f"{self.namespace}:{phase}"
+        with self._lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = db.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens = burst if row is None else min(burst, row[0] + max(0.0, now - row[1]) * rate)
+                wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+                if wait > max_wait:
+                    db.execute("ROLLBACK")
+                    return False, wait
+                db.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    (key, tokens - 1, now)
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return True, wait
+
+    def release(self, phase: str):
+        """
+        Give back a token taken by reserve() for a call that was not made.
+
+        Args:
+            phase (str): API phase the token was taken from
+        """
+        with self._lock:
+            self._connection().execute(
+                "UPDATE buckets SET tokens = tokens + 1 WHERE key = ?", (f"{self.namespace}:{phase}",)
+            )
+
+    def _cancelled(self, phase: str) -> FabricCancelledError:
+        self.release(phase)
+        return FabricCancelledError(f"Request cancelled while waiting for a {phase} rate limit slot")
+
+    def _max_wait(self, remaining: Optional[float]) -> float:
+        if self.fail_fast:
+            return 0.0
+        if remaining is None:
+            return self.max_wait
+        return max(0.0, min(self.max_wait, remaining))
+
+    def _granted(self, phase: str, granted: bool, wait: float) -> float:
+        counters = self._counters[phase]
+        with self._lock:
+            if not granted:
+                counters["rejected"] += 1
+            else:
+                counters["acquired"] += 1
+                if wait > 0:
+                    counters["waited"] += 1
+                    counters["wait_seconds"] += wait
+        if not granted:
+            raise FabricRateLimitedError(
+                f"Client-side rate limit for {phase} reached; next slot in {wait:.1f}s",
+                retry_after=wait
+            )
+        return wait
+
+    def acquire(self, phase: str, remaining: Optional[float] = None,
+                cancel_event: Optional[threading.Event] = None) -> float:
+        """
+        Wait for a token in the phase's bucket.
+
+        Args:
+            phase (str): API phase, e.g. "run_poll"
+            remaining (float): Seconds left in the caller's deadline, if any
+            cancel_event (threading.Event): The question's cancel event, if any;
+                setting it ends the wait
+
+        Returns:
+            float: Seconds spent waiting (0.0 for phases without a budget)
+
+        Raises:
+            FabricRateLimitedError: In fail-fast mode, or if the wait would exceed
+                max_wait or the deadline
+            FabricCancelledError: If cancel_event is set while waiting
+        """
+        if phase not in self.budgets:
+            return 0.0
+        granted, wait = self.reserve(phase, self._max_wait(remaining))
+        wait = self._granted(phase, granted, wait)
+        if wait > 0:
+            if cancel_event is None:
+                time.sleep(wait)
+            elif cancel_event.wait(wait):
+                raise self._cancelled(phase)
+        return wait
+
+    async def acquire_async(self, phase: str, remaining: Optional[float] = None,
+                            cancel_event: Optional[threading.Event] = None) -> float:
+        """
+        Wait for a token without blocking the event loop; see acquire().
+        """
+        if phase not in self.budgets:
+            return 0.0
+        # The SQLite lock may be held by another process, so reserve off the loop
+        granted, wait = await asyncio.to_thread(self.reserve, phase, self._max_wait(remaining))
+        wait = self._granted(phase, granted, wait)
+        if wait > 0:
+            if cancel_event is None:
+                await asyncio.sleep(wait)
+                return wait
+            # A threading.Event cannot be awaited; check it between short sleeps
+            wake_at = time.monotonic() + wait
+            while time.monotonic() < wake_at:
+                if cancel_event.is_set():
+                    raise self._cancelled(phase)
+                await asyncio.sleep(min(0.1, wake_at - time.monotonic()))
+        return wait
+
+    def stats(self) -> dict:
+        """
+        Return this process's counters and the shared token level per phase.
+
+        Returns:
+            dict: Phase -> rate, burst, tokens, acquired, waited, wait_seconds and rejected
+        """
+        stats = {}
+        with self._lock:
+            db = self._connection()
+            now = time.time()
+            for phase, (rate, burst) in self.budgets.items():
+                row = db.execute(
+                    "SELECT tokens, updated FROM buckets WHERE key = ?", (f"{self.namespace}:{phase}",)
+                ).fetchone()
+                tokens = burst if row is None else min(burst, row[0] + max(0.0, now - row[1]) * rate)
+                stats[phase] = {"rate": rate, "burst": burst, "tokens": tokens, **self._counters[phase]}
+        return stats
+
+    def close(self):
+        """
+        Close this process's connection to the bucket store.
+        """
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = None
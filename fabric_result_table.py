@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Columnar query results for the Fabric Data Agent client.
+
+Tool call outputs carry the full result set of the agent's queries as JSON
+rows. ResultTable holds every row column by column, built straight from the
+parsed JSON values, and converts to a pyarrow Table or a dict of NumPy arrays
+on request. Markdown is just one view on top (the 10-row previews printed by
+get_run_details()).
+
+Optional dependencies:
+- numpy (for ResultTable.to_numpy)
+- pyarrow (for ResultTable.to_arrow)
+"""
+
+import json
+from typing import Optional
+
+
+class ResultTable:
+    """
+    A query result set stored as columns of plain Python values.
+    """
+
+    def __init__(self, columns: dict, num_rows: int):
+        """
+        Initialize the table.
+
+        Args:
+            columns (dict): Column name -> list of values, all of length num_rows
+            num_rows (int): Number of rows
+        """
+        self.columns = columns
+        self.num_rows = num_rows
+
+    @classmethod
+    def from_records(cls, records) -> "ResultTable":
+        """
+        Build a table from JSON records in a single pass.
+
+        Columns are the union of the record keys in first-seen order; a key
+        missing from a record becomes None in that row.
+
+        Args:
+            records (list): List of dicts, e.g. a parsed query result
+
+        Returns:
+            ResultTable: The table
+        """
+        columns = {}
+        num_rows = 0
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            for key, value in record.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = [None] * num_rows
+                column.append(value)
+            num_rows += 1
+            for column in columns.values():
+                if len(column) < num_rows:
+                    column.append(None)
+        return cls(columns, num_rows)
+
+    @property
+    def column_names(self) -> list:
+        return list(self.columns)
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __repr__(self) -> str:
+        return f"ResultTable(columns={self.column_names}, num_rows={self.num_rows})"
+
+    def to_pylist(self) -> list:
+        """
+        Return the rows as a list of dicts.
+        """
+        names = self.column_names
+        return [dict(zip(names, row)) for row in zip(*self.columns.values())]
+
+    def to_numpy(self) -> dict:
+        """
+        Return the columns as NumPy arrays with inferred dtypes.
+
+        Booleans become bool, integers int64, numbers with gaps float64 with NaN;
+        anything else (text, mixed, nested values) is an object array.
+
+        Returns:
+            dict: Column name -> numpy.ndarray
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("to_numpy() requires numpy: pip install numpy")
+        return {name: _numpy_column(np, values) for name, values in self.columns.items()}
+
+    def to_arrow(self):
+        """
+        Return the table as a pyarrow Table with inferred column types.
+
+        Columns pyarrow cannot type (mixed values) fall back to strings.
+
+        Returns:
+            pyarrow.Table: The table
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("to_arrow() requires pyarrow: pip install pyarrow")
+        arrays = []
+        for values in self.columns.values():
+            try:
+                arrays.append(pa.array(values))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                arrays.append(pa.array([None if v is None else str(v) for v in values], type=pa.string()))
+        return pa.Table.from_arrays(arrays, names=self.column_names)
+
+    def markdown_lines(self, max_rows: Optional[int] = 10) -> list:
+        """
+        Render the table as markdown lines (header, separator, rows).
+
+        Args:
+            max_rows (int): Maximum number of rows to render, None for all
+
+        Returns:
+            list: Markdown table lines
+        """
+        if not self.columns:
+            return []
+        names = self.column_names
+        lines = ["| " + " | ".join(str(name) for name in names) + " |", "|" + "---|" * len(names)]
+        rows = zip(*self.columns.values())
+        for index, row in enumerate(rows):
+            if max_rows is not None and index >= max_rows:
+                break
+            lines.append("| " + " | ".join("" if v is None else str(v) for v in row) + " |")
+        return lines
+
+    def to_markdown(self, max_rows: Optional[int] = 10) -> str:
+        """
+        Render the table as a markdown string.
+
+        Args:
+            max_rows (int): Maximum number of rows to render, None for all
+
+        Returns:
+            str: The markdown table
+        """
+        return "\n".join(self.markdown_lines(max_rows))
+
+
+def _numpy_column(np, values: list):
+    kinds = {type(v) for v in values if v is not None}
+    complete = len(kinds) > 0 and None not in values
+    if complete and kinds == {bool}:
+        return np.array(values, dtype=bool)
+    if complete and kinds == {int}:
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            return np.array(values, dtype=object)
+    if kinds and kinds <= {int, float}:
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def parse_tool_output(output) -> Optional[ResultTable]:
+    """
+    Parse a tool call output into a table.
+
+    Accepts a JSON list of records, an object wrapping one under "data" or
+    "results", or a single record (a one-row table).
+
+    Args:
+        output: The tool output, as a JSON string or already-parsed value
+
+    Returns:
+        ResultTable: The table, or None if the output holds no records
+    """
+    data = output
+    if isinstance(output, (str, bytes)):
+        try:
+            data = json.loads(output)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+
+    if isinstance(data, dict):
+        for key in ("data", "results"):
+            if isinstance(data.get(key), list):
+                data = data[key]
+                break
+        else:
+            data = [data]
+
+    if not isinstance(data, list) or not data or not isinstance(data[0], dict):
+        return None
+    return ResultTable.from_records(data)
+
+
+def _field(obj, name: str):
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def tool_outputs(steps):
+    """
+    Yield the output of every tool call in a run's steps.
+
+    Args:
+        steps: The run steps page from the OpenAI API, or its model_dump() dict
+
+    Yields:
+        The raw tool output (usually a JSON string)
+    """
+    for step in _field(steps, "data") or []:
+        details = _field(step, "step_details")
+        for tool_call in _field(details, "tool_calls") or []:
+            # Fabric puts the output on the tool call or on its function
+            output = _field(tool_call, "output") or _field(_field(tool_call, "function"), "output")
+            if output:
+                yield output
+
+
+def tables_from_steps(steps) -> list:
+    """
+    Extract the full result set of every tool call that returned records.
+
+    Args:
+        steps: The run steps page from the OpenAI API, or its model_dump() dict
+
+    Returns:
+        list: ResultTable per tool output with tabular data, in step order
+    """
+    tables = []
+    for output in tool_outputs(steps):
+        table = parse_tool_output(output)
+        if table is not None:
+            tables.append(table)
+    return tables
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Retries, circuit breaking and structured errors for the Fabric Data Agent client.
+
+RetryPolicy decides whether a failed API call is repeated and how long to wait
+first. A throttled call (HTTP 429) was not processed by the service, so it is
+retried for any operation once the Retry-After the service asked for has
+passed. Server errors, dropped connections and request timeouts are retried
+only for idempotent operations (status polls, message and step lists, run
+cancel) with capped exponential backoff and full jitter; creating a thread,
+message or run is never repeated after an ambiguous failure.
+
+CircuitBreaker counts consecutive failed calls. After too many it opens and
+calls fail fast with FabricCircuitOpenError instead of adding load to an
+unhealthy data agent; after a cool-down one probe call is let through, and
+its outcome closes or re-opens the circuit. A probe that never reports back
+(its caller died mid-call) is given up after probe_timeout, so the next call
+becomes the probe.
+
+Errors reaching callers are translated into FabricError subclasses, so
+throttling, timeouts, outages and permanent failures can be told apart:
+
+    FabricError
+    ├── FabricThrottledError    HTTP 429 after retries, retry_after set
+    │   └── FabricRateLimitedError  refused by the client-side RateLimiter
+    ├── FabricUnavailableError  5xx or connection failures after retries
+    │   └── FabricCircuitOpenError
+    ├── FabricTimeoutError      the question's deadline expired (also a TimeoutError)
+    │   └── FabricCancelledError    the caller cancelled it, e.g. a losing hedged request
+    └── FabricPermanentError    other 4xx: bad request, auth, not found
+
+Example:
+    client = FabricDataAgentClient(tenant_id, url, raise_errors=True,
+                                   retry_policy=RetryPolicy(max_attempts=5))
+    try:
+        answer = client.ask(question)
+    except FabricThrottledError as e:
+        schedule_later(question, e.retry_after)
+"""
+
+import email.utils
+import random
+import sys
+import threading
+import time
+from typing import Optional
+
+# Statuses worth retrying for idempotent calls; 429 is handled separately
+TRANSIENT_STATUS_CODES = frozenset({408, 500, 502, 503, 504})
+
+
+class FabricError(Exception):
+    """
+    Base class for errors raised by the Fabric Data Agent client.
+
+    Attributes:
+        kind (str): Short category name, also used as the metrics outcome
+        retryable (bool): Whether asking again later may succeed
+        status_code (int): HTTP status of the failed call, if any
+        retry_after (float): Seconds the service asked callers to wait, if known
+    """
+
+    kind = "error"
+    retryable = False
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class FabricThrottledError(FabricError):
+    """
+    The data agent kept throttling the call (HTTP 429) after every retry.
+    """
+
+    kind = "throttled"
+    retryable = True
+
+
+class FabricRateLimitedError(FabricThrottledError):
+    """
+    The call was not sent because the client-side rate limit budget is used up.
+    """
+
+    kind = "rate_limited"
+
+
+class FabricUnavailableError(FabricError):
+    """
+    The data agent kept failing with server or connection errors.
+    """
+
+    kind = "unavailable"
+    retryable = True
+
+
+class FabricCircuitOpenError(FabricUnavailableError):
+    """
+    The call was not sent because the circuit breaker is open.
+    """
+
+    kind = "circuit_open"
+
+
+class FabricPermanentError(FabricError):
+    """
+    The service rejected the call in a way retrying will not fix (400, 401, 403, 404, ...).
+    """
+
+    kind = "permanent"
+
+
+class FabricTimeoutError(FabricError, TimeoutError):
+    """
+    Raised when a question does not finish within its deadline.
+
+    Carries the thread and run involved and the run status reported after the
+    client asked the service to cancel the run.
+    """
+
+    kind = "timeout"
+    retryable = True
+
+    def __init__(self, message: str, thread_id: Optional[str] = None,
+                 run_id: Optional[str] = None, run_status: Optional[str] = None):
+        super().__init__(message)
+        self.thread_id = thread_id
+        self.run_id = run_id
+        self.run_status = run_status
+
+
+class FabricCancelledError(FabricTimeoutError):
+    """
+    Raised when a question is cancelled through its cancellation scope before it finishes.
+    """
+
+    kind = "cancelled"
+    retryable = False
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Read the wait the service asked for from a failed call's response headers.
+
+    Understands retry-after-ms, x-ms-retry-after-ms and retry-after (seconds or
+    an HTTP date).
+
+    Args:
+        error (BaseException): An openai APIStatusError or similar with a response
+
+    Returns:
+        float: Seconds to wait, or None if the response did not say
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    for name in ("retry-after-ms", "x-ms-retry-after-ms"):
+        try:
+            return max(0.0, float(headers.get(name)) / 1000)
+        except (TypeError, ValueError):
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(parsed) - time.time())
+
+
+def _is_sdk_error(error: BaseException, module: str, name: str) -> bool:
+    # Checked without importing the SDK: if it was never imported, it raised nothing
+    sdk = sys.modules.get(module)
+    return sdk is not None and isinstance(error, getattr(sdk, name))
+
+
+def _is_connection_error(error: BaseException) -> bool:
+    return _is_sdk_error(error, "openai", "APIConnectionError") or _is_sdk_error(error, "httpx", "TransportError")
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Return True if an API call failure says the service is overloaded or unhealthy.
+
+    Throttling, 408/5xx responses, dropped connections and request timeouts
+    count; permanent 4xx errors and client-side errors do not.
+    """
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status in TRANSIENT_STATUS_CODES or status >= 500
+    return _is_connection_error(error)
+
+
+def fabric_error(error: BaseException) -> FabricError:
+    """
+    Translate an exception from the OpenAI SDK or httpx into a FabricError.
+
+    FabricErrors are returned unchanged; anything else keeps its message.
+
+    Args:
+        error (BaseException): The exception to translate
+
+    Returns:
+        FabricError: The matching FabricError subclass
+    """
+    if isinstance(error, FabricError):
+        return error
+    message = str(error)
+    status = getattr(error, "status_code", None)
+    if _is_sdk_error(error, "openai", "APITimeoutError") or _is_sdk_error(error, "httpx", "TimeoutException"):
+        return FabricTimeoutError(message)
+    if status == 429:
+        return FabricThrottledError(message, status, retry_after_seconds(error))
+    if is_transient(error):
+        return FabricUnavailableError(message, status, retry_after_seconds(error))
+    if status is not None:
+        return FabricPermanentError(message, status)
+    return FabricError(message)
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a failed API call.
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5,
+                 max_delay: float = 20.0, max_retry_after: float = 60.0):
+        """
+        Initialize the policy.
+
+        Args:
+            max_attempts (int): Total attempts per call, including the first
+            base_delay (float): Backoff before the first retry, doubled on each later one
+            max_delay (float): Upper bound for the backoff in seconds
+            max_retry_after (float): Longest Retry-After honoured; a longer one is
+                not waited out and the call fails as throttled
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    @classmethod
+    def disabled(cls) -> "RetryPolicy":
+        """
+        Return a policy that never retries.
+        """
+        return cls(max_attempts=1)
+
+    def is_retryable(self, error: BaseException, idempotent: bool) -> bool:
+        """
+        Return True if the failed call may be sent again.
+
+        Args:
+            error (BaseException): The exception the call raised
+            idempotent (bool): Whether repeating the operation is safe if the
+                first attempt may have been processed
+        """
+        if getattr(error, "status_code", None) == 429:
+            return True
+        return idempotent and is_transient(error)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Capped exponential backoff with full jitter.
+
+        Args:
+            attempt (int): Retries already made for this call
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def next_delay(self, attempt: int, error: BaseException, idempotent: bool,
+                   remaining: Optional[float] = None) -> Optional[float]:
+        """
+        Return how long to wait before retrying, or None to give up.
+
+        Args:
+            attempt (int): Retries already made for this call
+            error (BaseException): The exception the last attempt raised
+            idempotent (bool): Whether the operation is safe to repeat
+            remaining (float): Seconds left in the caller's deadline, if any
+
+        Returns:
+            float: Seconds to sleep before the next attempt, or None
+        """
+        if attempt + 1 >= self.max_attempts or not self.is_retryable(error, idempotent):
+            return None
+        retry_after = retry_after_seconds(error)
+        if retry_after is None:
+            delay = self.backoff(attempt)
+        elif retry_after > self.max_retry_after:
+            return None
+        else:
+            # A little jitter so callers throttled together don't all return together
+            delay = retry_after + random.uniform(0, self.base_delay)
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast after repeated failures, until a probe call succeeds.
+
+    One breaker may be shared by several clients that talk to the same data agent.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 probe_timeout: float = 120.0):
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold (int): Consecutive failed calls that open the circuit
+            recovery_timeout (float): Seconds the circuit stays open before a probe call
+            probe_timeout (float): Seconds after which a probe with no recorded outcome
+                is treated as lost and another call may probe; keep it above the
+                client's request_timeout
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe_timeout = probe_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._times_opened = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """
+        "closed", "open" or "half_open".
+        """
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        """
+        Let a call through, or raise if the circuit is open.
+
+        Raises:
+            FabricCircuitOpenError: While open, or while a half-open probe is in flight
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            now = time.monotonic()
+            wait = self.recovery_timeout - (now - self._opened_at)
+            if self._state == self.OPEN and wait <= 0:
+                self._state = self.HALF_OPEN
+            if self._probe_in_flight and now - self._probe_started >= self.probe_timeout:
+                print(f"🔌 Circuit probe lost after {self.probe_timeout:.0f}s, probing again")
+                self._probe_in_flight = False
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self._probe_started = now
+                return
+            self._rejected += 1
+            failures = self._failures
+        raise FabricCircuitOpenError(
+            f"Circuit open after {failures} consecutive failures; not calling the data agent",
+            retry_after=max(0.0, wait)
+        )
+
+    def record_success(self):
+        """
+        Record a call that reached a healthy service.
+        """
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            if self._state != self.CLOSED:
+                print("🔌 Circuit closed, data agent is responding again")
+            self._state = self.CLOSED
+
+    def record_failure(self):
+        """
+        Record a call that failed because the service is overloaded or unhealthy.
+        """
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._times_opened += 1
+                    print(f"🔌 Circuit open for {self.recovery_timeout:.0f}s "
+                          f"after {self._failures} consecutive failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def record(self, error: BaseException):
+        """
+        Record a failed call according to what the exception says about the service.
+
+        Transient errors count as failures and other API errors as successes
+        (the service answered). Client-side errors, such as an expired
+        deadline, only free the half-open probe slot.
+
+        Args:
+            error (BaseException): The exception the call raised
+        """
+        if is_transient(error):
+            self.record_failure()
+        elif getattr(error, "status_code", None) is not None:
+            self.record_success()
+        else:
+            with self._lock:
+                self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        """
+        Return the breaker state and counters.
+
+        Returns:
+            dict: state, consecutive_failures, times_opened and rejected calls
+        """
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "times_opened": self._times_opened,
+                "rejected": self._rejected
+            }
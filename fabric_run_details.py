@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Run details result for the Fabric Data Agent client.
+
+get_run_details() used to return a dict holding model_dump() copies of every
+run step and message. RunDetails keeps the answer and SQL analysis as plain
+attributes and only builds those dumps when run_steps or messages is first
+read, so callers that want the query or answer never pay for them.
+"""
+
+import time
+from typing import Optional
+from fabric_result_table import tables_from_steps
+
+
+class RunDetails:
+    """
+    Compact, lazily dumped result of FabricDataAgentClient.get_run_details().
+
+    Supports the read-only mapping interface of the dict it replaces
+    (result["sql_queries"], result.get(...), "key" in result, keys(), ...);
+    the SQL keys are only present when SQL queries were found, as before.
+    """
+
+    __slots__ = (
+        "question",
+        "run_status",
+        "timestamp",
+        "answer",
+        "sql_queries",
+        "sql_data_previews",
+        "data_retrieval_query",
+        "poll_count",
+        "_steps",
+        "_messages",
+        "_run_steps",
+        "_messages_dump"
+    )
+
+    def __init__(self, question: str, run_status: str, steps=None, messages=None,
+                 answer: str = "", timestamp: Optional[float] = None):
+        """
+        Initialize the run details.
+
+        Args:
+            question (str): The question that was asked
+            run_status (str): Final status of the run
+            steps: The run steps page from the OpenAI API, dumped on first access
+            messages: The thread messages page from the OpenAI API, dumped on first access
+            answer (str): The assistant's answer text
+            timestamp (float): When the details were built, defaults to now
+        """
+        self.question = question
+        self.run_status = run_status
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.answer = answer
+        self.sql_queries = None
+        self.sql_data_previews = None
+        self.data_retrieval_query = None
+        self.poll_count = None
+        self._steps = steps
+        self._messages = messages
+        self._run_steps = None
+        self._messages_dump = None
+
+    @property
+    def run_steps(self) -> dict:
+        """
+        The run steps as a model_dump() dict, built on first access.
+        """
+        if self._run_steps is None and self._steps is not None:
+            self._run_steps = self._steps.model_dump()
+            self._steps = None
+        return self._run_steps
+
+    @property
+    def messages(self) -> dict:
+        """
+        The thread messages as a model_dump() dict, built on first access.
+        """
+        if self._messages_dump is None and self._messages is not None:
+            self._messages_dump = self._messages.model_dump()
+            self._messages = None
+        return self._messages_dump
+
+    def result_tables(self) -> list:
+        """
+        Return the full result set of every tool call as columnar tables.
+
+        Reads the step models directly when the raw dump has not been built.
+
+        Returns:
+            list: ResultTable per tool output with tabular data; call to_arrow(),
+                to_numpy() or to_markdown() on each
+        """
+        steps = self._steps if self._steps is not None else self._run_steps
+        if steps is None:
+            return []
+        return tables_from_steps(steps)
+
+    def keys(self) -> list:
+        """
+        Return the keys the equivalent result dict would have.
+        """
+        keys = ["question", "run_status", "run_steps", "messages", "timestamp", "answer"]
+        if self.sql_queries:
+            keys += ["sql_queries", "sql_data_previews", "data_retrieval_query"]
+        if self.poll_count is not None:
+            keys.append("poll_count")
+        return keys
+
+    def __getitem__(self, key: str):
+        if key not in self.keys():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        """
+        Return the value for key, or default if the result has no such key.
+        """
+        if key not in self.keys():
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def items(self) -> list:
+        return [(key, getattr(self, key)) for key in self.keys()]
+
+    def values(self) -> list:
+        return [getattr(self, key) for key in self.keys()]
+
+    def to_dict(self) -> dict:
+        """
+        Return the full result as a plain dict, building the raw dumps if needed.
+
+        Returns:
+            dict: The same shape get_run_details() returned before RunDetails
+        """
+        return dict(self.items())
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunDetails":
+        """
+        Rebuild run details from a dict produced by to_dict() (e.g. from the answer cache).
+
+        Args:
+            data (dict): The result dict
+
+        Returns:
+            RunDetails: The rebuilt result
+        """
+        details = cls(
+            data.get("question"),
+            data.get("run_status"),
+            answer=data.get("answer", ""),
+            timestamp=data.get("timestamp")
+        )
+        details._run_steps = data.get("run_steps")
+        details._messages_dump = data.get("messages")
+        details.sql_queries = data.get("sql_queries")
+        details.sql_data_previews = data.get("sql_data_previews")
+        details.data_retrieval_query = data.get("data_retrieval_query")
+        details.poll_count = data.get("poll_count")
+        return details
+
+    def __repr__(self) -> str:
+        return (
+            f"RunDetails(question={self.question!r}, run_status={self.run_status!r}, "
+            f"sql_queries={len(self.sql_queries or [])})"
+        )
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Priority scheduling of questions in front of the Fabric Data Agent client.
+
+Interactive chat questions and overnight batch questions share one data agent.
+FabricScheduler queues questions by priority class and runs at most
+max_concurrent_runs of them at a time, so a running batch job cannot push an
+interactive question behind hundreds of others: the interactive question
+takes the next free slot.
+
+Questions of one class run in arrival order. Classes age, so low-priority
+work is not starved: every aging_seconds a class has waited without getting
+a run slot raises it by one priority class until it gets one. With the
+default of 60 seconds, batch work that has been shut out for two minutes by a
+stream of interactive questions takes the next slot. Ageing is per class
+rather than per question, so a deep batch backlog cannot outrank new
+interactive questions just by having been queued for a long time.
+
+Queue depth, running questions and queue wait time per priority class are
+exported to the metrics registry and summarized by stats().
+
+Example:
+    scheduler = FabricScheduler(client, max_concurrent_runs=8)
+    answer = scheduler.ask("What were sales yesterday?", priority="interactive")
+    futures = [scheduler.submit(q, priority="batch") for q in nightly_questions]
+"""
+
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional
+
+from fabric_metrics import MetricsRegistry, default_registry
+from fabric_retry import FabricTimeoutError
+
+# Priority classes; a lower number is dispatched first
+PRIORITIES = {
+    "interactive": 0,
+    "normal": 1,
+    "batch": 2
+}
+
+# Recent queue waits kept per priority class for stats()
+WAIT_SAMPLES = 1000
+
+
+def _percentile(values: list, pct: float) -> float:
+    # Nearest-rank, as in benchmark_client.percentile()
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+class _Job:
+    """
+    One queued question.
+    """
+
+    __slots__ = ("priority", "call", "future", "enqueued_at", "queue_timeout")
+
+    def __init__(self, priority: str, call, queue_timeout: Optional[float]):
+        self.priority = priority
+        self.call = call
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+        self.queue_timeout = queue_timeout
+
+
+class FabricScheduler:
+    """
+    Runs questions on a FabricDataAgentClient by priority with a cap on concurrent runs.
+    """
+
+    def __init__(self, client, max_concurrent_runs: int = 8, aging_seconds: Optional[float] = 60.0,
+                 priorities: Optional[dict] = None, registry: Optional[MetricsRegistry] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            client (FabricDataAgentClient): The client that runs the questions
+            max_concurrent_runs (int): Maximum questions running on the data agent at once
+            aging_seconds (float): Seconds of waiting that raise a queued question by one
+                priority class, or None to disable aging
+            priorities (dict): Class name -> rank, defaults to PRIORITIES
+            registry (MetricsRegistry): Where to export queue metrics, defaults to default_registry()
+        """
+        if max_concurrent_runs < 1:
+            raise ValueError("max_concurrent_runs must be at least 1")
+        if aging_seconds is not None and aging_seconds <= 0:
+            raise ValueError("aging_seconds must be positive or None")
+
+        self.client = client
+        self.max_concurrent_runs = max_concurrent_runs
+        self.aging_seconds = aging_seconds
+        self.priorities = dict(priorities or PRIORITIES)
+
+        self._cond = threading.Condition()
+        self._queues = {name: deque() for name in self.priorities}
+        self._last_dispatch = {name: time.monotonic() for name in self.priorities}
+        self._workers = []
+        self._running = 0
+        self._closing = False
+        self._waits = {name: deque(maxlen=WAIT_SAMPLES) for name in self.priorities}
+        self._counters = {name: {"submitted": 0, "started": 0, "expired": 0} for name in self.priorities}
+
+        registry = registry or default_registry()
+        self._depth_gauge = registry.gauge(
+            "fabric_scheduler_queue_depth", "Questions waiting for a run slot", ("priority",)
+        )
+        self._running_gauge = registry.gauge("fabric_scheduler_running", "Questions running on the data agent")
+        self._wait_seconds = registry.histogram(
+            "fabric_scheduler_wait_seconds", "Time questions waited for a run slot", ("priority",)
+        )
+
+    def _effective_rank(self, priority: str, now: float) -> float:
+        # A class is raised by one rank per aging_seconds its oldest question has
+        # waited since the class last got a run slot
+        rank = self.priorities[priority]
+        if self.aging_seconds is None:
+            return rank
+        waiting_since = max(self._last_dispatch[priority], self._queues[priority][0].enqueued_at)
+        return rank - (now - waiting_since) / self.aging_seconds
+
+    def _submit(self, priority: str, call, queue_timeout: Optional[float]) -> Future:
+        if priority not in self.priorities:
+            raise ValueError(f"Unknown priority {priority!r}, expected one of {sorted(self.priorities)}")
+        job = _Job(priority, call, queue_timeout)
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("Scheduler is closed")
+            self._queues[priority].append(job)
+            self._counters[priority]["submitted"] += 1
+            self._depth_gauge.inc(1, priority)
+            if len(self._workers) < self.max_concurrent_runs:
+                worker = threading.Thread(target=self._run, name="fabric-scheduler", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._cond.notify()
+        return job.future
+
+    def submit(self, question: str, priority: str = "normal", timeout: int = 120,
+               use_cache: bool = True, queue_timeout: Optional[float] = None) -> Future:
+        """
+        Queue a question for client.ask().
+
+        Args:
+            question (str): The question to ask
+            priority (str): Priority class, e.g. "interactive" or "batch"
+            timeout (int): Maximum end-to-end time for the question once it runs
+            use_cache (bool): Use the client's answer cache, if one is configured
+            queue_timeout (float): Fail with FabricTimeoutError if no run slot is free
+                within this many seconds
+
+        Returns:
+            Future: Resolves to what client.ask() returns (or raises)
+        """
+        if not question.strip():
+            raise ValueError("Question cannot be empty")
+        context = contextvars.copy_context()
+        return self._submit(priority, lambda: context.run(self.client.ask, question, timeout, use_cache),
+                            queue_timeout)
+
+    def submit_run_details(self, question: str, priority: str = "normal", timeout: int = 120,
+                           use_cache: bool = True, queue_timeout: Optional[float] = None) -> Future:
+        """
+        Queue a question for client.get_run_details(); see submit().
+
+        Returns:
+            Future: Resolves to what client.get_run_details() returns (or raises)
+        """
+        context = contextvars.copy_context()
+        return self._submit(
+            priority,
+            lambda: context.run(self.client.get_run_details, question, timeout, use_cache),
+            queue_timeout
+        )
+
+    def ask(self, question: str, priority: str = "interactive", timeout: int = 120,
+            use_cache: bool = True, queue_timeout: Optional[float] = None) -> str:
+        """
+        Ask a question through the queue and wait for the answer.
+
+        Takes the same arguments as submit(); defaults to the interactive class.
+
+        Returns:
+            str: What client.ask() returns
+        """
+        return self.submit(question, priority, timeout, use_cache, queue_timeout).result()
+
+    def _next_job(self) -> Optional[_Job]:
+        with self._cond:
+            while not any(self._queues.values()):
+                if self._closing:
+                    return None
+                self._cond.wait()
+            now = time.monotonic()
+            priority = min(
+                (name for name, queue in self._queues.items() if queue),
+                key=lambda name: (self._effective_rank(name, now), self.priorities[name])
+            )
+            job = self._queues[priority].popleft()
+            self._last_dispatch[priority] = now
+            self._depth_gauge.inc(-1, job.priority)
+            self._running += 1
+            self._running_gauge.set(self._running)
+            return job
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                waited = time.monotonic() - job.enqueued_at
+                if job.queue_timeout is not None and waited > job.queue_timeout:
+                    with self._cond:
+                        self._counters[job.priority]["expired"] += 1
+                    job.future.set_exception(FabricTimeoutError(
+                        f"Question waited {waited:.1f}s for a run slot (queue timeout {job.queue_timeout}s)"
+                    ))
+                    continue
+                self._wait_seconds.observe(waited, job.priority)
+                with self._cond:
+                    self._waits[job.priority].append(waited)
+                    self._counters[job.priority]["started"] += 1
+                try:
+                    job.future.set_result(job.call())
+                except BaseException as e:
+                    job.future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._running_gauge.set(self._running)
+
+    def stats(self) -> dict:
+        """
+        Return queue depth, running questions and queue wait times per priority class.
+
+        Returns:
+            dict: running, max_concurrent_runs and, per class, queued, submitted,
+                started, expired and wait_p50 / wait_p95 / wait_max in seconds
+        """
+        with self._cond:
+            classes = {}
+            for name in self.priorities:
+                waits = list(self._waits[name])
+                classes[name] = {
+                    "queued": len(self._queues[name]),
+                    **self._counters[name],
+                    "wait_p50": _percentile(waits, 50),
+                    "wait_p95": _percentile(waits, 95),
+                    "wait_max": max(waits, default=0.0)
+                }
+            return {
+                "running": self._running,
+                "max_concurrent_runs": self.max_concurrent_runs,
+                "priorities": classes
+            }
+
+    def close(self, cancel_pending: bool = False, timeout: Optional[float] = None):
+        """
+        Stop accepting questions and wait for the workers to finish.
+
+        Args:
+            cancel_pending (bool): Cancel questions that have not started instead of running them
+            timeout (float): Seconds to wait for each worker
+        """
+        with self._cond:
+            self._closing = True
+            if cancel_pending:
+                for queue in self._queues.values():
+                    for job in queue:
+                        job.future.cancel()
+                        self._depth_gauge.inc(-1, job.priority)
+                    queue.clear()
+            self._cond.notify_all()
+            workers = list(self._workers)
+        for worker in workers:
+            worker.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
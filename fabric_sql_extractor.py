@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+SQL extraction for Fabric Data Agent tool calls.
+
+Finds SQL statements in tool call arguments, tool outputs and step dumps with
+a single forward scan. Statement starts are located with one precompiled
+pattern; each statement is then walked to its terminator by jumping between
+the few characters that can end it. Scanning resumes after the statement, so
+no input position is examined more than a bounded number of times and run
+time stays linear, unlike the lazy ".*?" patterns this replaces, which
+rescanned to the end of the text from every keyword. Input size, statement
+length and wall time are capped.
+
+Run this module directly for a fuzz and performance self-check.
+"""
+
+import re
+import time
+from typing import Optional
+
+# Largest input scanned; longer text is truncated (tool outputs can be several MB)
+MAX_SCAN_CHARS = 2_000_000
+# Longest statement kept; anything longer is cut off at this length
+MAX_STATEMENT_CHARS = 20_000
+# Wall-clock budget for one scan in seconds
+SCAN_TIME_BUDGET = 0.5
+# Statements shorter than this are treated as noise
+MIN_STATEMENT_CHARS = 11
+
+_STATEMENT_START = re.compile(
+    r"\b(?:SELECT|INSERT[ \t\r\n]+INTO|UPDATE|DELETE[ \t\r\n]+FROM|"
+    r"(?:CREATE|ALTER|DROP)[ \t\r\n]+TABLE)\b",
+    re.IGNORECASE
+)
+# Checked on the raw text, where an escaped "\nFROM" has no word boundary before FROM
+_REQUIRED_CLAUSE = {
+    "SELECT": re.compile(r"(?:\b|(?<=\\[nt]))FROM\b", re.IGNORECASE),
+    "UPDATE": re.compile(r"(?:\b|(?<=\\[nt]))SET\b", re.IGNORECASE),
+}
+# Characters that can end (or change how we read) a statement
+_SPECIAL = re.compile(r"[;}\"()'\\\n]")
+_SPECIAL_SAME_LINE = re.compile(r"[;}\"()'\\]")
+_WHITESPACE = re.compile(r"\s+")
+_ESCAPES = re.compile(r"\\[nt]")
+
+_SQL_KEYS = r"(?:sql|query|sql_query|statement|code|generated_code)"
+_SQL_FIELD = re.compile(
+    r'"' + _SQL_KEYS + r'"\s*:\s*"((?:[^"\\]|\\.){11,})"'
+    r"|'" + _SQL_KEYS + r"'\s*:\s*'((?:[^'\\]|\\.){11,})'",
+    re.IGNORECASE
+)
+
+
+def _clean(statement: str, unescape: bool) -> str:
+    if unescape:
+        statement = _ESCAPES.sub(" ", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def _statement_end(text: str, start: int, limit: int, stop_at_newline: bool) -> int:
+    """
+    Return the index where the statement beginning at start ends.
+
+    Ends at ';', '}', an unescaped '"', an unbalanced ')', an unclosed "'",
+    a newline when stop_at_newline is set, or limit. Parentheses are counted
+    and single-quoted literals are skipped, so "IN ('a', 'b')" stays whole.
+    """
+    special = _SPECIAL if stop_at_newline else _SPECIAL_SAME_LINE
+    depth = 0
+    pos = start
+    while True:
+        match = special.search(text, pos, limit)
+        if match is None:
+            return limit
+        pos = match.start()
+        char = text[pos]
+        if char == "\\":
+            # JSON/Python escape such as \n or \" - part of the statement
+            pos += 2
+        elif char == "(":
+            depth += 1
+            pos += 1
+        elif char == ")":
+            if depth == 0:
+                return pos
+            depth -= 1
+            pos += 1
+        elif char == "'":
+            close = text.find("'", pos + 1, limit)
+            if close == -1:
+                return pos
+            pos = close + 1
+        else:
+            return pos
+
+
+def find_sql_statements(text: str, stop_at_newline: bool = False, unescape: bool = False,
+                        max_chars: int = MAX_SCAN_CHARS,
+                        time_budget: Optional[float] = SCAN_TIME_BUDGET) -> list:
+    """
+    Find SQL statements in free text in one linear pass.
+
+    Args:
+        text (str): Text to scan
+        stop_at_newline (bool): Treat a literal newline as the end of a statement
+        unescape (bool): Turn escaped \\n and \\t sequences into whitespace
+        max_chars (int): Only the first max_chars characters are scanned
+        time_budget (float): Stop scanning after this many seconds, None for no limit
+
+    Returns:
+        list: Whitespace-normalized statements in the order they appear
+    """
+    if not text:
+        return []
+    if len(text) > max_chars:
+        print(f"⚠️ SQL scan limited to the first {max_chars} of {len(text)} characters")
+    limit = min(len(text), max_chars)
+    give_up_at = time.monotonic() + time_budget if time_budget is not None else None
+
+    statements = []
+    pos = 0
+    while pos < limit:
+        match = _STATEMENT_START.search(text, pos, limit)
+        if match is None:
+            break
+        start = match.start()
+        end = _statement_end(text, match.end(), min(limit, start + MAX_STATEMENT_CHARS), stop_at_newline)
+
+        # A keyword inside a rejected span (e.g. "SELECT SELECT ...") would end at or
+        # before the same terminator, so resuming after the span never loses a statement
+        required = _REQUIRED_CLAUSE.get(match.group(0).upper())
+        if required is None or required.search(text, match.end(), end):
+            statement = _clean(text[start:end], unescape)
+            if len(statement) >= MIN_STATEMENT_CHARS:
+                statements.append(statement)
+        pos = max(end, match.end())
+
+        if give_up_at is not None and time.monotonic() > give_up_at:
+            print(f"⚠️ SQL scan stopped after {time_budget}s at character {pos} of {limit}")
+            break
+
+    return statements
+
+
+def find_sql_fields(text: str, max_chars: int = MAX_SCAN_CHARS) -> list:
+    """
+    Find SQL stored under keys such as "sql" or "query" in JSON-like text.
+
+    Args:
+        text (str): Text to scan, e.g. tool call arguments that failed to parse
+        max_chars (int): Only the first max_chars characters are scanned
+
+    Returns:
+        list: Whitespace-normalized field values in the order they appear
+    """
+    if not text:
+        return []
+    values = []
+    for match in _SQL_FIELD.finditer(text, 0, max_chars):
+        value = _clean(match.group(1) or match.group(2), unescape=True)
+        if len(value) >= MIN_STATEMENT_CHARS:
+            values.append(value)
+    return values
+
+
+def _legacy_find(text: str) -> list:
+    """The previous lazy-regex implementation, kept only for the self-check."""
+    matches = []
+    for pattern in (r'(SELECT\s+.*?FROM\s+.*?)(?=\s*;|\s*$|\s*\}|\s*\)|\s*,)',
+                    r'(DELETE\s+FROM\s+.*?)(?=\s*;|\s*$|\s*\}|\s*\))'):
+        matches.extend(re.findall(pattern, text, re.IGNORECASE | re.DOTALL))
+    return matches
+
+
+def _self_check():
+    """
+    Fuzz and time the scanner against inputs that made the old patterns backtrack.
+    """
+    import random
+
+    print("🔍 Checking known outputs...")
+    samples = {
+        '{"query": "SELECT State, Positive FROM covid WHERE x = 1"}':
+            ["SELECT State, Positive FROM covid WHERE x = 1"],
+        "SELECT a FROM t WHERE s IN ('x;y', 'z'); DELETE FROM t WHERE id = (1)":
+            ["SELECT a FROM t WHERE s IN ('x;y', 'z')", "DELETE FROM t WHERE id = (1)"],
+        '{"code": "SELECT TOP 5 *\\nFROM sales\\nORDER BY amount"}':
+            ["SELECT TOP 5 * FROM sales ORDER BY amount"],
+        "Please select one of the options.": [],
+    }
+    for text, expected in samples.items():
+        found = find_sql_statements(text, unescape=True)
+        assert found == expected, (text, found)
+    assert find_sql_fields('{"sql": "SELECT \\"a\\" FROM t"}') == ['SELECT \\"a\\" FROM t']
+
+    print("🎲 Fuzzing...")
+    rng = random.Random(13)
+    alphabet = ["SELECT ", "FROM ", "select", "INSERT INTO ", "UPDATE ", "SET ", "(", ")",
+                "'", '"', "\\", ";", "}", ",", "\n", " ", "x", "1", "DELETE FROM "]
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 200)))
+        for statement in find_sql_statements(text, stop_at_newline=rng.random() < 0.5):
+            assert len(statement) >= MIN_STATEMENT_CHARS
+        find_sql_fields(text)
+
+    print("⏱️ Timing adversarial inputs...")
+    adversarial = {
+        "keywords without FROM": "SELECT " * 20_000,
+        "unterminated statement": "SELECT a FROM " + "x " * 200_000,
+        "unclosed quotes": ("SELECT a FROM t WHERE b = '" + "y" * 50) * 2_000,
+        "deep parentheses": "SELECT a FROM t WHERE " + "(" * 100_000,
+        "unterminated field": '{"sql": "SELECT ' + "a" * 1_000_000,
+    }
+    for name, text in adversarial.items():
+        started = time.perf_counter()
+        find_sql_statements(text, time_budget=None)
+        find_sql_fields(text)
+        elapsed = time.perf_counter() - started
+        print(f"   {name} ({len(text):,} chars): {elapsed * 1000:.1f} ms")
+        assert elapsed < 1.0, name
+
+    sample = "SELECT " * 3_000
+    started = time.perf_counter()
+    _legacy_find(sample)
+    legacy = time.perf_counter() - started
+    started = time.perf_counter()
+    find_sql_statements(sample)
+    current = time.perf_counter() - started
+    print(f"   legacy patterns on {len(sample):,} chars: {legacy * 1000:.1f} ms vs {current * 1000:.1f} ms")
+
+    print("✅ SQL extractor self-check passed")
+
+
+if __name__ == "__main__":
+    _self_check()
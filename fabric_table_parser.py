@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Incremental table parser for Fabric Data Agent answers.
+
+Consumes answer text chunk by chunk - deltas from ask_stream() or a stored
+message in one piece - and yields table records as soon as each line is
+complete. Markdown tables, bare pipe tables, CSV blocks and numbered
+"Key: value, Key: value" lists are detected in the same single pass. Only the
+current partial line and one candidate header (plus, for a two-column CSV
+block, its first row) are buffered, and lines longer than max_line_chars are
+cut, so memory stays bounded however large the answer is.
+
+A CSV block needs at least three columns, or two columns and two rows, and
+lines that read like sentences are never CSV, so ordinary prose with a comma
+in it is not mistaken for a table.
+
+find_json_arrays() finds JSON arrays embedded in tool output text in linear
+time.
+
+Example:
+    chunks = (item["text"] for item in client.ask_stream(question) if item["type"] == "text")
+    for record in parse_tables(chunks):
+        ...
+
+Records are dicts:
+    {"type": "header", "table": 0, "format": "markdown", "columns": [...]}
+    {"type": "row", "table": 0, "values": [...]}
+    {"type": "end", "table": 0, "rows": 12}
+"""
+
+import csv
+import json
+import re
+
+_SEPARATOR = re.compile(r"^\|?\s*:?-{3,}:?\s*(?:\|\s*:?-{3,}:?\s*)*\|?$")
+_NUMBERED = re.compile(r"^\d+\.\s+")
+
+# What find_json_arrays() looks at: escape pairs (skipped as a unit), quotes and brackets
+_JSON_TOKEN = re.compile(r'\\.|[\[\]"]', re.DOTALL)
+
+# Punctuation that ends a sentence; a cell with spaces ending in one is prose
+_SENTENCE_ENDS = (".", "!", "?", ":", ";")
+
+# Rows a two-column CSV block needs before it is reported
+_MIN_NARROW_CSV_ROWS = 2
+
+_IDLE = "idle"
+_PIPE_PENDING = "pipe_pending"
+_CSV_PENDING = "csv_pending"
+_IN_TABLE = "in_table"
+
+
+def _is_pipe_line(line: str) -> bool:
+    return line.count("|") >= 2
+
+
+def _pipe_cells(line: str) -> list:
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split("|")]
+
+
+def _csv_cells(line: str) -> list:
+    if "," not in line:
+        return []
+    try:
+        cells = next(csv.reader([line], skipinitialspace=True))
+    except csv.Error:
+        return []
+    cells = [cell.strip() for cell in cells]
+    if len(cells) < 2 or any(" " in cell and cell.endswith(_SENTENCE_ENDS) for cell in cells):
+        return []
+    return cells
+
+
+def _numbered_item(line: str):
+    match = _NUMBERED.match(line)
+    return line[match.end():] if match else None
+
+
+def _key_values(item: str) -> list:
+    pairs = []
+    for pair in item.split(", "):
+        if ":" in pair:
+            key, value = pair.split(":", 1)
+            pairs.append((key.strip(), value.strip()))
+    return pairs
+
+
+class TableStreamParser:
+    """
+    Push parser: feed() text chunks, close() at the end; both yield records.
+    """
+
+    def __init__(self, max_line_chars: int = 65536):
+        """
+        Initialize the parser.
+
+        Args:
+            max_line_chars (int): Longest line kept; the rest of a longer line is dropped
+        """
+        self.max_line_chars = max_line_chars
+        self._partial = ""
+        self._overflow = False
+        self._state = _IDLE
+        self._pending = None
+        self._format = None
+        self._columns = 0
+        self._table = -1
+        self._rows = 0
+
+    def feed(self, chunk: str):
+        """
+        Consume a chunk of text.
+
+        Args:
+            chunk (str): The next piece of the answer
+
+        Yields:
+            dict: Header, row and end records completed by this chunk
+        """
+        start = 0
+        while True:
+            newline = chunk.find("\n", start)
+            if newline == -1:
+                self._buffer(chunk[start:])
+                return
+            self._buffer(chunk[start:newline])
+            line = self._partial
+            overflow = self._overflow
+            self._partial = ""
+            self._overflow = False
+            yield from self._line(line.strip() if not overflow else "\0")
+            start = newline + 1
+
+    def _buffer(self, text: str):
+        if self._overflow or not text:
+            return
+        room = self.max_line_chars - len(self._partial)
+        if len(text) > room:
+            self._partial += text[:room]
+            self._overflow = True
+        else:
+            self._partial += text
+
+    def close(self):
+        """
+        Flush the final line and close any open table.
+
+        Yields:
+            dict: The remaining records
+        """
+        if self._partial or self._overflow:
+            line = self._partial.strip() if not self._overflow else "\0"
+            self._partial = ""
+            self._overflow = False
+            yield from self._line(line)
+        yield from self._end_table()
+        self._state = _IDLE
+        self._pending = None
+
+    def _start_table(self, table_format: str, columns: list):
+        self._table += 1
+        self._rows = 0
+        self._format = table_format
+        self._columns = len(columns)
+        self._state = _IN_TABLE
+        return {"type": "header", "table": self._table, "format": table_format, "columns": columns}
+
+    def _row(self, values: list):
+        self._rows += 1
+        return {"type": "row", "table": self._table, "values": values}
+
+    def _end_table(self):
+        if self._state == _IN_TABLE:
+            yield {"type": "end", "table": self._table, "rows": self._rows}
+        self._state = _IDLE
+        self._format = None
+
+    def _line(self, line: str):
+        # "\0" marks an over-long line: plain text, never part of a table
+        if self._state == _IN_TABLE:
+            if self._format in ("markdown", "pipe"):
+                if _is_pipe_line(line) and not _SEPARATOR.match(line):
+                    yield self._row(_pipe_cells(line))
+                    return
+                if _SEPARATOR.match(line):
+                    return
+            elif self._format == "csv":
+                cells = _csv_cells(line)
+                if len(cells) == self._columns:
+                    yield self._row(cells)
+                    return
+            elif self._format in ("numbered", "list"):
+                if line == "":
+                    return
+                item = _numbered_item(line)
+                if item is not None:
+                    if self._format == "list":
+                        yield self._row([item])
+                    else:
+                        values = [value for _, value in _key_values(item)]
+                        if len(values) == self._columns:
+                            yield self._row(values)
+                    return
+            yield from self._end_table()
+
+        if self._state == _PIPE_PENDING:
+            header, self._pending = self._pending, None
+            self._state = _IDLE
+            if _SEPARATOR.match(line):
+                yield self._start_table("markdown", _pipe_cells(header))
+                return
+            if _is_pipe_line(line):
+                yield self._start_table("pipe", _pipe_cells(header))
+                yield self._row(_pipe_cells(line))
+                return
+
+        if self._state == _CSV_PENDING:
+            header, rows = self._pending
+            cells = _csv_cells(line)
+            if cells and len(cells) == len(header):
+                rows.append(cells)
+                # Two comma-separated lines are often just prose; two columns need two rows
+                if len(header) >= 3 or len(rows) >= _MIN_NARROW_CSV_ROWS:
+                    self._pending = None
+                    yield self._start_table("csv", header)
+                    for values in rows:
+                        yield self._row(values)
+                return
+            self._pending = None
+            self._state = _IDLE
+
+        if not line or line == "\0":
+            return
+
+        item = _numbered_item(line)
+        if item is not None:
+            pairs = _key_values(item)
+            if pairs:
+                yield self._start_table("numbered", [key for key, _ in pairs])
+                yield self._row([value for _, value in pairs])
+            else:
+                yield self._start_table("list", ["value"])
+                yield self._row([item])
+            return
+
+        if _is_pipe_line(line):
+            self._pending = line
+            self._state = _PIPE_PENDING
+            return
+
+        cells = _csv_cells(line)
+        if cells:
+            self._pending = (cells, [])
+            self._state = _CSV_PENDING
+
+
+def find_json_arrays(text: str):
+    """
+    Find the outermost bracketed spans of a text that parse as JSON arrays.
+
+    Brackets are matched in one pass with a stack (ignoring brackets inside
+    JSON strings), and only outermost balanced spans are parsed, so the work
+    is linear in the text length however many unmatched brackets it holds.
+
+    Args:
+        text (str): Text that may contain JSON arrays, e.g. tool call output
+
+    Yields:
+        list: Each parsed array, in the order it appears
+    """
+    spans = []
+    opened = []
+    in_string = False
+    for match in _JSON_TOKEN.finditer(text):
+        token = match.group()
+        if in_string:
+            in_string = token != '"'
+        elif token == '"':
+            # Only strings inside a bracket can hide brackets; quotes in prose are ignored
+            in_string = bool(opened)
+        elif token == "[":
+            opened.append(match.start())
+        elif token == "]" and opened:
+            start, index = opened.pop(), match.start()
+            # An enclosing span, once closed, replaces the spans inside it
+            while spans and spans[-1][0] > start:
+                spans.pop()
+            spans.append((start, index + 1))
+
+    for start, end in spans:
+        try:
+            value = json.loads(text[start:end])
+        except (ValueError, RecursionError):
+            continue
+        if isinstance(value, list):
+            yield value
+
+
+def parse_tables(chunks):
+    """
+    Parse tables out of a stream of text chunks.
+
+    Args:
+        chunks: Iterable of text chunks, or a single string
+
+    Yields:
+        dict: Header, row and end records in order
+    """
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+    parser = TableStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def render_table(header: dict, rows: list) -> list:
+    """
+    Render one parsed table as text lines in the style of its source format.
+
+    Args:
+        header (dict): The table's header record
+        rows (list): Lists of cell values
+
+    Returns:
+        list: Markdown lines for markdown/pipe/numbered tables, comma-separated lines for CSV
+    """
+    columns = header["columns"]
+    if header["format"] == "csv":
+        return [", ".join(columns)] + [", ".join(values) for values in rows]
+    lines = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+    lines.extend("| " + " | ".join(values) + " |" for values in rows)
+    return lines
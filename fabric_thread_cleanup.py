@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Background thread cleanup for the Fabric Data Agent client.
+
+Deleting a Fabric thread is a full round trip that the caller does not need to
+wait for. ThreadCleaner takes released threads off the request path, deletes
+them from a worker thread and retries deletes that fail with backoff.
+
+The Assistants API cannot list threads, so every thread the client creates is
+recorded until it has been deleted. A periodic janitor pass re-queues threads
+whose deletes were given up on and, when a SQLite journal is configured,
+threads left behind by a process that crashed or was killed mid-question.
+
+One journal may be shared by several processes (e.g. gunicorn workers).
+Each journaled thread records the cleaner that owns it, and owners keep a
+heartbeat in the journal; a janitor only collects another owner's threads
+once that owner is gone: closed, its process no longer running on this
+host, or silent for longer than orphan_age.
+
+The worker is a daemon thread, so cleaners still open when the interpreter
+exits are closed from an atexit hook; released threads are deleted before the
+process ends even if the client was never closed.
+"""
+
+import atexit
+import heapq
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from typing import Optional
+
+
+def _process_running(pid: int) -> Optional[bool]:
+    """
+    Return whether a process on this host is running, or None if that cannot be told.
+    """
+    if os.name != "posix":
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return None
+    return True
+
+
+# Cleaners not yet closed; weak so an unreferenced client can still be collected
+_open_cleaners = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_cleaners():
+    for cleaner in list(_open_cleaners):
+        cleaner.close()
+
+
+class ThreadCleaner:
+    """
+    Deferred, retrying deleter for Fabric threads with an orphan janitor.
+
+    Callers track() a thread when it is created and release() it when they
+    are done; the delete happens in the background. Counters in stats() show
+    how many threads were created, deleted, retried and leaked.
+    """
+
+    def __init__(self, delete_thread,
+                 max_attempts: int = 5,
+                 retry_delay: float = 1.0,
+                 max_retry_delay: float = 60.0,
+                 janitor_interval: float = 300.0,
+                 orphan_age: float = 3600.0,
+                 journal_path: Optional[str] = None):
+        """
+        Initialize the thread cleaner.
+
+        Args:
+            delete_thread: Callable deleting one thread by id; raising means the delete failed
+            max_attempts (int): Delete attempts before a thread is handed to the janitor
+            retry_delay (float): Initial backoff between attempts in seconds
+            max_retry_delay (float): Upper bound for the backoff in seconds
+            janitor_interval (float): Seconds between janitor passes
+            orphan_age (float): Age in seconds after which a journaled thread this
+                cleaner no longer holds is treated as orphaned; also how long another
+                owner's heartbeat may be silent before its threads are collected
+            journal_path (str): Optional SQLite file recording live threads across restarts
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+        self._delete_thread = delete_thread
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.janitor_interval = janitor_interval
+        self.orphan_age = orphan_age
+        self.journal_path = journal_path
+
+        self._cond = threading.Condition()
+        self._queue = []        # heap of (due, attempt, thread_id)
+        self._queued = set()
+        self._in_flight = 0
+        self._active = {}       # thread_id -> created_at, still in use by a caller
+        self._abandoned = set()
+        self._worker = None
+        self._stopping = False
+        self._next_sweep = time.monotonic()
+        self._counters = {
+            "tracked": 0,
+            "released": 0,
+            "deleted": 0,
+            "already_gone": 0,
+            "delete_failures": 0,
+            "retries": 0,
+            "abandoned": 0,
+            "orphans_found": 0,
+            "janitor_runs": 0
+        }
+
+        self._db = None
+        self._pid = None
+        self.owner = None
+        _open_cleaners.add(self)
+        if journal_path:
+            with self._cond:
+                self._journal()
+
+    def _journal(self) -> Optional[sqlite3.Connection]:
+        # Called with the lock held. A connection inherited across fork() must not
+        # be used, and the child is a new owner; reconnect and register again
+        if self.journal_path is None or self._stopping:
+            return self._db
+        if self._db is None or self._pid != os.getpid():
+            db = sqlite3.connect(self.journal_path, timeout=30.0, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS threads ("
+                "thread_id TEXT PRIMARY KEY, created_at REAL NOT NULL, owner TEXT)"
+            )
+            columns = [row[1] for row in db.execute("PRAGMA table_info(threads)")]
+            if "owner" not in columns:
+                # Journals written before owners were recorded; their rows count as ownerless
+                db.execute("ALTER TABLE threads ADD COLUMN owner TEXT")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS owners ("
+                "owner TEXT PRIMARY KEY, host TEXT NOT NULL, pid INTEGER NOT NULL, heartbeat REAL NOT NULL)"
+            )
+            self._db, self._pid = db, os.getpid()
+            self.owner = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}"
+            self._heartbeat()
+        return self._db
+
+    def _heartbeat(self):
+        self._db.execute(
+            "INSERT OR REPLACE INTO owners (owner, host, pid, heartbeat) VALUES (?, ?, ?, ?)",
+            (self.owner, socket.gethostname(), self._pid, time.time())
+        )
+        self._db.commit()
+
+    def _owner_gone(self, host: Optional[str], pid: Optional[int], heartbeat: Optional[float]) -> bool:
+        if heartbeat is None:
+            # Closed, or a row from before owners were recorded
+            return True
+        if host == socket.gethostname() and _process_running(pid) is False:
+            return True
+        return heartbeat <= time.time() - self.orphan_age
+
+    def track(self, thread_id: str):
+        """
+        Record a newly created thread so it can be found again if it leaks.
+
+        Args:
+            thread_id (str): The thread id
+        """
+        now = time.time()
+        with self._cond:
+            self._active[thread_id] = now
+            self._counters["tracked"] += 1
+            db = self._journal()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO threads (thread_id, created_at, owner) VALUES (?, ?, ?)",
+                    (thread_id, now, self.owner)
+                )
+                self._heartbeat()
+        self._ensure_worker()
+
+    def release(self, thread_id: str):
+        """
+        Hand a thread over for background deletion.
+
+        Args:
+            thread_id (str): The thread id
+        """
+        with self._cond:
+            self._active.pop(thread_id, None)
+            self._counters["released"] += 1
+            self._enqueue(thread_id, 0, time.monotonic())
+        self._ensure_worker()
+
+    def _enqueue(self, thread_id: str, attempt: int, due: float):
+        if thread_id in self._queued:
+            return
+        self._queued.add(thread_id)
+        heapq.heappush(self._queue, (due, attempt, thread_id))
+        self._cond.notify_all()
+
+    def sweep(self) -> int:
+        """
+        Queue orphaned threads for deletion (the janitor pass).
+
+        Orphans are threads whose deletes were given up on, journaled threads
+        of this cleaner older than orphan_age that no caller holds, and
+        journaled threads of owners that are gone. Another owner's threads are
+        taken over in the journal before they are queued, so only one janitor
+        deletes them.
+
+        Returns:
+            int: Number of threads queued
+        """
+        now = time.monotonic()
+        cutoff = time.time() - self.orphan_age
+        with self._cond:
+            self._counters["janitor_runs"] += 1
+            candidates = set(self._abandoned)
+            self._abandoned.clear()
+            db = self._journal()
+            if db is not None:
+                self._heartbeat()
+                rows = db.execute(
+                    "SELECT t.thread_id, t.created_at, t.owner, o.host, o.pid, o.heartbeat "
+                    "FROM threads t LEFT JOIN owners o ON o.owner = t.owner "
+                    "WHERE t.owner IS NOT ? OR t.created_at <= ?",
+                    (self.owner, cutoff)
+                ).fetchall()
+                orphans, gone = set(), set()
+                for thread_id, created_at, owner, host, pid, heartbeat in rows:
+                    if thread_id in self._active or thread_id in self._queued or thread_id in candidates:
+                        continue
+                    if owner == self.owner or owner is None:
+                        # Ownerless rows predate owner records; collect them by age as before
+                        if created_at <= cutoff:
+                            orphans.add(thread_id)
+                    elif self._owner_gone(host, pid, heartbeat):
+                        claimed = db.execute(
+                            "UPDATE threads SET owner = ? WHERE thread_id = ? AND owner IS ?",
+                            (self.owner, thread_id, owner)
+                        ).rowcount
+                        if claimed:
+                            orphans.add(thread_id)
+                            gone.add(owner)
+                db.executemany("DELETE FROM owners WHERE owner = ?", [(owner,) for owner in gone if owner])
+                db.commit()
+                self._counters["orphans_found"] += len(orphans)
+                candidates |= orphans
+            for thread_id in candidates:
+                self._enqueue(thread_id, 0, now)
+        if candidates:
+            print(f"🧹 Janitor queued {len(candidates)} orphaned thread(s) for deletion")
+            self._ensure_worker()
+        return len(candidates)
+
+    def _ensure_worker(self):
+        with self._cond:
+            # After fork() the child has the parent's worker object but not its thread
+            if (self._worker is None or not self._worker.is_alive()) and not self._stopping:
+                self._worker = threading.Thread(
+                    target=self._run,
+                    name="fabric-thread-cleaner",
+                    daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                item = None
+                while not self._stopping:
+                    now = time.monotonic()
+                    if self._queue and self._queue[0][0] <= now:
+                        item = heapq.heappop(self._queue)
+                        self._queued.discard(item[2])
+                        self._in_flight += 1
+                        break
+                    if now >= self._next_sweep:
+                        break
+                    wait = self._next_sweep - now
+                    if self._queue:
+                        wait = min(wait, self._queue[0][0] - now)
+                    self._cond.wait(wait)
+                if self._stopping:
+                    return
+
+            if item is None:
+                self._next_sweep = time.monotonic() + self.janitor_interval
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"⚠️ Thread janitor failed: {e}")
+                continue
+
+            _, attempt, thread_id = item
+            self._delete(thread_id, attempt)
+
+    def _delete(self, thread_id: str, attempt: int):
+        try:
+            self._delete_thread(thread_id)
+            outcome = "deleted"
+        except Exception as e:
+            if getattr(e, "status_code", None) == 404:
+                outcome = "already_gone"
+            else:
+                outcome = None
+                error = e
+
+        with self._cond:
+            self._in_flight -= 1
+            if outcome is not None:
+                self._counters[outcome] += 1
+                self._forget(thread_id)
+            else:
+                self._counters["delete_failures"] += 1
+                attempt += 1
+                if attempt < self.max_attempts:
+                    self._counters["retries"] += 1
+                    delay = min(self.max_retry_delay, self.retry_delay * (2 ** (attempt - 1)))
+                    delay *= random.uniform(0.5, 1.0)
+                    self._enqueue(thread_id, attempt, time.monotonic() + delay)
+                else:
+                    print(f"⚠️ Giving up deleting thread {thread_id} for now: {error}")
+                    self._counters["abandoned"] += 1
+                    self._abandoned.add(thread_id)
+            self._cond.notify_all()
+
+    def _forget(self, thread_id: str):
+        db = self._journal()
+        if db is not None:
+            db.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+            db.commit()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued delete has been attempted to completion.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds, None to wait indefinitely
+
+        Returns:
+            bool: True if the queue drained, False on timeout
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._queue and not self._in_flight,
+                timeout
+            )
+
+    def stats(self) -> dict:
+        """
+        Return cleanup and leak counters.
+
+        Returns:
+            dict: Counters plus pending, live, abandoned_pending and leak_rate
+        """
+        with self._cond:
+            result = dict(self._counters)
+            result["pending"] = len(self._queue) + self._in_flight
+            result["live"] = len(self._active)
+            result["abandoned_pending"] = len(self._abandoned)
+        leaked = result["abandoned"] + result["orphans_found"]
+        result["leak_rate"] = leaked / result["tracked"] if result["tracked"] else 0.0
+        return result
+
+    def close(self, timeout: float = 10.0):
+        """
+        Drain pending deletes (up to timeout) and stop the worker.
+
+        Threads still pending stay in the journal, if any, and this cleaner is
+        unregistered as their owner, so the next janitor pass of any process
+        sharing the journal collects them.
+
+        Args:
+            timeout (float): Maximum time to wait for pending deletes in seconds
+        """
+        _open_cleaners.discard(self)
+        self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None and worker is not threading.current_thread():
+            worker.join(timeout=1.0)
+        with self._cond:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.execute("DELETE FROM owners WHERE owner = ?", (self.owner,))
+                self._db.commit()
+                self._db.close()
+            self._db = None
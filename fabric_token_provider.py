@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Token provider for the Fabric Data Agent client.
+
+Wraps an azure-identity credential (or a static token) behind a lock-protected
+cache. A background thread renews the token well before it expires, so calls
+almost never wait on IMDS or the identity provider. One provider can be shared
+by every client in a process.
+
+azure-identity is imported when the first credential is created, not with
+this module.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from azure.core.credentials import AccessToken
+
+FABRIC_TOKEN_SCOPE = "https://api.fabric.microsoft.com/.default"
+
+
+class TokenProvider:
+    """
+    Thread-safe bearer token cache with proactive background refresh.
+
+    get_token() returns the cached token while it is comfortably valid. The
+    background refresher renews it refresh_margin seconds before expiry; if the
+    token still gets within min_validity seconds of expiry (refresher disabled
+    or failing), the caller refreshes inline under the lock so concurrent
+    callers share a single fetch.
+    """
+
+    def __init__(self, credential=None, scope: str = FABRIC_TOKEN_SCOPE,
+                 refresh_margin: float = 600.0,
+                 min_validity: float = 300.0,
+                 retry_delay: float = 30.0,
+                 background_refresh: bool = True,
+                 static_token: Optional[AccessToken] = None):
+        """
+        Initialize the token provider.
+
+        Args:
+            credential: An azure-identity credential exposing get_token()
+            scope (str): The scope to request tokens for
+            refresh_margin (float): Seconds before expiry the background refresher renews the token
+            min_validity (float): Seconds of validity below which get_token() refreshes inline
+            retry_delay (float): Seconds between background attempts after a failed refresh
+            background_refresh (bool): Run the background refresher thread
+            static_token (AccessToken): A fixed token to serve instead of using a credential
+        """
+        if credential is None and static_token is None:
+            raise ValueError("Either credential or static_token is required")
+
+        self.credential = credential
+        self.scope = scope
+        self.refresh_margin = max(refresh_margin, min_validity)
+        self.min_validity = min_validity
+        self.retry_delay = retry_delay
+        self.background_refresh = background_refresh and credential is not None
+        self._token = static_token
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._counters = {
+            "refreshes": 0,
+            "inline_refreshes": 0,
+            "background_refreshes": 0,
+            "failures": 0
+        }
+
+    @classmethod
+    def managed_identity(cls, client_id: Optional[str] = None, **kwargs) -> "TokenProvider":
+        """
+        Create a provider backed by a (system or user assigned) managed identity.
+
+        Args:
+            client_id (str): Client ID of a user assigned identity, None for SAMI
+            **kwargs: Passed to TokenProvider
+
+        Returns:
+            TokenProvider: The provider
+        """
+        # azure-identity is imported here rather than with the module; it is slow to import
+        from azure.identity import ManagedIdentityCredential
+        credential = ManagedIdentityCredential(client_id=client_id) if client_id else ManagedIdentityCredential()
+        return cls(credential, **kwargs)
+
+    @classmethod
+    def interactive_browser(cls, tenant_id: str, **kwargs) -> "TokenProvider":
+        """
+        Create a provider that signs the user in through the browser.
+
+        Args:
+            tenant_id (str): Your Azure tenant ID
+            **kwargs: Passed to TokenProvider
+
+        Returns:
+            TokenProvider: The provider
+        """
+        from azure.identity import InteractiveBrowserCredential
+        return cls(InteractiveBrowserCredential(tenant_id=tenant_id), **kwargs)
+
+    @classmethod
+    def static(cls, token: str, expires_on: Optional[float] = None) -> "TokenProvider":
+        """
+        Create a provider that always serves the given token.
+
+        Args:
+            token (str): The bearer token
+            expires_on (float): Expiry as a Unix timestamp, defaults to one hour from now
+
+        Returns:
+            TokenProvider: The provider
+        """
+        from azure.core.credentials import AccessToken
+        if expires_on is None:
+            expires_on = time.time() + 3600
+        return cls(static_token=AccessToken(token, int(expires_on)))
+
+    def current(self) -> Optional[AccessToken]:
+        """
+        Return the cached token without refreshing it.
+
+        Returns:
+            AccessToken: The cached token, or None if none has been fetched yet
+        """
+        return self._token
+
+    def _is_fresh(self, token: Optional[AccessToken], margin: float) -> bool:
+        return token is not None and token.expires_on > time.time() + margin
+
+    def get_token(self) -> AccessToken:
+        """
+        Return a valid token, refreshing inline only if the cached one is close to expiry.
+
+        Returns:
+            AccessToken: The bearer token
+        """
+        token = self._token
+        if self._is_fresh(token, self.min_validity):
+            return token
+
+        if self.credential is None:
+            if self._is_fresh(token, 0):
+                return token
+            raise ValueError("Static token has expired")
+
+        token = self._refresh(inline=True)
+        self._ensure_refresher()
+        return token
+
+    async def get_token_async(self) -> AccessToken:
+        """
+        Return a valid token without blocking the event loop.
+
+        Returns:
+            AccessToken: The bearer token
+        """
+        token = self._token
+        if self._is_fresh(token, self.min_validity):
+            return token
+        return await asyncio.to_thread(self.get_token)
+
+    def refresh(self) -> AccessToken:
+        """
+        Fetch a new token now, regardless of the cached one.
+
+        Returns:
+            AccessToken: The new bearer token
+        """
+        if self.credential is None:
+            return self.get_token()
+        return self._refresh(inline=True, force=True)
+
+    def _refresh(self, inline: bool, force: bool = False) -> AccessToken:
+        margin = self.min_validity if inline else self.refresh_margin
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if not force and self._is_fresh(self._token, margin):
+                return self._token
+            try:
+                print("Refreshing token...")
+                token = self.credential.get_token(self.scope)
+            except Exception as e:
+                self._counters["failures"] += 1
+                print(f"Token refresh failed: {e}")
+                raise
+            self._token = token
+            self._counters["refreshes"] += 1
+            self._counters["inline_refreshes" if inline else "background_refreshes"] += 1
+            print(f"Token obtained, expires at: {time.ctime(token.expires_on)}")
+            return token
+
+    def _ensure_refresher(self):
+        if not self.background_refresh or self._stop.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._refresh_loop,
+                    name="fabric-token-refresher",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            token = self._token
+            delay = token.expires_on - self.refresh_margin - time.time() if token else 0
+            # Never spin: credentials may hand back the same cached token for a while
+            if self._stop.wait(max(delay, self.retry_delay)):
+                return
+            try:
+                self._refresh(inline=False)
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        """
+        Return refresh counters and the current token expiry.
+
+        Returns:
+            dict: Counters plus expires_on and seconds_to_expiry
+        """
+        with self._lock:
+            result = dict(self._counters)
+        token = self._token
+        result["expires_on"] = token.expires_on if token else None
+        result["seconds_to_expiry"] = token.expires_on - time.time() if token else None
+        return result
+
+    def close(self):
+        """
+        Stop the background refresher.
+        """
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+
+
+_default_provider = None
+_default_provider_lock = threading.Lock()
+
+
+def default_token_provider() -> TokenProvider:
+    """
+    Return the process-wide managed identity token provider, creating it on first use.
+
+    Returns:
+        TokenProvider: The shared SAMI provider
+    """
+    global _default_provider
+    with _default_provider_lock:
+        if _default_provider is None:
+            _default_provider = TokenProvider.managed_identity()
+        return _default_provider
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Tracing and correlation IDs for the Fabric Data Agent client.
+
+A correlation id set with correlation_scope() (for example from the incoming
+web request) is sent as the ActivityId header of every Fabric request made
+in that scope, so a slow answer can be found in the service logs. With
+tracing enabled, each question opens a span with a child span per API round
+trip, tagged with the run id, thread id, poll count and SQL query count, and
+a W3C traceparent header is added to the Fabric requests.
+
+FabricTracing uses OpenTelemetry when it is installed (or any tracer with the
+same start_as_current_span() API), and otherwise a small built-in tracer
+that keeps finished spans in memory. Clients are created with tracing
+disabled.
+
+Example:
+    tracing = FabricTracing()
+    client = FabricDataAgentClient(tenant_id, url, tracing=tracing)
+    with correlation_scope(request.headers.get("X-Correlation-ID")):
+        answer = client.ask(question)
+
+Optional dependencies:
+- opentelemetry-api (spans are exported by whatever SDK the process configures)
+"""
+
+import contextvars
+import secrets
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+
+_correlation_id = contextvars.ContextVar("fabric_correlation_id", default=None)
+_current_span = contextvars.ContextVar("fabric_current_span", default=None)
+
+
+def new_correlation_id() -> str:
+    """
+    Return a new correlation id (a GUID, the format Fabric uses for ActivityId).
+    """
+    return str(uuid.uuid4())
+
+
+def current_correlation_id() -> Optional[str]:
+    """
+    Return the correlation id of the current context, or None.
+    """
+    return _correlation_id.get()
+
+
+@contextmanager
+def correlation_scope(correlation_id: Optional[str] = None):
+    """
+    Use a correlation id for every Fabric request made inside the block.
+
+    Args:
+        correlation_id (str): The id to propagate, a new one if None or empty
+
+    Yields:
+        str: The correlation id in effect
+    """
+    correlation_id = correlation_id or new_correlation_id()
+    token = _correlation_id.set(correlation_id)
+    try:
+        yield correlation_id
+    finally:
+        _correlation_id.reset(token)
+
+
+def _trace_id_for(correlation_id: Optional[str]) -> str:
+    # A GUID correlation id doubles as the trace id, so ActivityId and trace line up
+    if correlation_id:
+        try:
+            return uuid.UUID(correlation_id).hex
+        except ValueError:
+            pass
+    return secrets.token_hex(16)
+
+
+class SimpleSpan:
+    """
+    A finished or in-progress span recorded by SimpleTracer.
+    """
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Optional[dict]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.status = "UNSET"
+        self.error = None
+        self.start_time = time.time()
+        self.end_time = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end_time is None else self.end_time - self.start_time
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException):
+        self.error = f"{type(exception).__name__}: {exception}"
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error,
+            "start_time": self.start_time,
+            "duration": self.duration,
+        }
+
+    def __repr__(self) -> str:
+        return f"SimpleSpan({self.name!r}, trace_id={self.trace_id}, duration={self.duration})"
+
+
+class SimpleTracer:
+    """
+    Minimal tracer used when OpenTelemetry is not installed.
+
+    Spans get W3C-style trace and span ids and are kept in a bounded buffer.
+    """
+
+    def __init__(self, max_spans: int = 1000, on_end=None):
+        """
+        Initialize the tracer.
+
+        Args:
+            max_spans (int): Finished spans kept in finished_spans
+            on_end: Optional callable receiving each finished SimpleSpan
+        """
+        self.finished_spans = deque(maxlen=max_spans)
+        self.on_end = on_end
+
+    @contextmanager
+    def start_as_current_span(self, name: str, attributes: Optional[dict] = None):
+        parent = _current_span.get()
+        if parent is not None:
+            span = SimpleSpan(name, parent.trace_id, parent.span_id, attributes)
+        else:
+            span = SimpleSpan(name, _trace_id_for(current_correlation_id()), None, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+            if span.status == "UNSET":
+                span.status = "OK"
+        except BaseException as e:
+            span.record_exception(e)
+            span.status = "ERROR"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_time = time.time()
+            self.finished_spans.append(span)
+            if self.on_end is not None:
+                self.on_end(span)
+
+
+class FabricTracing:
+    """
+    Opens the client's spans and adds trace headers to its requests.
+    """
+
+    enabled = True
+
+    def __init__(self, tracer=None):
+        """
+        Initialize tracing.
+
+        Args:
+            tracer: An OpenTelemetry tracer (or compatible object); defaults to the
+                global OpenTelemetry tracer if opentelemetry is installed, else a SimpleTracer
+        """
+        self._otel = None
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+                tracer = trace.get_tracer("fabric_data_agent_client")
+            except ImportError:
+                tracer = SimpleTracer()
+        if not isinstance(tracer, SimpleTracer):
+            try:
+                from opentelemetry import propagate, trace
+                self._otel = (trace, propagate)
+            except ImportError:
+                pass
+        self.tracer = tracer
+
+    def span(self, name: str, attributes: Optional[dict] = None):
+        """
+        Return a context manager that opens a span as the current span.
+
+        Args:
+            name (str): Span name, e.g. "fabric.ask"
+            attributes (dict): Initial attributes
+        """
+        attributes = dict(attributes or {})
+        correlation_id = current_correlation_id()
+        if correlation_id:
+            attributes.setdefault("fabric.correlation_id", correlation_id)
+        return self.tracer.start_as_current_span(name, attributes=attributes)
+
+    def current_span(self):
+        """
+        Return the current span, or None.
+        """
+        if self._otel is not None:
+            span = self._otel[0].get_current_span()
+            return span if span.get_span_context().is_valid else None
+        return _current_span.get()
+
+    def annotate(self, attributes: dict):
+        """
+        Set attributes on the current span (None values are skipped).
+
+        Args:
+            attributes (dict): e.g. {"fabric.run_id": run.id}
+        """
+        span = self.current_span()
+        if span is None:
+            return
+        for key, value in attributes.items():
+            if value is not None:
+                span.set_attribute(key, value)
+
+    def trace_id(self) -> Optional[str]:
+        """
+        Return the current trace id as 32 hex characters, or None outside a span.
+        """
+        span = self.current_span()
+        if span is None:
+            return None
+        if self._otel is not None:
+            return format(span.get_span_context().trace_id, "032x")
+        return span.trace_id
+
+    def inject(self, headers):
+        """
+        Add the W3C traceparent header for the current span to outgoing headers.
+
+        Args:
+            headers: Mutable mapping of request headers
+        """
+        if self._otel is not None:
+            self._otel[1].inject(headers)
+            return
+        span = _current_span.get()
+        if span is not None:
+            headers["traceparent"] = f"00-{span.trace_id}-{span.span_id}-01"
+
+    @contextmanager
+    def round_trip(self, name: str, timer):
+        """
+        Time one API round trip with the metrics timer inside a child span.
+
+        Args:
+            name (str): Phase name, e.g. "thread_create"
+            timer: The metrics phase context manager
+        """
+        with self.span(f"fabric.{name}"), timer:
+            yield
+
+
+class _DisabledTracing:
+    """
+    Tracing used when it is off; spans are no-ops and no headers are added.
+    """
+
+    enabled = False
+    _span = nullcontext()
+
+    def span(self, name: str, attributes: Optional[dict] = None):
+        return self._span
+
+    def current_span(self):
+        return None
+
+    def annotate(self, attributes: dict):
+        pass
+
+    def trace_id(self) -> Optional[str]:
+        return None
+
+    def inject(self, headers):
+        pass
+
+
+DISABLED_TRACING = _DisabledTracing()
+
+
+def activity_id(tracing) -> str:
+    """
+    Return the ActivityId for an outgoing Fabric request.
+
+    Uses the correlation id when one is set, else the current trace id as a
+    GUID, else a fresh GUID per request as before.
+
+    Args:
+        tracing: The client's FabricTracing (or DISABLED_TRACING)
+
+    Returns:
+        str: The ActivityId header value
+    """
+    correlation_id = _correlation_id.get()
+    if correlation_id:
+        return correlation_id
+    trace_id = tracing.trace_id()
+    if trace_id:
+        return str(uuid.UUID(hex=trace_id))
+    return str(uuid.uuid4())
@@ -1,10 +1,7 @@
+# See: https://community.fabric.microsoft.com/t5/Fabric-platform/Does-Fabric-Data-agent-support-Managed-Identity-or-Service/m-p/4685958#M15611
 
-https://community.fabric.microsoft.com/t5/Fabric-platform/Does-Fabric-Data-agent-support-Managed-Identity-or-Service/m-p/4685958#M15611
-
-
-
-from azure.identity import ManagedIdentityCredential
 from fabric_data_agent_client import FabricDataAgentClient
+from fabric_token_provider import TokenProvider
 import json
 
 # ────────────────────────────────────────────────
@@ -18,22 +15,22 @@ QUESTION = "Question"
 # Authentication using Managed Identity
 # ────────────────────────────────────────────────
 print("Authenticating with Managed Identity...")
-credential = ManagedIdentityCredential()
+token_provider = TokenProvider.managed_identity()
 
-# Request Fabric API token
-token = credential.get_token("https://api.fabric.microsoft.com/.default").token
+# Request Fabric API token (renewed in the background from here on)
+token_provider.get_token()
 print("Authentication successful using Managed Identity.")
 
 # ────────────────────────────────────────────────
 # Initialize Fabric Data Agent client
 # ────────────────────────────────────────────────
-client = FabricDataAgentClient(TENANT_ID, DATA_AGENT_URL)
+client = FabricDataAgentClient(TENANT_ID, DATA_AGENT_URL, token_provider=token_provider)
 
 # ────────────────────────────────────────────────
 # Send question to Fabric Data Agent
 # ────────────────────────────────────────────────
 print(f"Sending question to Fabric Data Agent: {QUESTION}")
-response = client.ask(QUESTION, token)
+response = client.ask(QUESTION)
 print("Response received from Fabric Data Agent.")
 
 # ────────────────────────────────────────────────
@@ -56,5 +53,8 @@ try:
         print("No assistant response found.")
 except Exception as e:
     print(f"Error getting run details: {e}")
+finally:
+    # Delete the question threads before exiting
+    client.close()
 
 